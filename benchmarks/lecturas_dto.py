@@ -0,0 +1,96 @@
+# benchmarks/lecturas_dto.py
+"""Listados con entidades ORM + expunge frente a objetos de solo lectura (model/Lecturas.py).
+
+Usa una base SQLite en memoria con datos sintéticos:
+    python -m benchmarks.lecturas_dto [--filas N] [--repeticiones N]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('database_url', 'sqlite://')
+
+from sqlalchemy import text
+
+from db.Connection import DatabaseConnection
+from model.Comunidad import Comunidad
+from model.Habito import Habito
+from model.IncorporaComunidad import IncorporaComunidad
+from repository.ComunidadRepository import ComunidadRepository
+from repository.HabitosRepository import HabitosRepository
+from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
+
+
+def poblar(connection, filas: int):
+    """Un usuario con `filas` hábitos y `filas` comunidades a las que está incorporado"""
+    connection.execute(text(
+        "INSERT INTO usuarios (id_usuario, nombre, apellido, correo_electronico, contrasenia, "
+        "fecha_nacimiento, sexo, nombre_usuario, nombre_usuario_normalizado, correo_normalizado) "
+        "VALUES (1, 'N', 'A', 'u1@test.com', 'x', '1990-01-01', 'F', 'u1', 'u1', 'u1@test.com')"
+    ))
+    connection.execute(text(
+        "INSERT INTO habito (id_habito, nombre, frecuencia, fecha_creacion, id_usuario) "
+        "VALUES (:id, :nombre, 'Lunes', '2024-01-01', 1)"
+    ), [{'id': i, 'nombre': f'h{i:07d}'} for i in range(1, filas + 1)])
+    connection.execute(text(
+        "INSERT INTO comunidad (id_comunidad, nombre, id_creador) VALUES (:c, :nombre, 1)"
+    ), [{'c': c, 'nombre': f'c{c:07d}'} for c in range(1, filas + 1)])
+    connection.execute(text(
+        "INSERT INTO incorpora_comunidad (id_usuario, id_comunidad, estado, fecha_union) "
+        "VALUES (1, :c, 'activo', '2024-01-01')"
+    ), [{'c': c} for c in range(1, filas + 1)])
+
+
+def con_entidades(db, modelo, *filtros, orden):
+    """Camino anterior: entidades completas y expunge una por una"""
+    with db.get_session() as session:
+        entidades = session.query(modelo).filter(*filtros).order_by(orden).all()
+        for entidad in entidades:
+            session.expunge(entidad)
+        return entidades
+
+
+def medir(nombre: str, funcion, repeticiones: int):
+    tracemalloc.start()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    print(f"  {nombre:<12} {len(resultado):>7} filas  {min(tiempos) * 1000:9.1f} ms  pico {pico / 1024 / 1024:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    with db.get_engine().begin() as connection:
+        poblar(connection, args.filas)
+
+    casos = {
+        'obtener_habitos_por_usuario': (
+            lambda: con_entidades(db, Habito, Habito.id_usuario == 1, orden=Habito.nombre),
+            lambda: HabitosRepository().obtener_habitos_por_usuario(1),
+        ),
+        'obtener_todas_comunidades': (
+            lambda: con_entidades(db, Comunidad, orden=Comunidad.nombre),
+            lambda: ComunidadRepository().obtener_todas_comunidades(),
+        ),
+        'obtener_comunidades_de_usuario': (
+            lambda: con_entidades(db, IncorporaComunidad, IncorporaComunidad.id_usuario == 1,
+                                  orden=IncorporaComunidad.fecha_union.desc()),
+            lambda: IncorporaComunidadRepository().obtener_comunidades_de_usuario(1),
+        ),
+    }
+    for nombre, (entidades, lecturas) in casos.items():
+        print(nombre)
+        medir('entidades', entidades, args.repeticiones)
+        medir('lecturas', lecturas, args.repeticiones)
@@ -0,0 +1,98 @@
+# benchmarks/planes_indices.py
+"""Planes de ejecución de las consultas frecuentes antes y después de los índices de los modelos.
+
+Usa una base SQLite en memoria con datos sintéticos:
+    python -m benchmarks.planes_indices [--usuarios N] [--dias N]
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault('database_url', 'sqlite://')
+
+from sqlalchemy import text
+
+from db.Connection import DatabaseConnection
+from model.Base import Base
+
+CONSULTAS = {
+    'hábitos de un usuario': (
+        "SELECT * FROM habito WHERE id_usuario = :u ORDER BY nombre"
+    ),
+    'seguimientos de un usuario en un rango': (
+        "SELECT * FROM seguimiento_diario WHERE id_usuario = :u AND fecha BETWEEN :desde AND :hasta"
+    ),
+    'racha de un hábito': (
+        "SELECT fecha FROM seguimiento_diario WHERE id_usuario = :u AND id_habito = :h "
+        "AND fecha <= :hasta AND estado = 'completado' ORDER BY fecha DESC"
+    ),
+    'miembros activos de una comunidad': (
+        "SELECT id_usuario FROM incorpora_comunidad WHERE id_comunidad = :c AND estado = 'activo'"
+    ),
+    'comunidades de un usuario por estado': (
+        "SELECT * FROM incorpora_comunidad WHERE id_usuario = :u AND estado = 'activo' ORDER BY fecha_union DESC"
+    ),
+}
+
+
+def poblar(connection, usuarios: int, dias: int, habitos_por_usuario: int = 5, comunidades: int = 50):
+    """Insertar datos sintéticos con pocas sentencias multi-fila"""
+    inicio = date(2024, 1, 1)
+    connection.execute(text(
+        "INSERT INTO usuarios (id_usuario, nombre, apellido, correo_electronico, contrasenia, "
+        "fecha_nacimiento, sexo, nombre_usuario, nombre_usuario_normalizado, correo_normalizado) "
+        "VALUES (:id, 'N', 'A', :correo, 'x', '1990-01-01', 'F', :nombre, :nombre, :correo)"
+    ), [{'id': u, 'correo': f'u{u}@test.com', 'nombre': f'u{u}'} for u in range(1, usuarios + 1)])
+    connection.execute(text(
+        "INSERT INTO habito (id_habito, nombre, frecuencia, fecha_creacion, id_usuario) "
+        "VALUES (:id, :nombre, 'Lunes', '2024-01-01', :u)"
+    ), [{'id': (u - 1) * habitos_por_usuario + h, 'nombre': f'h{h}', 'u': u}
+        for u in range(1, usuarios + 1) for h in range(1, habitos_por_usuario + 1)])
+    connection.execute(text(
+        "INSERT INTO seguimiento_diario (fecha, id_habito, id_usuario, estado) VALUES (:f, :h, :u, :e)"
+    ), [{'f': inicio + timedelta(days=d), 'h': (u - 1) * habitos_por_usuario + h, 'u': u,
+         'e': 'completado' if (u + h + d) % 3 else 'pendiente'}
+        for u in range(1, usuarios + 1) for h in range(1, habitos_por_usuario + 1) for d in range(dias)])
+    connection.execute(text(
+        "INSERT INTO comunidad (id_comunidad, nombre) VALUES (:c, :nombre)"
+    ), [{'c': c, 'nombre': f'c{c}'} for c in range(1, comunidades + 1)])
+    connection.execute(text(
+        "INSERT INTO incorpora_comunidad (id_usuario, id_comunidad, estado, fecha_union) VALUES (:u, :c, :e, :f)"
+    ), [{'u': u, 'c': c, 'e': 'activo' if (u + c) % 4 else 'pendiente', 'f': inicio + timedelta(days=(u * c) % dias)}
+        for u in range(1, usuarios + 1) for c in range(1, comunidades + 1) if (u + c) % 5 == 0])
+
+
+def medir(connection, titulo: str):
+    print(f"\n=== {titulo} ===")
+    parametros = {'u': 7, 'h': 33, 'c': 10, 'desde': date(2024, 2, 1), 'hasta': date(2024, 3, 1)}
+    for nombre, sql in CONSULTAS.items():
+        plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), parametros).fetchall()
+        inicio = time.perf_counter()
+        for _ in range(20):
+            connection.execute(text(sql), parametros).fetchall()
+        ms = (time.perf_counter() - inicio) / 20 * 1000
+        print(f"- {nombre}: {ms:.3f} ms")
+        for fila in plan:
+            print(f"    {fila[-1]}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--dias', type=int, default=120)
+    args = parser.parse_args()
+
+    engine = DatabaseConnection().get_engine()
+    indices = [indice for tabla in Base.metadata.sorted_tables for indice in tabla.indexes]
+
+    with engine.begin() as connection:
+        for indice in indices:
+            indice.drop(bind=connection, checkfirst=True)
+        poblar(connection, args.usuarios, args.dias)
+        medir(connection, "sin índices secundarios")
+
+        for indice in indices:
+            indice.create(bind=connection)
+        connection.execute(text("ANALYZE"))
+        medir(connection, "con los índices de los modelos")
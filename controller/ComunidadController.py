@@ -6,6 +6,8 @@ from PyQt6.QtWidgets import QMainWindow, QListWidgetItem, QLabel, QMessageBox
 
 from controller.NuevaComunidadController import NuevaComunidadController
 from repository.ComunidadRepository import ComunidadRepository
+from repository.ActividadComunidadRepository import ActividadComunidadRepository
+from repository.RankingComunidadRepository import RankingComunidadRepository
 from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
 from repository.CategoriaRepository import CategoriasRepository
 from repository.UsuarioRepository import UsuarioRepository
@@ -18,6 +20,11 @@ logger = logging.getLogger(__name__)
 class ComunidadController(QObject):
     """Controlador para la gestión de comunidades"""
 
+    FILTRO_TODAS = "Todas"
+    FILTRO_MAS_ACTIVAS = "Más activas"
+    LIMITE_MAS_ACTIVAS = 20
+    LIMITE_RANKING_DETALLE = 5
+
     ventana_cerrada = pyqtSignal()
     error_ocurrido = pyqtSignal(str)
 
@@ -40,6 +47,8 @@ class ComunidadController(QObject):
         # Inicialización de repositorios
         self.comunidad_repository = ComunidadRepository()
         self.incorpora_repository = IncorporaComunidadRepository()
+        self.actividad_repository = ActividadComunidadRepository()
+        self.ranking_repository = RankingComunidadRepository()
         self.categorias_repository = CategoriasRepository()
         self.usuario_repository = UsuarioRepository()
 
@@ -69,28 +78,32 @@ class ComunidadController(QObject):
         if hasattr(self.ui, 'btnCrearUnaComunidad'):
             self.ui.btnCrearUnaComunidad.clicked.connect(self.abrir_ventana_crear_comunidad)
 
-        # Remover conexión del filtro ya que no lo usaremos
-        # if hasattr(self.ui, 'cmbFiltroComunidades'):
-        #     self.ui.cmbFiltroComunidades.currentTextChanged.connect(self._on_filtro_cambiado)
+        if hasattr(self.ui, 'cmbFiltroComunidades'):
+            self.ui.cmbFiltroComunidades.currentTextChanged.connect(self._on_filtro_cambiado)
 
     def _cargar_filtros(self):
-        """Cargar opciones del filtro - Ya no se usa"""
-        pass
-        # try:
-        #     if hasattr(self.ui, 'cmbFiltroComunidades'):
-        #         self.ui.cmbFiltroComunidades.clear()
-        #         self.ui.cmbFiltroComunidades.addItems(["Todas", "Unido"])
-        # except Exception as e:
-        #     logger.error(f"Error cargando filtros: {e}")
+        """Cargar opciones del filtro de la lista de comunidades"""
+        try:
+            if hasattr(self.ui, 'cmbFiltroComunidades'):
+                self.ui.cmbFiltroComunidades.blockSignals(True)
+                self.ui.cmbFiltroComunidades.clear()
+                self.ui.cmbFiltroComunidades.addItems([self.FILTRO_TODAS, self.FILTRO_MAS_ACTIVAS])
+                self.ui.cmbFiltroComunidades.blockSignals(False)
+        except Exception as e:
+            logger.error(f"Error cargando filtros: {e}")
 
     def _on_filtro_cambiado(self):
-        """Manejar cambio en el filtro de comunidades - Ya no se usa"""
-        pass
-        # try:
-        #     self.cargar_todas_comunidades()
-        # except Exception as e:
-        #     logger.error(f"Error aplicando filtro: {e}")
-        #     self.error_ocurrido.emit(f"Error aplicando filtro: {e}")
+        """Manejar cambio en el filtro de comunidades"""
+        try:
+            self.cargar_todas_comunidades()
+        except Exception as e:
+            logger.error(f"Error aplicando filtro: {e}")
+            self.error_ocurrido.emit(f"Error aplicando filtro: {e}")
+
+    def _filtro_actual(self) -> str:
+        if hasattr(self.ui, 'cmbFiltroComunidades'):
+            return self.ui.cmbFiltroComunidades.currentText()
+        return self.FILTRO_TODAS
 
     def cargar_mis_comunidades(self):
         """Cargar comunidades del usuario en la primera lista"""
@@ -150,28 +163,29 @@ class ComunidadController(QObject):
         self._limpiar_lista(self.ui.listTodasComunidades)
 
         try:
-            # Siempre mostrar todas las comunidades sin filtro
-            todas_comunidades = self.comunidad_repository.obtener_todas_comunidades()
+            if self._filtro_actual() == self.FILTRO_MAS_ACTIVAS:
+                # Top-K de la ventana de actividad, sin recorrer incorporaciones ni seguimientos
+                tendencia = self.actividad_repository.obtener_comunidades_tendencia(self.LIMITE_MAS_ACTIVAS)
+                todas_comunidades = [item['comunidad'] for item in tendencia]
+                mensaje_vacio = "Ninguna comunidad tuvo actividad esta semana 📉"
+            else:
+                todas_comunidades = self.comunidad_repository.obtener_todas_comunidades()
+                mensaje_vacio = "No hay comunidades disponibles 🌍"
 
             if not todas_comunidades:
-                self._mostrar_mensaje_sin_comunidades(
-                    self.ui.listTodasComunidades,
-                    "No hay comunidades disponibles 🌍"
-                )
+                self._mostrar_mensaje_sin_comunidades(self.ui.listTodasComunidades, mensaje_vacio)
                 return
 
-            # Convertir a formato con información de incorporación
-            comunidades_con_estado = []
-            for comunidad in todas_comunidades:
-                incorporacion = self.incorpora_repository.obtener_incorporacion(
-                    self.id_usuario, comunidad.id_comunidad
-                )
+            # Incorporaciones del usuario en todas las comunidades listadas, en una sola consulta
+            incorporaciones = self.incorpora_repository.obtener_incorporaciones_usuario_en(
+                self.id_usuario, [comunidad.id_comunidad for comunidad in todas_comunidades]
+            )
 
-                comunidades_con_estado.append({
-                    'comunidad': comunidad,
-                    'es_creador': comunidad.id_creador == self.id_usuario,
-                    'incorporacion': incorporacion
-                })
+            comunidades_con_estado = [{
+                'comunidad': comunidad,
+                'es_creador': comunidad.id_creador == self.id_usuario,
+                'incorporacion': incorporaciones.get(comunidad.id_comunidad)
+            } for comunidad in todas_comunidades]
 
             self._agregar_comunidades_a_lista_mejorada(comunidades_con_estado, self.ui.listTodasComunidades)
             logger.info(f"Cargadas {len(todas_comunidades)} comunidades disponibles")
@@ -190,6 +204,11 @@ class ComunidadController(QObject):
 
     def _agregar_comunidades_a_lista_mejorada(self, comunidades_data: List[dict], lista_widget):
         """Agregar comunidades a una lista específica con información mejorada"""
+        # Un solo chequeo de creadores incorporados para toda la lista
+        con_creador_incorporado = self.incorpora_repository.obtener_comunidades_con_creador_incorporado(
+            [item['comunidad'].id_comunidad for item in comunidades_data]
+        )
+
         for item in comunidades_data:
             try:
                 comunidad = item['comunidad']
@@ -197,7 +216,8 @@ class ComunidadController(QObject):
                 incorporacion = item['incorporacion']
 
                 comunidad_widget = self._crear_comunidad_widget_mejorado(
-                    comunidad, es_creador, incorporacion
+                    comunidad, es_creador, incorporacion,
+                    creador_incorporado=comunidad.id_comunidad in con_creador_incorporado
                 )
                 self._agregar_widget_a_lista(comunidad_widget, lista_widget)
 
@@ -205,7 +225,8 @@ class ComunidadController(QObject):
                 logger.error(f"Error agregando comunidad a lista: {e}")
                 continue
 
-    def _crear_comunidad_widget_mejorado(self, comunidad, es_creador: bool = False, incorporacion=None):
+    def _crear_comunidad_widget_mejorado(self, comunidad, es_creador: bool = False, incorporacion=None,
+                                         creador_incorporado: bool = False):
         """Crear widget de comunidad con información mejorada"""
         try:
             # Obtener categorías de la comunidad
@@ -224,14 +245,10 @@ class ComunidadController(QObject):
                 # Fallback si no se encuentra el usuario
                 creador_nombre = f"Usuario {comunidad.id_creador}"
 
-            # Obtener número real de miembros
-            num_miembros = self.incorpora_repository.contar_miembros_comunidad(
-                comunidad.id_comunidad, 'activo'
-            )
+            # Contador de miembros activos mantenido en la propia comunidad
+            num_miembros = comunidad.miembros_activos or 0
             # Sumar 1 si el creador no está en la tabla de incorporaciones
-            if not self.incorpora_repository.verificar_usuario_en_comunidad(
-                comunidad.id_creador, comunidad.id_comunidad
-            ):
+            if not creador_incorporado:
                 num_miembros += 1
 
             # Determinar estado de incorporación
@@ -408,6 +425,15 @@ Miembros pendientes: {stats['miembros_pendientes']}
 Miembros bloqueados: {stats['miembros_bloqueados']}
                 """
 
+                ranking = self.ranking_repository.obtener_ranking_comunidad(
+                    id_comunidad, self.LIMITE_RANKING_DETALLE
+                )
+                if ranking:
+                    mensaje = mensaje.rstrip() + "\n\nRanking de logros:\n" + "\n".join(
+                        f"{item['posicion']}. {item['nombre_usuario']} - {item['puntos_totales']} pts"
+                        for item in ranking
+                    )
+
                 QMessageBox.information(
                     self.vista,
                     f"Detalles de {comunidad.nombre}",
@@ -1,10 +1,12 @@
 import sys
 
 from PyQt6.QtCore import pyqtSignal, QObject, QDate, Qt
+from PyQt6.QtGui import QTextCharFormat, QColor
 from PyQt6.QtWidgets import QMainWindow, QListWidgetItem, QLabel, QMessageBox, QApplication
-from datetime import date
+from datetime import date, timedelta
 from typing import Optional
 import logging
+import math
 
 from controller.NuevoHabitoController import NuevoHabitoController
 from repository.CategoriaRepository import CategoriasRepository
@@ -24,6 +26,9 @@ class HabitosController(QObject):
     habito_actualizado = pyqtSignal(int)  # Señal para notificar actualizaciones
     error_ocurrido = pyqtSignal(str)  # Señal para notificar errores
 
+    # Escala del mapa de calor: sin completar, hasta 25%, 50%, 75% y 100%
+    COLORES_MAPA_CALOR = ["#ebedf0", "#9be9a8", "#40c463", "#30a14e", "#216e39"]
+
     def __init__(self, id_usuario: int):
         super().__init__()
 
@@ -33,6 +38,10 @@ class HabitosController(QObject):
         self.id_usuario = id_usuario
         self.fecha_seleccionada = date.today()
 
+        # Matriz de cumplimiento del año mostrado en el calendario
+        self.mapa_calor = {}
+        self._anio_mapa_calor = None
+
         # Referencias a ventanas secundarias
         self.ventana_nuevo_habito = None
 
@@ -57,6 +66,7 @@ class HabitosController(QObject):
         try:
             self._conectar_eventos()
             self._configurar_calendario()
+            self._cargar_mapa_calor(self.fecha_seleccionada.year)
             self.cargar_habitos_en_lista()
             logger.info(f"Controlador de hábitos inicializado para usuario {self.id_usuario}")
         except Exception as e:
@@ -70,6 +80,7 @@ class HabitosController(QObject):
         # Conectar calendario si existe
         if self._calendario_disponible():
             self.ui.calendarioHabitos.selectionChanged.connect(self._on_fecha_cambiada)
+            self.ui.calendarioHabitos.currentPageChanged.connect(self._on_pagina_calendario_cambiada)
         else:
             logger.warning("Calendario no disponible en la interfaz")
 
@@ -116,6 +127,71 @@ class HabitosController(QObject):
             logger.error(f"Error al cambiar fecha: {e}")
             self.error_ocurrido.emit(f"Error al cambiar fecha: {e}")
 
+    def _on_pagina_calendario_cambiada(self, anio: int, mes: int):
+        """Recargar el mapa de calor al navegar a otro año"""
+        if anio != self._anio_mapa_calor:
+            self._cargar_mapa_calor(anio)
+
+    def _cargar_mapa_calor(self, anio: int):
+        """Colorear cada día del año según el porcentaje de hábitos completados"""
+        if not self._calendario_disponible():
+            return
+
+        try:
+            self.mapa_calor = self.habitos_repository.obtener_matriz_cumplimiento(
+                self.id_usuario, date(anio, 1, 1), date(anio, 12, 31)
+            )
+            self._anio_mapa_calor = anio
+
+            # Una fecha nula limpia los formatos de todos los días
+            self.ui.calendarioHabitos.setDateTextFormat(QDate(), QTextCharFormat())
+
+            if not self.mapa_calor:
+                return
+
+            fecha_inicio = self.mapa_calor['fecha_inicio']
+            for desfase, ratio in enumerate(self.mapa_calor['ratio_diario'].tolist()):
+                self._pintar_dia_mapa_calor(fecha_inicio + timedelta(days=desfase), ratio)
+
+            logger.info(f"Mapa de calor cargado para {anio}")
+
+        except Exception as e:
+            logger.error(f"Error cargando mapa de calor de {anio}: {e}")
+
+    def _pintar_dia_mapa_calor(self, fecha: date, ratio: float):
+        """Aplicar al día el color correspondiente a su porcentaje de cumplimiento"""
+        formato = QTextCharFormat()
+        if not math.isnan(ratio):
+            nivel = min(math.ceil(ratio * 4), 4)
+            formato.setBackground(QColor(self.COLORES_MAPA_CALOR[nivel]))
+            if nivel >= 3:
+                formato.setForeground(QColor("white"))
+
+        qdate = QDate(fecha.year, fecha.month, fecha.day)
+        self.ui.calendarioHabitos.setDateTextFormat(qdate, formato)
+
+    def _actualizar_mapa_calor_dia(self, habito_id: int, fecha: date, completado: bool):
+        """Actualizar en memoria una celda de la matriz y repintar solo ese día"""
+        if not self.mapa_calor or not self._calendario_disponible():
+            return
+        if not self.mapa_calor['fecha_inicio'] <= fecha <= self.mapa_calor['fecha_fin']:
+            return
+
+        filas = (self.mapa_calor['ids_habitos'] == habito_id).nonzero()[0]
+        if not len(filas):
+            return
+
+        columna = (fecha - self.mapa_calor['fecha_inicio']).days
+        self.mapa_calor['completados'][filas[0], columna] = completado
+
+        programados = self.mapa_calor['programados'][:, columna]
+        total = int(programados.sum())
+        completados = int((self.mapa_calor['completados'][:, columna] & programados).sum())
+        ratio = completados / total if total else float('nan')
+
+        self.mapa_calor['ratio_diario'][columna] = ratio
+        self._pintar_dia_mapa_calor(fecha, ratio)
+
     def cargar_habitos_en_lista(self):
         """Cargar hábitos del usuario para la fecha seleccionada"""
         self._limpiar_lista()
@@ -239,7 +315,7 @@ class HabitosController(QObject):
 
             nuevo_estado = "completado" if widget.estado == "pendiente" else "pendiente"
 
-            # Crear o actualizar seguimiento en BD
+            # Guardar localmente; la sincronización con la BD remota ocurre en segundo plano
             seguimiento_data = {
                 'id_usuario': self.id_usuario,
                 'id_habito': habito_id,
@@ -247,16 +323,17 @@ class HabitosController(QObject):
                 'estado': nuevo_estado
             }
 
-            seguimiento = self.seguimiento_repository.crear_o_actualizar_seguimiento(seguimiento_data)
+            seguimiento = self.seguimiento_repository.guardar_seguimiento_diferido(seguimiento_data)
 
             if seguimiento:
                 # Actualizar widget visual
                 self._actualizar_widget_estado(widget, nuevo_estado)
+                self._actualizar_mapa_calor_dia(habito_id, self.fecha_seleccionada, nuevo_estado == "completado")
                 self.habito_actualizado.emit(habito_id)
                 logger.info(
                     f"Estado del hábito {habito_id} cambiado a {nuevo_estado} para fecha {self.fecha_seleccionada}")
             else:
-                self._mostrar_error("Error al actualizar estado en la base de datos")
+                self._mostrar_error("Error al guardar el estado del hábito")
 
         except Exception as e:
             logger.error(f"Error cambiando estado hábito {habito_id}: {e}")
@@ -277,7 +354,7 @@ class HabitosController(QObject):
         try:
             respuesta = self._confirmar_eliminacion()
             if respuesta:
-                if self.habitos_repository.eliminar_habito(habito_id):
+                if self.habitos_repository.eliminar_habito_diferido(habito_id):
                     self.actualizar_habitos()
                     self._mostrar_informacion("Hábito eliminado exitosamente")
                     logger.info(f"Hábito {habito_id} eliminado exitosamente")
@@ -333,6 +410,8 @@ class HabitosController(QObject):
         """Refrescar la lista de hábitos"""
         logger.info("Actualizando lista de hábitos")
         self.cargar_habitos_en_lista()
+        if self._anio_mapa_calor:
+            self._cargar_mapa_calor(self._anio_mapa_calor)
 
     def obtener_fecha_seleccionada(self) -> date:
         """Obtener la fecha actualmente seleccionada"""
@@ -2,6 +2,7 @@ from typing import Optional
 from PyQt6 import QtWidgets
 from PyQt6.QtWidgets import QMessageBox, QMainWindow
 
+from controller.TareaSegundoPlano import ejecutar_en_segundo_plano
 from model.Usuario import Usuario
 from repository.UsuarioRepository import UsuarioRepository
 from view.windows.VentanaLogin import Ui_Login
@@ -15,6 +16,8 @@ class LoginController:
         self.registro_controller = None
         # Usuario actualmente autenticado
         self.usuario_actual: Optional[Usuario] = None
+        # Autenticación en curso (el hash de la contraseña se calcula en segundo plano)
+        self._autenticando = False
 
         # Configuración de la ventana principal
         self.vista = QMainWindow()
@@ -45,6 +48,9 @@ class LoginController:
 
     def iniciar_sesion(self):
         """Maneja el proceso de inicio de sesión"""
+        if self._autenticando:
+            return
+
         nombre_usuario = self.ui.txtNombreUsuario.text().strip()
         contrasenia = self.ui.txtPassword.text().strip()
 
@@ -53,21 +59,40 @@ class LoginController:
             if not self._validar_campos(nombre_usuario, contrasenia):
                 return
 
-            # Autenticar usuario
-            usuario = self.usuario_repository.autenticar_usuario(nombre_usuario, contrasenia)
-
-            if usuario:
-                self.usuario_actual = usuario
-                print(f"Usuario {usuario.nombre} ha iniciado sesión correctamente")
-                self._abrir_menu_principal()
-            else:
-                self.mostrar_error("Usuario o contraseña incorrectos")
-                self._limpiar_password()
+            # Autenticar usuario sin bloquear la interfaz mientras se verifica el hash
+            self._establecer_autenticando(True)
+            ejecutar_en_segundo_plano(
+                self.usuario_repository.autenticar_usuario, nombre_usuario, contrasenia,
+                al_terminar=self._on_autenticacion_terminada,
+                al_fallar=self._on_autenticacion_fallida
+            )
 
         except Exception as e:
+            self._establecer_autenticando(False)
             self.mostrar_error(f"Error al iniciar sesión: {str(e)}")
             print(f"Error en iniciar_sesion: {e}")
 
+    def _on_autenticacion_terminada(self, usuario: Optional[Usuario]):
+        """Resultado de la autenticación, ya en el hilo de la interfaz"""
+        self._establecer_autenticando(False)
+        if usuario:
+            self.usuario_actual = usuario
+            print(f"Usuario {usuario.nombre} ha iniciado sesión correctamente")
+            self._abrir_menu_principal()
+        else:
+            self.mostrar_error("Usuario o contraseña incorrectos")
+            self._limpiar_password()
+
+    def _on_autenticacion_fallida(self, mensaje: str):
+        self._establecer_autenticando(False)
+        self.mostrar_error(f"Error al iniciar sesión: {mensaje}")
+        print(f"Error en iniciar_sesion: {mensaje}")
+
+    def _establecer_autenticando(self, autenticando: bool):
+        self._autenticando = autenticando
+        self.ui.btnIniciarSesion.setEnabled(not autenticando)
+        self.ui.btnRegistrarse.setEnabled(not autenticando)
+
     def _validar_campos(self, nombre_usuario: str, contrasenia: str) -> bool:
         """Valida que los campos no estén vacíos"""
         if not nombre_usuario or not contrasenia:
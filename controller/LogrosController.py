@@ -1,7 +1,6 @@
 from PyQt6.QtCore import pyqtSignal, QObject
 from PyQt6.QtWidgets import QMessageBox, QMainWindow
-from sqlalchemy.orm import sessionmaker
-from db.Connection import DatabaseConnection
+from controller.TareaSegundoPlano import ejecutar_en_segundo_plano
 from repository.LogroRepository import LogroRepository
 from repository.UsuarioRepository import UsuarioRepository
 from view.widgets.LogroWidget import LogroWidget
@@ -10,14 +9,15 @@ class LogrosController(QObject):
     # Señal para notificar que se cerró la ventana
     ventana_cerrada = pyqtSignal()
 
+    # Logros pedidos al repositorio por cada página de la lista
+    TAMANO_PAGINA = 30
+
     def __init__(self, id_usuario, parent_controller=None):
         super().__init__()
         self.vista = QMainWindow()
         self.id_usuario = id_usuario
         self.parent_controller = parent_controller
 
-        self.db = DatabaseConnection()
-        self.Session = sessionmaker(bind=self.db.get_engine())
         self.logro_repository = LogroRepository()
         self.usuario_repository = UsuarioRepository()
 
@@ -28,39 +28,51 @@ class LogrosController(QObject):
         self.vista.closeEvent = self.on_close
 
     def _inicializar_vista(self):
-        """Inicializa la vista con los datos del usuario"""
-        try:
-            print(f"DEBUG: Inicializando vista de logros para usuario {self.id_usuario}")
-            session = self.Session()
-
-            print("DEBUG: Obteniendo usuario...")
-            usuario = self.usuario_repository.obtener_usuario_por_id(self.id_usuario)
-            print(f"DEBUG: Usuario obtenido: {usuario}")
-
-            print("DEBUG: Obteniendo logros...")
-            logros = self.logro_repository.obtener_logros_por_usuario(self.id_usuario)
-            print(f"DEBUG: Logros obtenidos: {len(logros) if logros else 0}")
-
-            session.close()
+        """Crea la vista vacía y pide los datos en segundo plano"""
+        nombre_usuario = f"Usuario {self.id_usuario}"
+        self.ui = LogroWidget(nombre_usuario=nombre_usuario)
+        self.vista.setCentralWidget(self.ui)
+        self.vista.setWindowTitle(f"Logros de {nombre_usuario}")
+
+        # La vista pide la primera página (y las siguientes al desplazarse) a través del modelo
+        self.ui.modelo.pagina_solicitada.connect(self._cargar_pagina)
+
+        ejecutar_en_segundo_plano(
+            self._consultar_encabezado,
+            al_terminar=self._mostrar_encabezado,
+            al_fallar=self._on_error_carga
+        )
+
+    def _consultar_encabezado(self):
+        """Nombre del usuario y conteo de logros (corre fuera del hilo de la interfaz)"""
+        usuario = self.usuario_repository.obtener_usuario_por_id(self.id_usuario)
+        conteo = self.logro_repository.contar_logros_usuario(self.id_usuario)
+        return (usuario.nombre if usuario else None), conteo
+
+    def _mostrar_encabezado(self, resultado):
+        nombre_usuario, conteo = resultado
+        if nombre_usuario:
+            self.ui.establecer_usuario(nombre_usuario)
+            self.vista.setWindowTitle(f"Logros de {nombre_usuario}")
+        self.ui.mostrar_resumen(conteo['desbloqueados'], conteo['total'])
 
-            nombre_usuario = usuario.nombre if usuario else f"Usuario {self.id_usuario}"
-            print(f"DEBUG: Creando LogroWidget con nombre: {nombre_usuario}")
+    def _cargar_pagina(self, desplazamiento: int):
+        ejecutar_en_segundo_plano(
+            self.logro_repository.obtener_pagina_logros_usuario,
+            self.id_usuario, self.TAMANO_PAGINA, desplazamiento,
+            al_terminar=self._agregar_pagina,
+            al_fallar=self._on_error_carga
+        )
 
-            self.ui = LogroWidget(logros, nombre_usuario=nombre_usuario)
-            self.vista.setCentralWidget(self.ui)
-            self.vista.setWindowTitle(f"Logros de {nombre_usuario}")
+    def _agregar_pagina(self, logros):
+        self.ui.modelo.agregar_pagina(logros, hay_mas=len(logros) == self.TAMANO_PAGINA)
 
-            print("DEBUG: Vista inicializada correctamente")
-        except Exception as e:
-            print(f"ERROR inicializando vista de logros: {e}")
-            import traceback
-            traceback.print_exc()
-            self.mostrar_error(f"Error cargando logros: {str(e)}")
+    def _on_error_carga(self, mensaje: str):
+        self.ui.modelo.cancelar_carga()
+        self.mostrar_error(f"Error cargando logros: {mensaje}")
 
     def mostrar(self):
-        print(f"DEBUG: Mostrando ventana de logros")
         self.vista.show()
-        print(f"DEBUG: Ventana mostrada, visible: {self.vista.isVisible()}")
 
     def cerrar_vista(self):
         self.vista.close()
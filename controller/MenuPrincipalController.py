@@ -35,6 +35,7 @@ class MenuPrincipalController(QObject):
         self.categorias_repository = CategoriasRepository()
         self.logro_repository = LogroRepository()
         self.nivel_repository = NivelRepository()
+        self.seguimiento_repository = SeguimientoDiarioRepository()
 
         # Diccionario para gestionar controladores secundarios
         self.controladores = {}
@@ -504,7 +505,7 @@ class MenuPrincipalController(QObject):
         try:
             respuesta = self._confirmar_eliminacion()
             if respuesta:
-                if self.habitos_repository.eliminar_habito(habito_id):
+                if self.habitos_repository.eliminar_habito_diferido(habito_id):
                     self.mostrar_exito("Hábito eliminado exitosamente")
                     self._cargar_habitos_del_dia()  # Recargar la lista
                     logger.info(f"Hábito {habito_id} eliminado exitosamente")
@@ -515,38 +516,29 @@ class MenuPrincipalController(QObject):
             self.mostrar_error(f"Error eliminando hábito: {e}")
 
     def _on_cambiar_estado_habito(self, habito_id: int):
-        """Cambiar estado del hábito (corregido para usar métodos correctos del repositorio)"""
+        """Cambiar estado del hábito; se guarda localmente y se sincroniza en segundo plano"""
         try:
-            fecha_hoy = date.today()
-
-            # Obtener el estado actual del hábito desde la base de datos
-            seguimiento_repo = SeguimientoDiarioRepository()
-            seguimiento_actual = seguimiento_repo.obtener_seguimiento_por_clave(
-                self.usuario_autenticado.id_usuario, habito_id, fecha_hoy
-            )
+            widget = self.sender()
+            if not widget:
+                logger.warning("No se pudo obtener el widget que envió la señal")
+                return
 
-            # Determinar el nuevo estado
-            if seguimiento_actual and seguimiento_actual.estado == "completado":
-                nuevo_estado = "pendiente"
-            else:
-                nuevo_estado = "completado"
+            nuevo_estado = "completado" if widget.estado == "pendiente" else "pendiente"
 
-            # Crear o actualizar seguimiento en BD
             seguimiento_data = {
                 'id_usuario': self.usuario_autenticado.id_usuario,
                 'id_habito': habito_id,
-                'fecha': fecha_hoy,
+                'fecha': date.today(),
                 'estado': nuevo_estado
             }
 
-            seguimiento = seguimiento_repo.crear_o_actualizar_seguimiento(seguimiento_data)
+            seguimiento = self.seguimiento_repository.guardar_seguimiento_diferido(seguimiento_data)
 
             if seguimiento:
-                # Recargar toda la lista para mostrar los cambios
-                self._cargar_habitos_del_dia()
+                self._actualizar_widget_estado(widget, nuevo_estado)
                 logger.info(f"Estado del hábito {habito_id} cambiado a {nuevo_estado}")
             else:
-                self.mostrar_error("Error al actualizar estado en la base de datos")
+                self.mostrar_error("Error al guardar el estado del hábito")
 
         except Exception as e:
             logger.error(f"Error cambiando estado hábito {habito_id}: {e}")
@@ -6,9 +6,10 @@ import logging
 from PyQt6.QtCore import pyqtSignal, QObject, QDate
 from PyQt6.QtWidgets import QMessageBox, QMainWindow, QApplication, QLineEdit
 
+from controller.TareaSegundoPlano import ejecutar_en_segundo_plano
+from model.PerfilUsuario import PerfilUsuario
 from model.Usuario import Usuario
 from repository.UsuarioRepository import UsuarioRepository
-from repository.PerfilUsuarioRepository import PerfilUsuarioRepository
 from view.windows.VentanaPerfilUsuario import Ui_ventanaRegistrarse
 
 # Configurar logging
@@ -31,15 +32,18 @@ class PerfilUsuarioController(QObject):
         self.id_usuario = id_usuario
         self.parent_controller = parent_controller
         self.usuario_actual = None
+        # Valores del formulario tal como se cargaron, para guardar solo lo modificado
+        self._valores_cargados = {'usuario': {}, 'perfil': {}}
+        # Cambios enviados al repositorio mientras el guardado está en curso
+        self._cambios_en_curso = None
 
         # Inicialización de vista
         self.vista = QMainWindow()
         self.ui = Ui_ventanaRegistrarse()
         self.ui.setupUi(self.vista)
 
-        # Inicialización de repositorios
+        # Inicialización de repositorio (usuario y perfil se leen y guardan juntos)
         self.usuario_repository = UsuarioRepository()
-        self.perfil_repository = PerfilUsuarioRepository()
 
         self._setup_controller()
 
@@ -160,6 +164,7 @@ class PerfilUsuarioController(QObject):
                 return
 
             self._llenar_campos_usuario()
+            self._valores_cargados = self._recopilar_datos_formulario()
             logger.info(f"Datos del usuario {self.id_usuario} cargados exitosamente")
 
         except Exception as e:
@@ -168,25 +173,18 @@ class PerfilUsuarioController(QObject):
             self.error_ocurrido.emit(f"Error cargando datos: {e}")
 
     def _obtener_usuario(self) -> Optional[Usuario]:
-        """Obtener datos completos del usuario con su perfil usando ambos repositorios"""
+        """Obtener datos completos del usuario con su perfil en una sola consulta"""
         try:
-            # Obtener el usuario usando UsuarioRepository
-            usuario = self.usuario_repository.obtener_usuario_por_id(self.id_usuario)
+            usuario = self.usuario_repository.obtener_usuario_con_perfil(self.id_usuario)
 
             if not usuario:
                 logger.error(f"Usuario {self.id_usuario} no encontrado")
                 return None
 
-            # Obtener el perfil usando PerfilUsuarioRepository
-            perfil = self.perfil_repository.obtener_perfil_por_usuario(self.id_usuario)
-
-            # Asignar el perfil al usuario si existe
-            if perfil:
-                usuario.perfil = perfil
+            if usuario.perfil:
                 logger.info(f"Perfil cargado para usuario {self.id_usuario}")
             else:
                 logger.info(f"No se encontró perfil para usuario {self.id_usuario}")
-                usuario.perfil = None
 
             return usuario
 
@@ -208,8 +206,9 @@ class PerfilUsuarioController(QObject):
             self._llenar_campo_texto('txtApellido', self.usuario_actual.apellido, "apellido")
             self._llenar_campo_texto('txtNombreUsuario', self.usuario_actual.nombre_usuario, "nombre_usuario")
             self._llenar_campo_texto('txtCorreo', self.usuario_actual.correo_electronico, "correo_electronico")
-            self._llenar_campo_texto('txtPassword', self.usuario_actual.contrasenia, "contrasenia")
-            self._llenar_campo_texto('txtConfirmarPassword', self.usuario_actual.contrasenia, "confirmar_contrasenia")
+            # La contraseña solo se guarda como hash: vacío significa conservar la actual
+            self._llenar_campo_texto('txtPassword', '', "contrasenia")
+            self._llenar_campo_texto('txtConfirmarPassword', '', "confirmar_contrasenia")
 
             # Llenar información personal
             self._seleccionar_sexo(self.usuario_actual.sexo)
@@ -327,7 +326,10 @@ class PerfilUsuarioController(QObject):
             logger.error(f"Error estableciendo fecha de nacimiento: {e}")
 
     def _guardar_perfil(self):
-        """Guardar cambios en el perfil del usuario"""
+        """Guardar solo los campos modificados desde la carga del perfil"""
+        if self._cambios_en_curso is not None:
+            return
+
         try:
             logger.info("Iniciando proceso de guardado del perfil")
 
@@ -336,25 +338,82 @@ class PerfilUsuarioController(QObject):
             if not self._validar_datos(datos):
                 return
 
-            # Usar el repositorio para actualizar
-            usuario_actualizado = self.usuario_repository.actualizar_usuario(
-                self.id_usuario, datos
-            )
+            cambios = self._calcular_cambios(datos)
+            if not cambios['usuario'] and not cambios['perfil']:
+                logger.info(f"Perfil del usuario {self.id_usuario} sin cambios; no se escribe en la BD")
+                self._mostrar_informacion("No hay cambios para guardar")
+                return
 
-            if usuario_actualizado:
-                # Recargar el usuario completo con su perfil
-                self.usuario_actual = self._obtener_usuario()
-                self._mostrar_informacion("Perfil actualizado exitosamente")
-                self.perfil_actualizado.emit(self.id_usuario)
-                logger.info(f"Perfil del usuario {self.id_usuario} actualizado exitosamente")
-            else:
-                self._mostrar_error("Error al actualizar el perfil")
+            # Actualizar en segundo plano: una contraseña nueva se guarda con un hash costoso
+            self._establecer_guardando(True)
+            self._cambios_en_curso = cambios
+            ejecutar_en_segundo_plano(
+                self.usuario_repository.actualizar_usuario, self.id_usuario, cambios,
+                al_terminar=self._on_perfil_guardado,
+                al_fallar=self._on_guardado_fallido
+            )
 
         except Exception as e:
+            self._establecer_guardando(False)
             logger.error(f"Error guardando perfil del usuario {self.id_usuario}: {e}")
             self._mostrar_error(f"Error guardando perfil: {e}")
             self.error_ocurrido.emit(f"Error guardando perfil: {e}")
 
+    def _calcular_cambios(self, datos: dict) -> dict:
+        """Campos del formulario cuyo valor difiere del cargado (una contraseña escrita siempre cuenta)"""
+        return {
+            seccion: {
+                campo: valor for campo, valor in datos.get(seccion, {}).items()
+                if campo not in self._valores_cargados.get(seccion, {})
+                or self._valores_cargados[seccion][campo] != valor
+            }
+            for seccion in ('usuario', 'perfil')
+        }
+
+    def _on_perfil_guardado(self, actualizado: bool):
+        """Resultado de la actualización, ya en el hilo de la interfaz"""
+        cambios = self._cambios_en_curso
+        self._establecer_guardando(False)
+        if actualizado:
+            # Aplicar los cambios a lo cargado en lugar de volver a consultar la BD
+            self._aplicar_cambios(cambios)
+            self._llenar_campo_texto('txtPassword', '', "contrasenia")
+            self._llenar_campo_texto('txtConfirmarPassword', '', "confirmar_contrasenia")
+            self._mostrar_informacion("Perfil actualizado exitosamente")
+            self.perfil_actualizado.emit(self.id_usuario)
+            logger.info(f"Perfil del usuario {self.id_usuario} actualizado: "
+                        f"{sorted(cambios['usuario'])} {sorted(cambios['perfil'])}")
+        else:
+            self._mostrar_error("Error al actualizar el perfil")
+
+    def _aplicar_cambios(self, cambios: dict):
+        """Actualizar el usuario en memoria y la instantánea con lo que se guardó"""
+        cambios_usuario = {campo: valor for campo, valor in cambios['usuario'].items() if campo != 'contrasenia'}
+        for seccion, valores in (('usuario', cambios_usuario), ('perfil', cambios['perfil'])):
+            self._valores_cargados.setdefault(seccion, {}).update(valores)
+
+        if not self.usuario_actual:
+            return
+        for campo, valor in cambios_usuario.items():
+            setattr(self.usuario_actual, campo, valor)
+        if cambios['perfil']:
+            if self.usuario_actual.perfil is None:
+                self.usuario_actual.perfil = PerfilUsuario(id_usuario=self.id_usuario)
+            for campo, valor in cambios['perfil'].items():
+                setattr(self.usuario_actual.perfil, campo, valor)
+
+    def _on_guardado_fallido(self, mensaje: str):
+        self._establecer_guardando(False)
+        logger.error(f"Error guardando perfil del usuario {self.id_usuario}: {mensaje}")
+        self._mostrar_error(f"Error guardando perfil: {mensaje}")
+        self.error_ocurrido.emit(f"Error guardando perfil: {mensaje}")
+
+    def _establecer_guardando(self, guardando: bool):
+        if not guardando:
+            self._cambios_en_curso = None
+        if hasattr(self.ui, 'btnRegistrarse'):
+            self.ui.btnRegistrarse.setEnabled(not guardando)
+
     def _recopilar_datos_formulario(self) -> dict:
         """Recopilar datos del formulario usando los nombres correctos de los campos"""
         datos = {
@@ -478,7 +537,8 @@ class PerfilUsuarioController(QObject):
                     self._mostrar_error("Las contraseñas no coinciden")
                     return False
 
-                if len(password) < 6:
+                # Vacío conserva la contraseña actual
+                if password and len(password) < 6:
                     self._mostrar_error("La contraseña debe tener al menos 6 caracteres")
                     return False
 
@@ -0,0 +1,44 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _SenalesTarea(QObject):
+    terminada = pyqtSignal(object)
+    fallida = pyqtSignal(str)
+
+
+class TareaSegundoPlano(QRunnable):
+    """Ejecuta una consulta en el pool de hilos de Qt y entrega el resultado al hilo de la interfaz.
+
+    Las señales se conectan desde el hilo principal, por lo que los slots corren
+    allí y pueden tocar widgets sin problemas.
+    """
+
+    def __init__(self, funcion, *args, **kwargs):
+        super().__init__()
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = _SenalesTarea()
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.error(f"Error en tarea de segundo plano {getattr(self.funcion, '__name__', self.funcion)}: {e}")
+            self.senales.fallida.emit(str(e))
+            return
+        self.senales.terminada.emit(resultado)
+
+
+def ejecutar_en_segundo_plano(funcion, *args, al_terminar=None, al_fallar=None, **kwargs) -> TareaSegundoPlano:
+    """Encolar funcion(*args, **kwargs) en el pool global y conectar los callbacks"""
+    tarea = TareaSegundoPlano(funcion, *args, **kwargs)
+    if al_terminar is not None:
+        tarea.senales.terminada.connect(al_terminar)
+    if al_fallar is not None:
+        tarea.senales.fallida.connect(al_fallar)
+    QThreadPool.globalInstance().start(tarea)
+    return tarea
@@ -4,17 +4,18 @@ from PyQt6.QtCore import QDate
 from PyQt6.QtWidgets import QMessageBox, QMainWindow
 import re
 
+from controller.TareaSegundoPlano import ejecutar_en_segundo_plano
 from repository.UsuarioRepository import UsuarioRepository
-from repository.PerfilUsuarioRepository import PerfilUsuarioRepository
 from view.windows.VentanaRegistroUsuario import Ui_ventanaRegistrarse
 
 
 class UsuarioRegisterController:
     def __init__(self):
         self.usuario_repository = UsuarioRepository()
-        self.perfil_repository = PerfilUsuarioRepository()
         # Referencia al controlador de login
         self.login_controller = None
+        # Registro en curso (el hash de la contraseña se calcula en segundo plano)
+        self._registrando = False
 
         # Configuración de la ventana principal
         self.vista = QMainWindow()
@@ -45,7 +46,10 @@ class UsuarioRegisterController:
         self.ui.txtConfirmarPassword.setEchoMode(echo_mode)
 
     def registrar_usuario(self) -> bool:
-        """Maneja el proceso de registro de usuario"""
+        """Maneja el proceso de registro de usuario; retorna True si se inició el registro"""
+        if self._registrando:
+            return False
+
         try:
             # Obtener datos del formulario
             datos_usuario = self._obtener_datos_formulario()
@@ -54,17 +58,14 @@ class UsuarioRegisterController:
             if not self._validar_datos_usuario(datos_usuario):
                 return False
 
-            # Verificar unicidad
-            if not self._verificar_unicidad(datos_usuario):
-                return False
-
-            # Crear usuario y perfil
+            # Crear usuario y perfil; la unicidad la verifican las restricciones de la BD
             return self._crear_usuario_y_perfil(datos_usuario)
 
         except ValueError as ve:
             self.mostrar_error(f"Error en los datos ingresados: {str(ve)}")
             return False
         except Exception as e:
+            self._establecer_registrando(False)
             self.mostrar_error(f"Error al registrar usuario: {str(e)}")
             print(f"Error en registrar_usuario: {e}")
             return False
@@ -132,20 +133,8 @@ class UsuarioRegisterController:
         patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         return re.match(patron, email) is not None
 
-    def _verificar_unicidad(self, datos: dict) -> bool:
-        """Verifica que el nombre de usuario y correo sean únicos"""
-        if self.usuario_repository.usuario_existe(nombre_usuario=datos['nombre_usuario']):
-            self.mostrar_error("El nombre de usuario ya está en uso")
-            return False
-
-        if self.usuario_repository.usuario_existe(correo_electronico=datos['correo_electronico']):
-            self.mostrar_error("El correo electrónico ya está en uso")
-            return False
-
-        return True
-
     def _crear_usuario_y_perfil(self, datos: dict) -> bool:
-        """Crea el usuario y su perfil asociado"""
+        """Crea el usuario y su perfil asociado en una sola transacción, en segundo plano"""
         usuario_data = {
             'nombre': datos['nombre'],
             'apellido': datos['apellido'],
@@ -155,31 +144,38 @@ class UsuarioRegisterController:
             'sexo': datos['sexo'],
             'nombre_usuario': datos['nombre_usuario']
         }
+        perfil_data = {
+            'peso': datos['peso'],
+            'altura': datos['altura'],
+            'ocupacion': datos['ocupacion']
+        }
 
-        nuevo_usuario = self.usuario_repository.crear_usuario(usuario_data)
+        self._establecer_registrando(True)
+        ejecutar_en_segundo_plano(
+            self.usuario_repository.registrar_usuario_con_perfil, usuario_data, perfil_data,
+            al_terminar=self._on_registro_terminado,
+            al_fallar=self._on_registro_fallido
+        )
+        return True
 
+    def _on_registro_terminado(self, nuevo_usuario):
+        """Resultado del registro, ya en el hilo de la interfaz"""
+        self._establecer_registrando(False)
         if nuevo_usuario:
-            perfil_data = {
-                'id_usuario': nuevo_usuario.id_usuario,
-                'peso': datos['peso'],
-                'altura': datos['altura'],
-                'ocupacion': datos['ocupacion']
-            }
-
-            nuevo_perfil = self.perfil_repository.crear_perfil(perfil_data)
-
-            if nuevo_perfil:
-                self.mostrar_exito("Usuario registrado exitosamente")
-                self.limpiar_campos()
-                return True
-            else:
-                # Rollback: eliminar usuario si falla la creación del perfil
-                self.usuario_repository.eliminar_usuario(nuevo_usuario.id_usuario)
-                self.mostrar_error("Error al crear perfil de usuario")
-                return False
+            self.mostrar_exito("Usuario registrado exitosamente")
+            self.limpiar_campos()
         else:
             self.mostrar_error("Error al registrar usuario en la base de datos")
-            return False
+
+    def _on_registro_fallido(self, mensaje: str):
+        """Nombre de usuario o correo duplicados llegan aquí con su mensaje"""
+        self._establecer_registrando(False)
+        self.mostrar_error(mensaje)
+
+    def _establecer_registrando(self, registrando: bool):
+        self._registrando = registrando
+        self.ui.btnRegistrarse.setEnabled(not registrando)
+        self.ui.btnVolverIniciarSesion.setEnabled(not registrando)
 
     def volver_login(self):
         """Vuelve a la ventana de login"""
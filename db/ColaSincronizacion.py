@@ -0,0 +1,366 @@
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Text, Float, UniqueConstraint,
+                        select, delete, update, func)
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from datetime import date
+from typing import List, Optional, Dict, Any
+import json
+import os
+import threading
+import time
+import logging
+
+from db.Connection import DatabaseConnection, crear_engine_sqlite
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
+
+logger = logging.getLogger(__name__)
+
+# Metadata propia: estas tablas viven solo en el almacén local, nunca en PostgreSQL
+metadata_local = MetaData()
+
+cola_sincronizacion = Table(
+    'cola_sincronizacion', metadata_local,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('entidad', String(30), nullable=False),
+    Column('operacion', String(20), nullable=False),
+    Column('clave', String(100), nullable=False),
+    Column('datos', Text, nullable=False),
+    Column('creado_en', Float, nullable=False),
+    Column('estado', String(20), nullable=False, default='pendiente'),
+    Column('intentos', Integer, nullable=False, default=0),
+    Column('ultimo_error', Text, nullable=True),
+    # Una sola entrada pendiente por registro: las escrituras repetidas se compactan
+    UniqueConstraint('entidad', 'clave', name='uq_cola_entidad_clave'),
+)
+
+ENTIDAD_SEGUIMIENTO = 'seguimiento_diario'
+ENTIDAD_HABITO = 'habito'
+
+CAMPOS_FECHA = {'fecha', 'fecha_creacion'}
+
+
+def _serializar(datos: dict) -> str:
+    """Serializa los datos de una mutación a JSON"""
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, date) else value
+        for key, value in datos.items()
+    })
+
+
+def _deserializar(texto: str) -> dict:
+    """Reconstruye los datos de una mutación desde JSON"""
+    datos = json.loads(texto)
+    for campo in CAMPOS_FECHA & datos.keys():
+        if datos[campo]:
+            datos[campo] = date.fromisoformat(datos[campo])
+    return datos
+
+
+def clave_seguimiento(id_usuario: int, id_habito: int, fecha: date) -> str:
+    """Clave de la cola para un seguimiento diario"""
+    return f"{id_usuario}:{id_habito}:{fecha.isoformat()}"
+
+
+class ColaSincronizacion:
+    """Almacén local SQLite con la cola durable de mutaciones pendientes de enviar a la BD remota"""
+
+    _instance: Optional['ColaSincronizacion'] = None
+    _engine = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._engine is None:
+            self._initialize_store()
+
+    def _initialize_store(self):
+        """Abre (o crea) el almacén local"""
+        try:
+            local_url = os.getenv("local_database_url", "sqlite:///habitos_local.db")
+            self._engine = crear_engine_sqlite(local_url)
+            self._lock = threading.Lock()
+            metadata_local.create_all(bind=self._engine)
+            logger.info("Almacén local de sincronización inicializado")
+        except Exception as e:
+            logger.error(f"Failed to initialize local store: {e}")
+            raise
+
+    def encolar(self, entidad: str, operacion: str, clave: str, datos: dict) -> None:
+        """Registrar una mutación, compactándola con la pendiente del mismo registro"""
+        with self._lock, self._engine.begin() as connection:
+            existente = connection.execute(
+                select(cola_sincronizacion.c.id, cola_sincronizacion.c.operacion, cola_sincronizacion.c.datos)
+                .where(cola_sincronizacion.c.entidad == entidad, cola_sincronizacion.c.clave == clave)
+            ).first()
+
+            if existente and existente.operacion == 'eliminar' and operacion == 'actualizar':
+                # El registro ya está marcado para eliminarse
+                return
+
+            if existente and existente.operacion == operacion == 'actualizar':
+                # Dos actualizaciones parciales del mismo registro se combinan
+                datos = {**_deserializar(existente.datos), **datos}
+
+            valores = {
+                'entidad': entidad,
+                'operacion': operacion,
+                'clave': clave,
+                'datos': _serializar(datos),
+                'creado_en': time.time(),
+                'estado': 'pendiente',
+                'intentos': 0,
+                'ultimo_error': None,
+            }
+
+            if existente:
+                connection.execute(
+                    update(cola_sincronizacion)
+                    .where(cola_sincronizacion.c.id == existente.id)
+                    .values(**valores)
+                )
+            else:
+                connection.execute(cola_sincronizacion.insert().values(**valores))
+
+    def obtener_pendientes(self, limite: int = 200) -> List[Dict[str, Any]]:
+        """Obtener las mutaciones pendientes más antiguas, en orden de escritura"""
+        with self._engine.connect() as connection:
+            filas = connection.execute(
+                select(cola_sincronizacion)
+                .where(cola_sincronizacion.c.estado == 'pendiente')
+                .order_by(cola_sincronizacion.c.creado_en, cola_sincronizacion.c.id)
+                .limit(limite)
+            ).mappings().all()
+
+        return [{**fila, 'datos': _deserializar(fila['datos'])} for fila in filas]
+
+    def obtener_pendientes_de(self, entidad: str) -> List[Dict[str, Any]]:
+        """Obtener las mutaciones pendientes de una entidad (para superponerlas en lecturas)"""
+        with self._engine.connect() as connection:
+            filas = connection.execute(
+                select(cola_sincronizacion.c.operacion, cola_sincronizacion.c.clave, cola_sincronizacion.c.datos)
+                .where(
+                    cola_sincronizacion.c.entidad == entidad,
+                    cola_sincronizacion.c.estado == 'pendiente'
+                )
+            ).mappings().all()
+
+        return [{**fila, 'datos': _deserializar(fila['datos'])} for fila in filas]
+
+    def confirmar(self, ids: List[int], creado_en: Dict[int, float]) -> None:
+        """Eliminar entradas ya aplicadas en la BD remota.
+
+        Solo se borran si no fueron reescritas mientras se enviaban; en ese caso
+        la versión nueva queda pendiente para el siguiente lote.
+        """
+        if not ids:
+            return
+        with self._lock, self._engine.begin() as connection:
+            for id_entrada in ids:
+                connection.execute(
+                    delete(cola_sincronizacion).where(
+                        cola_sincronizacion.c.id == id_entrada,
+                        cola_sincronizacion.c.creado_en == creado_en[id_entrada]
+                    )
+                )
+
+    def registrar_fallo(self, id_entrada: int, error: str, definitivo: bool = False) -> None:
+        """Registrar un intento fallido; los fallos definitivos salen de la cola activa"""
+        with self._lock, self._engine.begin() as connection:
+            valores = {
+                'intentos': cola_sincronizacion.c.intentos + 1,
+                'ultimo_error': error[:500],
+            }
+            if definitivo:
+                valores['estado'] = 'error'
+            connection.execute(
+                update(cola_sincronizacion).where(cola_sincronizacion.c.id == id_entrada).values(**valores)
+            )
+
+    def contar_pendientes(self) -> int:
+        """Contar mutaciones pendientes de sincronizar"""
+        with self._engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(cola_sincronizacion)
+                .where(cola_sincronizacion.c.estado == 'pendiente')
+            ).scalar() or 0
+
+
+class SincronizadorCola:
+    """Hilo en segundo plano que reenvía en lotes la cola local a la BD remota.
+
+    Resolución de conflictos: el último estado escrito localmente gana
+    (upsert sobre la clave del seguimiento); las actualizaciones de hábitos
+    que ya no existen en el servidor se descartan, y las mutaciones que la BD
+    rechaza (restricciones, tipos) o cuyos datos no se pueden interpretar
+    quedan marcadas como 'error' para no bloquear la cola. Solo la falta de
+    conexión detiene el envío y se reintenta con espera exponencial.
+    """
+
+    # Errores de una mutación concreta al interpretar sus datos (no de la conexión)
+    ERRORES_DATOS = (ValueError, KeyError, TypeError)
+
+    _instance: Optional['SincronizadorCola'] = None
+
+    INTERVALO_SEGUNDOS = 5.0
+    TAMANO_LOTE = 200
+    ESPERA_MAXIMA_SEGUNDOS = 300.0
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._inicializado = False
+        return cls._instance
+
+    def __init__(self):
+        if self._inicializado:
+            return
+        self._inicializado = True
+        self.cola = ColaSincronizacion()
+        self.db = DatabaseConnection()
+        self.resumen = ResumenDiarioRepository()
+        self._evento = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        """Arrancar el hilo de sincronización"""
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name="SincronizadorCola", daemon=True)
+        self._hilo.start()
+        logger.info("Sincronizador de cola iniciado")
+
+    def detener(self, timeout: float = 10.0):
+        """Detener el hilo tras un último intento de vaciar la cola"""
+        self._detener.set()
+        self._evento.set()
+        if self._hilo:
+            self._hilo.join(timeout)
+            self._hilo = None
+        logger.info("Sincronizador de cola detenido")
+
+    def notificar(self):
+        """Despertar al hilo para enviar cuanto antes una nueva mutación"""
+        self._evento.set()
+
+    def _ejecutar(self):
+        """Bucle del hilo: vacía la cola y espera, con reintentos exponenciales si no hay conexión"""
+        espera = self.INTERVALO_SEGUNDOS
+        while True:
+            try:
+                while self.sincronizar_lote() > 0:
+                    pass
+                espera = self.INTERVALO_SEGUNDOS
+            except SQLAlchemyError as e:
+                espera = min(espera * 2, self.ESPERA_MAXIMA_SEGUNDOS)
+                logger.warning(f"BD remota no disponible, reintento en {espera:.0f}s: {e}")
+            except Exception:
+                # Un error inesperado no debe terminar el hilo: se registra y se reintenta más tarde
+                espera = min(espera * 2, self.ESPERA_MAXIMA_SEGUNDOS)
+                logger.exception(f"Error inesperado sincronizando la cola, reintento en {espera:.0f}s")
+
+            if self._detener.is_set():
+                return
+            self._evento.wait(espera)
+            self._evento.clear()
+
+    def sincronizar_lote(self) -> int:
+        """Enviar un lote de mutaciones pendientes. Retorna cuántas se procesaron.
+
+        Lanza SQLAlchemyError si la BD remota no está disponible.
+        """
+        entradas = self.cola.obtener_pendientes(self.TAMANO_LOTE)
+        if not entradas:
+            return 0
+
+        try:
+            with self.db.get_session() as session:
+                self._aplicar(session, entradas)
+            self._confirmar(entradas)
+            logger.info(f"Sincronizadas {len(entradas)} mutaciones pendientes")
+        except (SQLAlchemyError, *self.ERRORES_DATOS) as e:
+            if self._sin_conexion(e):
+                raise
+            # Aislar las mutaciones rechazadas aplicándolas una a una
+            for entrada in entradas:
+                try:
+                    with self.db.get_session() as session:
+                        self._aplicar(session, [entrada])
+                    self._confirmar([entrada])
+                except (SQLAlchemyError, *self.ERRORES_DATOS) as e:
+                    if self._sin_conexion(e):
+                        raise
+                    detalle = str(getattr(e, 'orig', None) or e)
+                    logger.error(f"Mutación {entrada['entidad']} {entrada['clave']} descartada: {detalle}")
+                    self.cola.registrar_fallo(entrada['id'], detalle, definitivo=True)
+
+        return len(entradas)
+
+    @staticmethod
+    def _sin_conexion(error: Exception) -> bool:
+        """Error de conexión con la BD (reintentar el lote más tarde) y no de una mutación concreta"""
+        return isinstance(error, OperationalError) or getattr(error, 'connection_invalidated', False)
+
+    def _confirmar(self, entradas: List[Dict[str, Any]]):
+        """Retirar de la cola las entradas aplicadas"""
+        self.cola.confirmar(
+            [entrada['id'] for entrada in entradas],
+            {entrada['id']: entrada['creado_en'] for entrada in entradas}
+        )
+
+    def _aplicar(self, session, entradas: List[Dict[str, Any]]):
+        """Aplicar las mutaciones en orden, agrupando seguimientos consecutivos en un solo upsert"""
+        seguimientos = []
+        for entrada in entradas:
+            if entrada['entidad'] == ENTIDAD_SEGUIMIENTO:
+                seguimientos.append(entrada['datos'])
+                continue
+
+            self._aplicar_seguimientos(session, seguimientos)
+            seguimientos = []
+
+            if entrada['entidad'] == ENTIDAD_HABITO:
+                self._aplicar_habito(session, entrada)
+            else:
+                logger.warning(f"Entidad desconocida en la cola: {entrada['entidad']}")
+
+        self._aplicar_seguimientos(session, seguimientos)
+
+    def _aplicar_seguimientos(self, session, seguimientos: List[dict]):
+        """Upsert de un grupo de seguimientos: el estado local más reciente gana"""
+        if not seguimientos:
+            return
+
+        upsert = self.db.dialect_insert(SeguimientoDiario)
+        if upsert is None:
+            for datos in seguimientos:
+                session.merge(SeguimientoDiario(**datos))
+            session.flush()
+        else:
+            upsert = upsert.values(seguimientos)
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=['fecha', 'id_habito', 'id_usuario'],
+                set_={'estado': upsert.excluded.estado}
+            ))
+
+        self.resumen.recalcular_dias(session, {(datos['id_usuario'], datos['fecha']) for datos in seguimientos})
+
+    def _aplicar_habito(self, session, entrada: Dict[str, Any]):
+        """Aplicar una actualización o eliminación de hábito"""
+        id_habito = int(entrada['clave'])
+
+        if entrada['operacion'] == 'eliminar':
+            dias_afectados = self.resumen.claves_afectadas(session, SeguimientoDiario.id_habito == id_habito)
+            session.query(SeguimientoDiario).filter(SeguimientoDiario.id_habito == id_habito).delete()
+            session.query(Habito).filter(Habito.id_habito == id_habito).delete()
+            self.resumen.recalcular_dias(session, dias_afectados)
+        elif entrada['operacion'] == 'actualizar':
+            actualizados = session.query(Habito).filter(Habito.id_habito == id_habito).update(entrada['datos'])
+            if not actualizados:
+                logger.warning(f"Hábito {id_habito} ya no existe en el servidor; actualización descartada")
+        session.flush()
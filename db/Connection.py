@@ -1,18 +1,20 @@
 # db/Connection.py
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.exc import SQLAlchemyError
 from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
 import logging
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 import importlib
 import pkgutil
 import model
 
-from model.Base import Base
+from db.Migraciones import Migrador
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -21,11 +23,45 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+
+def crear_engine_sqlite(database_url: str):
+    """Crea un engine SQLite (archivo o memoria) con pragmas para uso local"""
+    url = make_url(database_url)
+    en_memoria = url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+    opciones = {
+        "echo": False,
+        "connect_args": {"check_same_thread": False},
+    }
+    if en_memoria:
+        # Todas las sesiones deben compartir la misma base en memoria
+        opciones["poolclass"] = StaticPool
+
+    engine = create_engine(database_url, **opciones)
+
+    @event.listens_for(engine, "connect")
+    def _configurar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not en_memoria:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-16000")
+        cursor.close()
+
+    return engine
+
+
 class DatabaseConnection:
     _instance: Optional['DatabaseConnection'] = None
     _engine = None
     _session_factory = None
 
+    # Filas por lote al recorrer consultas grandes con iterar_consulta
+    TAMANO_LOTE_STREAMING = 1000
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -36,7 +72,9 @@ class DatabaseConnection:
         if self._engine is None:
             self._initialize_connection()
 
-    def import_all_models(self):
+    @staticmethod
+    def import_all_models():
+        """Registrar todos los mapeos para que las relaciones por nombre ('Usuario') se resuelvan"""
         package = model
         for _, module_name, _ in pkgutil.iter_modules(package.__path__):
             if module_name not in ("Base", "__init__"):
@@ -45,29 +83,21 @@ class DatabaseConnection:
     def _initialize_connection(self):
         """Inicializa la conexión con validación"""
         try:
-            # Variables de entorno con validación
-            user = os.getenv("user")
-            password = os.getenv("password")
-            host = os.getenv("host", "localhost")
-            port = os.getenv("port", "5432")
-            dbname = os.getenv("dbname")
-
-            # Validar parámetros requeridos
-            if not all([user, password, dbname]):
-                raise ValueError("Missing required database environment variables")
-
-            database_url = f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}?sslmode=require"
-
-            # Engine con configuración optimizada
-            self._engine = create_engine(
-                database_url,
-                echo=False,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10,
-                pool_recycle=3600,
-                connect_args={"connect_timeout": 30}
-            )
+            database_url = self._obtener_database_url()
+
+            if make_url(database_url).get_backend_name() == "sqlite":
+                self._engine = crear_engine_sqlite(database_url)
+            else:
+                # Engine con configuración optimizada
+                self._engine = create_engine(
+                    database_url,
+                    echo=False,
+                    pool_pre_ping=True,
+                    pool_size=5,
+                    max_overflow=10,
+                    pool_recycle=3600,
+                    connect_args={"connect_timeout": 30}
+                )
 
             self._session_factory = sessionmaker(
                 bind=self._engine,
@@ -78,12 +108,41 @@ class DatabaseConnection:
 
             # Test connection
             self._test_connection()
+
+            # Una base SQLite local no tiene servidor que provea el esquema
+            if self.get_dialect_name() == "sqlite":
+                self.create_tables()
+
             logger.info("Database connection initialized successfully")
 
         except Exception as e:
             logger.error(f"Failed to initialize database connection: {e}")
             raise
 
+    def _obtener_database_url(self) -> str:
+        """Obtiene la URL de conexión desde el entorno.
+
+        Si se define ``database_url`` (p. ej. ``sqlite:///habitos.db`` o
+        ``sqlite://`` para memoria) se usa tal cual; si no, se construye la URL
+        de PostgreSQL a partir de user/password/host/port/dbname.
+        """
+        database_url = os.getenv("database_url")
+        if database_url:
+            return database_url
+
+        # Variables de entorno con validación
+        user = os.getenv("user")
+        password = os.getenv("password")
+        host = os.getenv("host", "localhost")
+        port = os.getenv("port", "5432")
+        dbname = os.getenv("dbname")
+
+        # Validar parámetros requeridos
+        if not all([user, password, dbname]):
+            raise ValueError("Missing required database environment variables")
+
+        return f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}?sslmode=require"
+
     def _test_connection(self):
         """Prueba la conexión con timeout"""
         try:
@@ -115,20 +174,54 @@ class DatabaseConnection:
         finally:
             session.close()
 
+    def iterar_consulta(self, construir_consulta: Callable, tamano_lote: Optional[int] = None) -> Iterator:
+        """Genera las entidades de construir_consulta(session) leyendo tamano_lote filas por vez.
+
+        yield_per activa stream_results (cursor del lado del servidor en PostgreSQL)
+        y cada entidad se desvincula de la sesión al entregarla, así que la memoria
+        no crece con el total de filas. La sesión sigue abierta mientras se consume
+        el generador; los errores se propagan al llamador.
+        """
+        with self.get_session() as session:
+            consulta = construir_consulta(session).yield_per(
+                tamano_lote or self.TAMANO_LOTE_STREAMING
+            )
+            for entidad in consulta:
+                session.expunge(entidad)
+                yield entidad
+
     def get_engine(self):
         """Retorna el engine con validación"""
         if self._engine is None:
             raise RuntimeError("Database engine not initialized")
         return self._engine
 
-    def create_tables(self):
-        """Crea todas las tablas definidas en los modelos"""
+    def get_dialect_name(self) -> str:
+        """Retorna el nombre del dialecto activo ('postgresql', 'sqlite', ...)"""
+        return self.get_engine().dialect.name
+
+    def dialect_insert(self, tabla):
+        """Retorna un INSERT específico del dialecto con soporte ON CONFLICT.
+
+        Retorna None si el dialecto activo no ofrece ON CONFLICT, para que el
+        repositorio use su camino genérico.
+        """
+        dialecto = self.get_dialect_name()
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return None
+        return insert(tabla)
 
+    def create_tables(self):
+        """Crea o actualiza el esquema aplicando las migraciones pendientes"""
         try:
-            Base.metadata.create_all(bind=self._engine)
-            logger.info("Database tables created successfully")
+            aplicadas = Migrador(self._engine).migrar()
+            logger.info(f"Database schema up to date (migrations applied: {aplicadas or 'none'})")
         except Exception as e:
-            logger.error(f"Failed to create tables: {e}")
+            logger.error(f"Failed to migrate schema: {e}")
             raise
 
     def close(self):
@@ -143,5 +236,13 @@ class DatabaseConnection:
                 self._engine = None
                 self._session_factory = None
 
-# Instancia global opcional
-db_connection = DatabaseConnection()
\ No newline at end of file
+# Los modelos quedan registrados al importar este módulo, como cuando la
+# instancia global se creaba aquí; no depende de que alguien la inicialice
+DatabaseConnection.import_all_models()
+
+# Instancia global opcional, creada al primer acceso: inicializarla al importar
+# aplicaría las migraciones mientras los repositorios que las usan se importan
+def __getattr__(nombre):
+    if nombre == "db_connection":
+        return DatabaseConnection()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
\ No newline at end of file
@@ -0,0 +1,234 @@
+# db/Migraciones.py
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, Index, inspect, select, func, text
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.exc import SQLAlchemyError
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, NamedTuple, Iterable
+from types import ModuleType
+import argparse
+import importlib
+import pkgutil
+import logging
+import re
+import time
+
+from model.Base import Base
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Registro de versiones aplicadas, fuera de los modelos de la aplicación
+metadata_migraciones = MetaData()
+
+version_esquema = Table(
+    'version_esquema', metadata_migraciones,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('descripcion', String(200), nullable=False),
+    Column('aplicada_en', DateTime, nullable=False),
+)
+
+# Clave del advisory lock de PostgreSQL que serializa migraciones de varias instancias
+CLAVE_BLOQUEO_MIGRACIONES = 48151623
+
+
+class Migracion(NamedTuple):
+    """Migración descubierta en el paquete db.migraciones"""
+    version: int
+    descripcion: str
+    modulo: ModuleType
+
+    @property
+    def transaccional(self) -> bool:
+        return getattr(self.modulo, 'TRANSACCIONAL', True)
+
+
+def cargar_migraciones() -> List[Migracion]:
+    """Descubrir los módulos vNNNN_nombre.py de db.migraciones ordenados por versión"""
+    import db.migraciones as paquete
+
+    migraciones = []
+    for _, nombre_modulo, _ in pkgutil.iter_modules(paquete.__path__):
+        coincidencia = re.match(r'v(\d+)_', nombre_modulo)
+        if not coincidencia:
+            continue
+        modulo = importlib.import_module(f"db.migraciones.{nombre_modulo}")
+        descripcion = (modulo.__doc__ or nombre_modulo).strip().splitlines()[0]
+        migraciones.append(Migracion(int(coincidencia.group(1)), descripcion[:200], modulo))
+
+    versiones = [migracion.version for migracion in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise RuntimeError(f"Versiones de migración duplicadas: {sorted(versiones)}")
+    return sorted(migraciones, key=lambda migracion: migracion.version)
+
+
+class Migrador:
+    """Aplica en orden las migraciones pendientes y registra cada versión aplicada.
+
+    Las migraciones transaccionales se aplican junto con su registro en una sola
+    transacción. Las marcadas con TRANSACCIONAL = False reciben el engine y
+    gestionan sus propias transacciones (índices concurrentes, rellenos por lotes);
+    deben ser idempotentes porque un fallo a mitad se reintenta desde el principio.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def version_actual(self) -> int:
+        """Última versión aplicada (0 si la base no tiene registro)"""
+        metadata_migraciones.create_all(bind=self.engine)
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.coalesce(func.max(version_esquema.c.version), 0))).scalar()
+
+    def pendientes(self) -> List[Migracion]:
+        """Migraciones con versión posterior a la aplicada"""
+        actual = self.version_actual()
+        return [migracion for migracion in cargar_migraciones() if migracion.version > actual]
+
+    def migrar(self, hasta: Optional[int] = None) -> List[int]:
+        """Aplicar las migraciones pendientes hasta la versión indicada. Retorna las versiones aplicadas."""
+        with self._bloqueo():
+            aplicadas = []
+            for migracion in self.pendientes():
+                if hasta is not None and migracion.version > hasta:
+                    break
+                self._aplicar(migracion)
+                aplicadas.append(migracion.version)
+            return aplicadas
+
+    def _aplicar(self, migracion: Migracion):
+        logger.info(f"Aplicando migración {migracion.version}: {migracion.descripcion}")
+        inicio = time.perf_counter()
+        try:
+            if migracion.transaccional:
+                with self.engine.begin() as connection:
+                    migracion.modulo.aplicar(connection)
+                    self._registrar(connection, migracion)
+            else:
+                migracion.modulo.aplicar(self.engine)
+                with self.engine.begin() as connection:
+                    self._registrar(connection, migracion)
+        except SQLAlchemyError as e:
+            logger.error(f"Error aplicando migración {migracion.version}: {e}")
+            raise
+        logger.info(f"Migración {migracion.version} aplicada en {time.perf_counter() - inicio:.2f}s")
+
+    def _registrar(self, connection, migracion: Migracion):
+        connection.execute(version_esquema.insert().values(
+            version=migracion.version, descripcion=migracion.descripcion, aplicada_en=datetime.now()
+        ))
+
+    @contextmanager
+    def _bloqueo(self):
+        """Bloqueo entre instancias durante la migración (solo PostgreSQL)"""
+        if self.engine.dialect.name != 'postgresql':
+            yield
+            return
+
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:clave)"), {'clave': CLAVE_BLOQUEO_MIGRACIONES})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:clave)"), {'clave': CLAVE_BLOQUEO_MIGRACIONES})
+
+
+# Operaciones seguras en línea para usar desde las migraciones
+
+def indices_declarados(nombre_tabla: str, nombres: Iterable[str]) -> List[Index]:
+    """Índices de los modelos por nombre, para crearlos desde una migración"""
+    tabla = Base.metadata.tables[nombre_tabla]
+    por_nombre = {indice.name: indice for indice in tabla.indexes}
+    return [por_nombre[nombre] for nombre in nombres]
+
+
+def crear_indice(engine, indice: Index):
+    """Crear un índice si no existe sin bloquear escrituras.
+
+    En PostgreSQL usa CREATE INDEX CONCURRENTLY fuera de transacción y descarta
+    antes un índice inválido que haya dejado una ejecución interrumpida.
+    """
+    with engine.connect() as connection:
+        if engine.dialect.name != 'postgresql':
+            # IF NOT EXISTS también cubre índices por expresión, que el inspector no lista
+            with connection.begin():
+                connection.execute(CreateIndex(indice, if_not_exists=True))
+            return
+
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        invalido = connection.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :nombre AND NOT i.indisvalid"
+        ), {'nombre': indice.name}).first()
+        if invalido:
+            logger.warning(f"Índice inválido {indice.name} de una ejecución anterior; se vuelve a crear")
+            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{indice.name}"'))
+
+        ddl = str(CreateIndex(indice, if_not_exists=True).compile(dialect=engine.dialect))
+        connection.execute(text(re.sub(r'^CREATE (UNIQUE )?INDEX', r'CREATE \1INDEX CONCURRENTLY', ddl)))
+
+
+def eliminar_indice(engine, nombre: str):
+    """Eliminar un índice si existe; en PostgreSQL con DROP INDEX CONCURRENTLY fuera de transacción"""
+    with engine.connect() as connection:
+        if engine.dialect.name != 'postgresql':
+            with connection.begin():
+                connection.execute(text(f'DROP INDEX IF EXISTS "{nombre}"'))
+            return
+
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{nombre}"'))
+
+
+def rellenar_por_lotes(engine, nombre_tabla: str, columna_clave: str, sentencias: Iterable[str],
+                       tamano_lote: int = 1000) -> int:
+    """Ejecutar sentencias de relleno por rangos de una columna entera, una transacción por lote.
+
+    Cada sentencia recibe los parámetros :desde y :hasta (inclusivos). Los lotes
+    cortos mantienen los bloqueos breves para no detener a la aplicación.
+    Retorna el número de lotes procesados.
+    """
+    sentencias = [text(sentencia) for sentencia in sentencias]
+    with engine.connect() as connection:
+        minimo, maximo = connection.execute(text(
+            f"SELECT MIN({columna_clave}), MAX({columna_clave}) FROM {nombre_tabla}"
+        )).one()
+
+    if minimo is None:
+        return 0
+
+    lotes = 0
+    for desde in range(minimo, maximo + 1, tamano_lote):
+        hasta = min(desde + tamano_lote - 1, maximo)
+        with engine.begin() as connection:
+            for sentencia in sentencias:
+                connection.execute(sentencia, {'desde': desde, 'hasta': hasta})
+        lotes += 1
+        logger.info(f"Relleno de {nombre_tabla}: {columna_clave} {desde}-{hasta}")
+    return lotes
+
+
+def tabla_existe(connection, nombre_tabla: str) -> bool:
+    return inspect(connection).has_table(nombre_tabla)
+
+
+def columna_existe(connection, nombre_tabla: str, nombre_columna: str) -> bool:
+    return any(columna['name'] == nombre_columna for columna in inspect(connection).get_columns(nombre_tabla))
+
+
+if __name__ == '__main__':
+    from db.Connection import DatabaseConnection
+
+    parser = argparse.ArgumentParser(description="Aplicar migraciones de esquema pendientes")
+    parser.add_argument('--hasta', type=int, help="Aplicar solo hasta esta versión")
+    parser.add_argument('--estado', action='store_true', help="Mostrar versión actual y pendientes sin aplicar")
+    args = parser.parse_args()
+
+    migrador = Migrador(DatabaseConnection().get_engine())
+    if args.estado:
+        print(f"Versión actual: {migrador.version_actual()}")
+        for pendiente in migrador.pendientes():
+            print(f"  pendiente {pendiente.version}: {pendiente.descripcion}")
+    else:
+        aplicadas = migrador.migrar(args.hasta)
+        print(f"Migraciones aplicadas: {aplicadas if aplicadas else 'ninguna'}")
@@ -0,0 +1,2 @@
+# Migraciones versionadas: cada módulo vNNNN_nombre.py define aplicar(conexion)
+# y opcionalmente TRANSACCIONAL = False. Ver db/Migraciones.py.
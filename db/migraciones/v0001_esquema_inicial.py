@@ -0,0 +1,113 @@
+"""Esquema inicial: tablas de los modelos que aún no existan"""
+from sqlalchemy import (MetaData, Table, Column, Integer, BigInteger, String, Text, Date, Float,
+                        ForeignKey, PrimaryKeyConstraint)
+
+# Copia fija del esquema original. Los cambios posteriores de los modelos se
+# aplican en sus propias migraciones; no usar Base.metadata aquí, o una base
+# nueva recibiría de entrada columnas y tablas que agregan las migraciones siguientes.
+metadata = MetaData()
+
+Table(
+    'usuarios', metadata,
+    Column('id_usuario', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(50), nullable=False),
+    Column('apellido', String(50), nullable=False),
+    Column('correo_electronico', String(100), nullable=False),
+    Column('contrasenia', String(20), nullable=False),
+    Column('fecha_nacimiento', Date, nullable=False),
+    Column('sexo', String(2), nullable=False),
+    Column('nombre_usuario', Text, nullable=False, unique=True),
+)
+
+Table(
+    'perfil_usuario', metadata,
+    Column('id_usuario', Integer, ForeignKey('usuarios.id_usuario'), primary_key=True),
+    Column('peso', Float, nullable=True),
+    Column('altura', Float, nullable=True),
+    Column('edad', Integer, nullable=True),
+    Column('ocupacion', String(50), nullable=True),
+)
+
+Table(
+    'categorias', metadata,
+    Column('id_categoria', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(100), nullable=False),
+)
+
+Table(
+    'habito', metadata,
+    Column('id_habito', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(100), nullable=False),
+    Column('frecuencia', String(150), nullable=False),
+    Column('fecha_creacion', Date, nullable=False),
+    Column('id_categoria', Integer, ForeignKey('categorias.id_categoria', ondelete='CASCADE')),
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario'), nullable=False),
+)
+
+Table(
+    'seguimiento_diario', metadata,
+    Column('fecha', Date, primary_key=True),
+    Column('id_habito', BigInteger, ForeignKey('habito.id_habito', ondelete='CASCADE'), primary_key=True),
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True),
+    Column('estado', String(50), nullable=False),
+)
+
+Table(
+    'comunidad', metadata,
+    Column('id_comunidad', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(50), nullable=False),
+    Column('id_creador', Integer, ForeignKey('usuarios.id_usuario', ondelete='SET DEFAULT')),
+)
+
+Table(
+    'comunidad_categoria', metadata,
+    Column('id_comunidad', Integer, ForeignKey('comunidad.id_comunidad'), nullable=False),
+    Column('id_categoria', Integer, ForeignKey('categorias.id_categoria'), nullable=False),
+    PrimaryKeyConstraint('id_comunidad', 'id_categoria'),
+)
+
+Table(
+    'incorpora_comunidad', metadata,
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', onupdate='CASCADE', ondelete='CASCADE'),
+           nullable=False),
+    Column('id_comunidad', BigInteger, ForeignKey('comunidad.id_comunidad', onupdate='CASCADE', ondelete='CASCADE'),
+           nullable=False),
+    Column('estado', String(50), nullable=False),
+    Column('fecha_union', Date, nullable=False),
+    PrimaryKeyConstraint('id_usuario', 'id_comunidad'),
+)
+
+Table(
+    'logros', metadata,
+    Column('id_logro', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(50), nullable=False),
+    Column('puntos', Integer, nullable=False),
+    Column('descripcion', String(255), nullable=False),
+)
+
+Table(
+    'desbloquea', metadata,
+    Column('id_usuario', Integer, ForeignKey('usuarios.id_usuario'), primary_key=True),
+    Column('id_logro', Integer, ForeignKey('logros.id_logro'), primary_key=True),
+)
+
+Table(
+    'nivel', metadata,
+    Column('id_nivel', Integer, primary_key=True, autoincrement=True),
+    Column('nombre', String(50), nullable=False),
+    Column('puntos_requeridos', Integer, nullable=True),
+    Column('puntos_totales', Integer, nullable=True),
+)
+
+Table(
+    'asignacion_nivel', metadata,
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', onupdate='CASCADE', ondelete='CASCADE'),
+           primary_key=True, unique=True, nullable=False),
+    Column('id_nivel', BigInteger, ForeignKey('nivel.id_nivel', onupdate='CASCADE', ondelete='CASCADE'),
+           nullable=True),
+)
+
+
+def aplicar(connection):
+    # checkfirst deja intactas las tablas de una base ya existente
+    metadata.create_all(bind=connection, checkfirst=True)
@@ -0,0 +1,50 @@
+"""Índices compuestos y parciales de las consultas de los repositorios"""
+from sqlalchemy import MetaData, Table, Column, Integer, BigInteger, String, Date, Index
+
+from db.Migraciones import crear_indice
+
+TRANSACCIONAL = False
+
+# Definición fija de los índices (solo las columnas que usan), independiente de los modelos
+metadata = MetaData()
+
+habito = Table(
+    'habito', metadata,
+    Column('id_usuario', BigInteger), Column('nombre', String(100)), Column('id_categoria', Integer),
+)
+seguimiento_diario = Table(
+    'seguimiento_diario', metadata,
+    Column('id_usuario', BigInteger), Column('id_habito', BigInteger), Column('fecha', Date),
+    Column('estado', String(50)),
+)
+incorpora_comunidad = Table(
+    'incorpora_comunidad', metadata,
+    Column('id_usuario', BigInteger), Column('id_comunidad', BigInteger), Column('estado', String(50)),
+    Column('fecha_union', Date),
+)
+
+INDICES = [
+    Index('ix_habito_usuario_nombre', habito.c.id_usuario, habito.c.nombre),
+    Index('ix_habito_categoria', habito.c.id_categoria),
+    Index('ix_seguimiento_usuario_habito_fecha',
+          seguimiento_diario.c.id_usuario, seguimiento_diario.c.id_habito, seguimiento_diario.c.fecha),
+    Index('ix_seguimiento_usuario_fecha', seguimiento_diario.c.id_usuario, seguimiento_diario.c.fecha),
+    Index('ix_seguimiento_habito_fecha', seguimiento_diario.c.id_habito, seguimiento_diario.c.fecha),
+    Index('ix_seguimiento_completado',
+          seguimiento_diario.c.id_usuario, seguimiento_diario.c.id_habito, seguimiento_diario.c.fecha,
+          postgresql_where=(seguimiento_diario.c.estado == 'completado'),
+          sqlite_where=(seguimiento_diario.c.estado == 'completado')),
+    Index('ix_incorpora_comunidad_comunidad_estado',
+          incorpora_comunidad.c.id_comunidad, incorpora_comunidad.c.estado, incorpora_comunidad.c.fecha_union),
+    Index('ix_incorpora_comunidad_usuario_estado_fecha',
+          incorpora_comunidad.c.id_usuario, incorpora_comunidad.c.estado, incorpora_comunidad.c.fecha_union),
+    Index('ix_incorpora_comunidad_fecha_union', incorpora_comunidad.c.fecha_union),
+    Index('ix_incorpora_comunidad_activos', incorpora_comunidad.c.id_comunidad, incorpora_comunidad.c.id_usuario,
+          postgresql_where=(incorpora_comunidad.c.estado == 'activo'),
+          sqlite_where=(incorpora_comunidad.c.estado == 'activo')),
+]
+
+
+def aplicar(engine):
+    for indice in INDICES:
+        crear_indice(engine, indice)
@@ -0,0 +1,35 @@
+"""Tabla resumen_diario_usuario rellenada desde los seguimientos existentes"""
+from sqlalchemy import MetaData, Table, Column, Integer, BigInteger, Date, ForeignKey
+
+from db.Migraciones import rellenar_por_lotes
+
+TRANSACCIONAL = False
+
+USUARIOS_POR_LOTE = 500
+
+metadata = MetaData()
+Table('usuarios', metadata, Column('id_usuario', Integer, primary_key=True))
+
+resumen_diario_usuario = Table(
+    'resumen_diario_usuario', metadata,
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True),
+    Column('fecha', Date, primary_key=True),
+    Column('total_seguimientos', Integer, nullable=False, default=0),
+    Column('completados', Integer, nullable=False, default=0),
+    Column('habitos_distintos', Integer, nullable=False, default=0),
+)
+
+
+def aplicar(engine):
+    resumen_diario_usuario.create(bind=engine, checkfirst=True)
+
+    # Borrar e insertar por rango de usuarios hace el relleno repetible
+    rellenar_por_lotes(engine, 'seguimiento_diario', 'id_usuario', [
+        "DELETE FROM resumen_diario_usuario WHERE id_usuario BETWEEN :desde AND :hasta",
+        "INSERT INTO resumen_diario_usuario "
+        "(id_usuario, fecha, total_seguimientos, completados, habitos_distintos) "
+        "SELECT id_usuario, fecha, COUNT(*), "
+        "SUM(CASE WHEN estado = 'completado' THEN 1 ELSE 0 END), COUNT(DISTINCT id_habito) "
+        "FROM seguimiento_diario WHERE id_usuario BETWEEN :desde AND :hasta "
+        "GROUP BY id_usuario, fecha",
+    ], tamano_lote=USUARIOS_POR_LOTE)
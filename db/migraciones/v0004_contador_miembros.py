@@ -0,0 +1,27 @@
+"""Contador desnormalizado comunidad.miembros_activos con su índice"""
+from sqlalchemy import MetaData, Table, Column, Integer, Index, text
+
+from db.Migraciones import columna_existe, crear_indice, rellenar_por_lotes
+
+TRANSACCIONAL = False
+
+metadata = MetaData()
+comunidad = Table('comunidad', metadata, Column('miembros_activos', Integer))
+INDICE_MIEMBROS = Index('ix_comunidad_miembros_activos', comunidad.c.miembros_activos)
+
+
+def aplicar(engine):
+    with engine.begin() as connection:
+        if not columna_existe(connection, 'comunidad', 'miembros_activos'):
+            connection.execute(text(
+                "ALTER TABLE comunidad ADD COLUMN miembros_activos INTEGER NOT NULL DEFAULT 0"
+            ))
+
+    rellenar_por_lotes(engine, 'comunidad', 'id_comunidad', [
+        "UPDATE comunidad SET miembros_activos = ("
+        "SELECT COUNT(*) FROM incorpora_comunidad i "
+        "WHERE i.id_comunidad = comunidad.id_comunidad AND i.estado = 'activo') "
+        "WHERE id_comunidad BETWEEN :desde AND :hasta",
+    ])
+
+    crear_indice(engine, INDICE_MIEMBROS)
@@ -0,0 +1,43 @@
+"""Tabla actividad_comunidad_diaria con la ventana de tendencia actual rellenada"""
+from datetime import date, timedelta
+from sqlalchemy import MetaData, Table, Column, Integer, Date, ForeignKey, Index, text
+
+TRANSACCIONAL = False
+
+# Días de la ventana de tendencia al crear la tabla; los anteriores no puntúan
+VENTANA_DIAS = 7
+
+metadata = MetaData()
+Table('comunidad', metadata, Column('id_comunidad', Integer, primary_key=True))
+
+actividad_comunidad_diaria = Table(
+    'actividad_comunidad_diaria', metadata,
+    Column('id_comunidad', Integer, ForeignKey('comunidad.id_comunidad', ondelete='CASCADE'), primary_key=True),
+    Column('fecha', Date, primary_key=True),
+    Column('uniones', Integer, nullable=False, default=0),
+    Column('completados', Integer, nullable=False, default=0),
+    Index('ix_actividad_comunidad_fecha', 'fecha', 'id_comunidad'),
+)
+
+
+def aplicar(engine):
+    actividad_comunidad_diaria.create(bind=engine, checkfirst=True)
+
+    rango = {'desde': date.today() - timedelta(days=VENTANA_DIAS - 1), 'hasta': date.today()}
+    with engine.begin() as connection:
+        connection.execute(text(
+            "DELETE FROM actividad_comunidad_diaria WHERE fecha BETWEEN :desde AND :hasta"
+        ), rango)
+        connection.execute(text(
+            "INSERT INTO actividad_comunidad_diaria (id_comunidad, fecha, uniones, completados) "
+            "SELECT id_comunidad, fecha, SUM(uniones), SUM(completados) FROM ("
+            "  SELECT id_comunidad, fecha_union AS fecha, COUNT(*) AS uniones, 0 AS completados "
+            "  FROM incorpora_comunidad WHERE estado = 'activo' AND fecha_union BETWEEN :desde AND :hasta "
+            "  GROUP BY id_comunidad, fecha_union "
+            "  UNION ALL "
+            "  SELECT i.id_comunidad, s.fecha, 0, COUNT(*) "
+            "  FROM incorpora_comunidad i JOIN seguimiento_diario s ON s.id_usuario = i.id_usuario "
+            "  WHERE i.estado = 'activo' AND s.estado = 'completado' AND s.fecha BETWEEN :desde AND :hasta "
+            "  GROUP BY i.id_comunidad, s.fecha"
+            ") eventos GROUP BY id_comunidad, fecha"
+        ), rango)
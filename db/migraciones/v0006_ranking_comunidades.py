@@ -0,0 +1,34 @@
+"""Tabla ranking_comunidad rellenada por lotes de comunidades"""
+from sqlalchemy import MetaData, Table, Column, Integer, BigInteger, ForeignKey, Index
+
+from db.Migraciones import rellenar_por_lotes
+
+TRANSACCIONAL = False
+
+metadata = MetaData()
+Table('comunidad', metadata, Column('id_comunidad', Integer, primary_key=True))
+Table('usuarios', metadata, Column('id_usuario', Integer, primary_key=True))
+
+ranking_comunidad = Table(
+    'ranking_comunidad', metadata,
+    Column('id_comunidad', Integer, ForeignKey('comunidad.id_comunidad', ondelete='CASCADE'), primary_key=True),
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True),
+    Column('puntos', Integer, nullable=False, default=0),
+    Index('ix_ranking_comunidad_puntos', 'id_comunidad', 'puntos'),
+    Index('ix_ranking_comunidad_usuario', 'id_usuario'),
+)
+
+
+def aplicar(engine):
+    ranking_comunidad.create(bind=engine, checkfirst=True)
+
+    rellenar_por_lotes(engine, 'comunidad', 'id_comunidad', [
+        "DELETE FROM ranking_comunidad WHERE id_comunidad BETWEEN :desde AND :hasta",
+        "INSERT INTO ranking_comunidad (id_comunidad, id_usuario, puntos) "
+        "SELECT i.id_comunidad, i.id_usuario, COALESCE(SUM(l.puntos), 0) "
+        "FROM incorpora_comunidad i "
+        "LEFT JOIN desbloquea d ON d.id_usuario = i.id_usuario "
+        "LEFT JOIN logros l ON l.id_logro = d.id_logro "
+        "WHERE i.estado = 'activo' AND i.id_comunidad BETWEEN :desde AND :hasta "
+        "GROUP BY i.id_comunidad, i.id_usuario",
+    ], tamano_lote=200)
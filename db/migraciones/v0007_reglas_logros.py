@@ -0,0 +1,95 @@
+"""Reglas de logros automáticos: columnas en logros y contadores por usuario"""
+from datetime import timedelta
+from sqlalchemy import MetaData, Table, Column, Integer, BigInteger, String, Date, ForeignKey, Index, text
+
+from db.Migraciones import columna_existe, crear_indice
+
+TRANSACCIONAL = False
+
+USUARIOS_POR_LOTE = 500
+
+metadata = MetaData()
+Table('usuarios', metadata, Column('id_usuario', Integer, primary_key=True))
+logros = Table('logros', metadata, Column('tipo_regla', String(30)), Column('umbral', Integer))
+INDICE_REGLA = Index('ix_logros_regla', logros.c.tipo_regla, logros.c.umbral)
+
+contador_logros_usuario = Table(
+    'contador_logros_usuario', metadata,
+    Column('id_usuario', BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True),
+    Column('completados_total', Integer, nullable=False, default=0),
+    Column('racha_actual', Integer, nullable=False, default=0),
+    Column('racha_maxima', Integer, nullable=False, default=0),
+    Column('ultima_fecha_activa', Date, nullable=True),
+    Column('comunidades_activas', Integer, nullable=False, default=0),
+)
+
+
+def aplicar(engine):
+    with engine.begin() as connection:
+        if not columna_existe(connection, 'logros', 'tipo_regla'):
+            connection.execute(text("ALTER TABLE logros ADD COLUMN tipo_regla VARCHAR(30)"))
+        if not columna_existe(connection, 'logros', 'umbral'):
+            connection.execute(text("ALTER TABLE logros ADD COLUMN umbral INTEGER"))
+    crear_indice(engine, INDICE_REGLA)
+
+    contador_logros_usuario.create(bind=engine, checkfirst=True)
+
+    # Contadores iniciales desde el resumen diario, por lotes de usuarios. Todavía
+    # no hay logros con tipo_regla, así que no queda nada por desbloquear.
+    with engine.connect() as connection:
+        ids_usuario = connection.execute(text("SELECT id_usuario FROM usuarios ORDER BY id_usuario")).scalars().all()
+    for inicio in range(0, len(ids_usuario), USUARIOS_POR_LOTE):
+        lote = ids_usuario[inicio:inicio + USUARIOS_POR_LOTE]
+        with engine.begin() as connection:
+            _rellenar_contadores(connection, lote[0], lote[-1])
+
+
+def _rellenar_contadores(connection, desde: int, hasta: int):
+    rango = {'desde': desde, 'hasta': hasta}
+    completados = dict(connection.execute(text(
+        "SELECT id_usuario, SUM(completados) FROM resumen_diario_usuario "
+        "WHERE id_usuario BETWEEN :desde AND :hasta GROUP BY id_usuario"
+    ), rango).all())
+    comunidades = dict(connection.execute(text(
+        "SELECT id_usuario, COUNT(*) FROM incorpora_comunidad "
+        "WHERE estado = 'activo' AND id_usuario BETWEEN :desde AND :hasta GROUP BY id_usuario"
+    ), rango).all())
+    dias_activos = {}
+    # columns() tipa fecha: SQLite la devuelve como texto en consultas literales
+    for id_usuario, fecha in connection.execute(text(
+        "SELECT id_usuario, fecha FROM resumen_diario_usuario "
+        "WHERE id_usuario BETWEEN :desde AND :hasta AND completados > 0 ORDER BY id_usuario, fecha"
+    ).columns(id_usuario=BigInteger, fecha=Date), rango):
+        dias_activos.setdefault(id_usuario, []).append(fecha)
+
+    ids_usuario = connection.execute(text(
+        "SELECT id_usuario FROM usuarios WHERE id_usuario BETWEEN :desde AND :hasta"
+    ), rango).scalars().all()
+    filas = []
+    for id_usuario in ids_usuario:
+        racha_actual, racha_maxima, ultima = _calcular_rachas(dias_activos.get(id_usuario, []))
+        filas.append({
+            'id_usuario': id_usuario,
+            'completados_total': int(completados.get(id_usuario) or 0),
+            'racha_actual': racha_actual,
+            'racha_maxima': racha_maxima,
+            'ultima_fecha_activa': ultima,
+            'comunidades_activas': int(comunidades.get(id_usuario) or 0),
+        })
+
+    connection.execute(contador_logros_usuario.delete().where(
+        contador_logros_usuario.c.id_usuario.between(desde, hasta)
+    ))
+    if filas:
+        connection.execute(contador_logros_usuario.insert(), filas)
+
+
+def _calcular_rachas(dias):
+    """(racha_actual, racha_maxima, ultima_fecha_activa) de una lista ordenada de días activos"""
+    racha = maxima = 0
+    anterior = None
+    for dia in dias:
+        racha = racha + 1 if anterior is not None and dia == anterior + timedelta(days=1) else 1
+        maxima = max(maxima, racha)
+        anterior = dia
+    return racha, maxima, anterior
@@ -0,0 +1,42 @@
+"""Contraseñas con hash: columna ampliada e índices únicos normalizados de login"""
+from sqlalchemy import MetaData, Table, Column, String, Text, Index, func, inspect, text
+
+from db.Migraciones import crear_indice
+
+TRANSACCIONAL = False
+
+# Las contraseñas en texto plano se reemplazan por su hash en el siguiente login
+# (UsuarioRepository.autenticar_usuario); aquí solo se prepara el esquema.
+COLUMNAS_NORMALIZADAS = {
+    'ux_usuarios_nombre_usuario_normalizado': 'nombre_usuario',
+    'ux_usuarios_correo_normalizado': 'correo_electronico',
+}
+
+metadata = MetaData()
+usuarios = Table('usuarios', metadata, Column('nombre_usuario', Text), Column('correo_electronico', String(100)))
+INDICES = [
+    Index(nombre, func.lower(usuarios.c[columna]), unique=True) for nombre, columna in COLUMNAS_NORMALIZADAS.items()
+]
+
+
+def aplicar(engine):
+    # SQLite no aplica la longitud de VARCHAR; solo PostgreSQL necesita ampliar la columna
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            columna = next(c for c in inspect(connection).get_columns('usuarios') if c['name'] == 'contrasenia')
+            if (getattr(columna['type'], 'length', None) or 0) < 255:
+                connection.execute(text("ALTER TABLE usuarios ALTER COLUMN contrasenia TYPE VARCHAR(255)"))
+
+    with engine.connect() as connection:
+        for columna in COLUMNAS_NORMALIZADAS.values():
+            duplicados = connection.execute(text(
+                f"SELECT lower({columna}) FROM usuarios GROUP BY lower({columna}) HAVING COUNT(*) > 1"
+            )).scalars().all()
+            if duplicados:
+                raise RuntimeError(
+                    f"Valores de {columna} repetidos sin distinguir mayúsculas: {duplicados[:20]}. "
+                    f"Corregirlos antes de crear el índice único."
+                )
+
+    for indice in INDICES:
+        crear_indice(engine, indice)
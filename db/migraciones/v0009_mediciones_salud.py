@@ -0,0 +1,30 @@
+"""Serie de mediciones de salud por usuario, iniciada con el peso y altura actuales del perfil"""
+from sqlalchemy import MetaData, Table, Column, Integer, Float, Date, ForeignKey
+
+from db.Migraciones import rellenar_por_lotes
+
+TRANSACCIONAL = False
+
+metadata = MetaData()
+Table('usuarios', metadata, Column('id_usuario', Integer, primary_key=True))
+
+medicion_salud = Table(
+    'medicion_salud', metadata,
+    Column('id_usuario', Integer, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True),
+    Column('fecha', Date, primary_key=True),
+    Column('peso', Float(precision=24), nullable=True),
+    Column('altura', Float(precision=24), nullable=True),
+)
+
+
+def aplicar(engine):
+    medicion_salud.create(bind=engine, checkfirst=True)
+
+    # Primer punto de cada serie: lo que hoy guarda el perfil, fechado el día de la migración
+    rellenar_por_lotes(engine, 'perfil_usuario', 'id_usuario', [
+        "INSERT INTO medicion_salud (id_usuario, fecha, peso, altura) "
+        "SELECT p.id_usuario, CURRENT_DATE, p.peso, p.altura FROM perfil_usuario p "
+        "WHERE p.id_usuario BETWEEN :desde AND :hasta "
+        "AND (p.peso IS NOT NULL OR p.altura IS NOT NULL) "
+        "AND NOT EXISTS (SELECT 1 FROM medicion_salud m WHERE m.id_usuario = p.id_usuario)",
+    ])
@@ -0,0 +1,85 @@
+"""Nombre de usuario y correo normalizados en Python, con índices únicos propios"""
+from sqlalchemy import MetaData, Table, Column, String, Text, Index, text
+import unicodedata
+
+from db.Migraciones import crear_indice, eliminar_indice, columna_existe
+
+TRANSACCIONAL = False
+
+USUARIOS_POR_LOTE = 1000
+
+# lower() de SQLite solo convierte ASCII ('Íñigo' no coincidía con 'íñigo'); los
+# índices de v0008 se reemplazan por columnas que la aplicación rellena en Python.
+INDICES_ANTERIORES = ['ux_usuarios_nombre_usuario_normalizado', 'ux_usuarios_correo_normalizado']
+
+COLUMNAS = {
+    'nombre_usuario_normalizado': 'TEXT',
+    'correo_normalizado': 'VARCHAR(100)',
+}
+
+metadata = MetaData()
+usuarios = Table('usuarios', metadata, Column('nombre_usuario_normalizado', Text),
+                 Column('correo_normalizado', String(100)))
+INDICES = [
+    Index('ux_usuarios_login_nombre', usuarios.c.nombre_usuario_normalizado, unique=True),
+    Index('ux_usuarios_login_correo', usuarios.c.correo_normalizado, unique=True),
+]
+
+
+def normalizar(valor: str) -> str:
+    # Copia fija de model.Usuario.normalizar_identificador al momento de esta migración
+    return unicodedata.normalize('NFKC', valor).strip().casefold()
+
+
+def aplicar(engine):
+    with engine.begin() as connection:
+        for columna, tipo in COLUMNAS.items():
+            if not columna_existe(connection, 'usuarios', columna):
+                connection.execute(text(f"ALTER TABLE usuarios ADD COLUMN {columna} {tipo}"))
+
+    _rellenar(engine)
+
+    with engine.connect() as connection:
+        for columna in COLUMNAS:
+            duplicados = connection.execute(text(
+                f"SELECT {columna} FROM usuarios GROUP BY {columna} HAVING COUNT(*) > 1"
+            )).scalars().all()
+            if duplicados:
+                raise RuntimeError(
+                    f"Valores de {columna} repetidos tras normalizar: {duplicados[:20]}. "
+                    f"Corregirlos antes de crear el índice único."
+                )
+
+    # Crear los índices nuevos antes de quitar los anteriores: la unicidad no queda sin garantía
+    for indice in INDICES:
+        crear_indice(engine, indice)
+    for nombre in INDICES_ANTERIORES:
+        eliminar_indice(engine, nombre)
+
+    # SQLite no permite agregar NOT NULL a una columna existente
+    if engine.dialect.name == 'postgresql':
+        with engine.begin() as connection:
+            for columna in COLUMNAS:
+                connection.execute(text(f"ALTER TABLE usuarios ALTER COLUMN {columna} SET NOT NULL"))
+
+
+def _rellenar(engine):
+    """Normalizar por lotes de usuarios en orden de id, una transacción por lote"""
+    ultimo = 0
+    while True:
+        with engine.begin() as connection:
+            filas = connection.execute(text(
+                "SELECT id_usuario, nombre_usuario, correo_electronico FROM usuarios "
+                "WHERE id_usuario > :ultimo ORDER BY id_usuario LIMIT :lote"
+            ), {'ultimo': ultimo, 'lote': USUARIOS_POR_LOTE}).all()
+            if not filas:
+                return
+            connection.execute(text(
+                "UPDATE usuarios SET nombre_usuario_normalizado = :nombre, correo_normalizado = :correo "
+                "WHERE id_usuario = :id_usuario"
+            ), [
+                {'id_usuario': fila.id_usuario, 'nombre': normalizar(fila.nombre_usuario),
+                 'correo': normalizar(fila.correo_electronico)}
+                for fila in filas
+            ])
+            ultimo = filas[-1].id_usuario
@@ -0,0 +1,214 @@
+"""Exportar las tablas de seguimiento a Parquet para análisis.
+
+    python exportar_analitica.py --destino DIR [--hasta AAAA-MM-DD] [--lote N] [--completo]
+
+- seguimiento_diario/mes=AAAA-MM/parte-AAAAMMDD.parquet: particionado por mes e
+  incremental. Cada corrida exporta solo los días posteriores al último exportado
+  (guardado en _estado.json) y anteriores a --hasta (hoy por defecto, para no
+  exportar un día que todavía cambia). --completo borra lo exportado y empieza de cero.
+- habito.parquet, usuarios.parquet e incorpora_comunidad.parquet: instantánea
+  completa en cada corrida (sus filas cambian de estado, no solo se agregan).
+
+Las tablas se leen por lotes con cursor del lado del servidor y cada lote se
+escribe como un row group, así que la memoria no depende del tamaño de la tabla.
+estado y categoria se guardan con codificación de diccionario. Requiere pyarrow.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from db.Connection import DatabaseConnection
+from model.Categorias import Categoria
+from model.Habito import Habito
+from model.IncorporaComunidad import IncorporaComunidad
+from model.SeguimientoDiario import SeguimientoDiario
+from model.Usuario import Usuario
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dependencia opcional, solo la usa esta exportación
+    pa = pq = None
+
+ARCHIVO_ESTADO = '_estado.json'
+DIRECTORIO_SEGUIMIENTOS = 'seguimiento_diario'
+
+# Columnas de cada archivo: (nombre, tipo). 'diccionario' es texto con codificación de diccionario
+COLUMNAS_SEGUIMIENTO = (('fecha', 'fecha'), ('id_usuario', 'entero'), ('id_habito', 'entero'),
+                        ('estado', 'diccionario'), ('categoria', 'diccionario'))
+COLUMNAS_HABITO = (('id_habito', 'entero'), ('id_usuario', 'entero'), ('nombre', 'texto'),
+                   ('frecuencia', 'texto'), ('fecha_creacion', 'fecha'), ('categoria', 'diccionario'))
+# Sin nombre, apellido, correo ni contraseña: solo lo necesario para segmentar
+COLUMNAS_USUARIO = (('id_usuario', 'entero'), ('nombre_usuario', 'texto'),
+                    ('fecha_nacimiento', 'fecha'), ('sexo', 'diccionario'))
+COLUMNAS_INCORPORACION = (('id_usuario', 'entero'), ('id_comunidad', 'entero'),
+                          ('estado', 'diccionario'), ('fecha_union', 'fecha'))
+
+
+def _esquema(columnas) -> 'pa.Schema':
+    tipos = {
+        'entero': pa.int64(),
+        'texto': pa.string(),
+        'fecha': pa.date32(),
+        'diccionario': pa.dictionary(pa.int32(), pa.string()),
+    }
+    return pa.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+
+
+def _tabla_de_lote(filas, esquema: 'pa.Schema') -> 'pa.Table':
+    columnas = list(zip(*filas))
+    arreglos = []
+    for campo, valores in zip(esquema, columnas):
+        if pa.types.is_dictionary(campo.type):
+            arreglos.append(pa.array(valores, type=pa.string()).dictionary_encode())
+        else:
+            arreglos.append(pa.array(valores, type=campo.type))
+    return pa.Table.from_arrays(arreglos, schema=esquema)
+
+
+def _lotes(connection, consulta, tamano_lote: int):
+    resultado = connection.execution_options(stream_results=True, yield_per=tamano_lote).execute(consulta)
+    return resultado.partitions()
+
+
+def exportar_instantanea(connection, consulta, columnas, ruta: str, tamano_lote: int) -> int:
+    """Escribir el resultado completo de la consulta en ruta, reemplazándolo al terminar"""
+    esquema = _esquema(columnas)
+    temporal = f"{ruta}.tmp"
+    filas_escritas = 0
+    with pq.ParquetWriter(temporal, esquema) as escritor:
+        for filas in _lotes(connection, consulta, tamano_lote):
+            escritor.write_table(_tabla_de_lote(filas, esquema))
+            filas_escritas += len(filas)
+    os.replace(temporal, ruta)
+    return filas_escritas
+
+
+def exportar_seguimientos(connection, destino: str, desde: Optional[date], hasta: date, tamano_lote: int) -> int:
+    """Exportar los seguimientos con desde <= fecha < hasta en una parte nueva por mes"""
+    esquema = _esquema(COLUMNAS_SEGUIMIENTO)
+    consulta = select(
+        SeguimientoDiario.fecha, SeguimientoDiario.id_usuario, SeguimientoDiario.id_habito,
+        SeguimientoDiario.estado, Categoria.nombre
+    ).join(
+        Habito, Habito.id_habito == SeguimientoDiario.id_habito
+    ).outerjoin(
+        Categoria, Categoria.id_categoria == Habito.id_categoria
+    ).where(SeguimientoDiario.fecha < hasta)
+    if desde is not None:
+        consulta = consulta.where(SeguimientoDiario.fecha >= desde)
+    consulta = consulta.order_by(SeguimientoDiario.fecha)
+
+    # El nombre de la parte sale del primer día de la corrida: repetir una corrida fallida la sobrescribe
+    nombre_parte = f"parte-{(desde or date.min):%Y%m%d}.parquet"
+    escritor = mes_actual = ruta = None
+    filas_escritas = 0
+
+    def cerrar():
+        if escritor is not None:
+            escritor.close()
+            os.replace(f"{ruta}.tmp", ruta)
+
+    try:
+        for filas in _lotes(connection, consulta, tamano_lote):
+            for mes, grupo in groupby(filas, key=lambda fila: fila[0].strftime('%Y-%m')):
+                grupo = list(grupo)
+                if mes != mes_actual:
+                    cerrar()
+                    directorio = os.path.join(destino, DIRECTORIO_SEGUIMIENTOS, f"mes={mes}")
+                    os.makedirs(directorio, exist_ok=True)
+                    ruta = os.path.join(directorio, nombre_parte)
+                    escritor = pq.ParquetWriter(f"{ruta}.tmp", esquema)
+                    mes_actual = mes
+                escritor.write_table(_tabla_de_lote(grupo, esquema))
+                filas_escritas += len(grupo)
+    finally:
+        cerrar()
+    return filas_escritas
+
+
+def _leer_estado(destino: str) -> dict:
+    ruta = os.path.join(destino, ARCHIVO_ESTADO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def _guardar_estado(destino: str, estado: dict) -> None:
+    ruta = os.path.join(destino, ARCHIVO_ESTADO)
+    with open(f"{ruta}.tmp", 'w', encoding='utf-8') as archivo:
+        json.dump(estado, archivo, indent=2)
+    os.replace(f"{ruta}.tmp", ruta)
+
+
+def exportar_analitica(destino: str, hasta: Optional[date] = None, tamano_lote: Optional[int] = None,
+                       completo: bool = False) -> Dict[str, int]:
+    """Exportar las cuatro tablas en destino. Retorna las filas escritas por tabla"""
+    if pa is None:
+        raise RuntimeError("La exportación a Parquet requiere pyarrow (pip install pyarrow)")
+
+    db = DatabaseConnection()
+    hasta = hasta or date.today()
+    tamano_lote = tamano_lote or db.TAMANO_LOTE_STREAMING
+    os.makedirs(destino, exist_ok=True)
+
+    estado = {} if completo else _leer_estado(destino)
+    if completo:
+        shutil.rmtree(os.path.join(destino, DIRECTORIO_SEGUIMIENTOS), ignore_errors=True)
+
+    ultima = estado.get('seguimiento_diario_hasta')
+    desde = date.fromisoformat(ultima) + timedelta(days=1) if ultima else None
+
+    reporte = {}
+    with db.get_engine().connect() as connection:
+        if desde is None or desde < hasta:
+            reporte['seguimiento_diario'] = exportar_seguimientos(connection, destino, desde, hasta, tamano_lote)
+            estado['seguimiento_diario_hasta'] = (hasta - timedelta(days=1)).isoformat()
+        else:
+            reporte['seguimiento_diario'] = 0
+
+        instantaneas = {
+            'habito': (select(
+                Habito.id_habito, Habito.id_usuario, Habito.nombre, Habito.frecuencia,
+                Habito.fecha_creacion, Categoria.nombre
+            ).outerjoin(Categoria, Categoria.id_categoria == Habito.id_categoria).order_by(Habito.id_habito),
+                COLUMNAS_HABITO),
+            'usuarios': (select(
+                Usuario.id_usuario, Usuario.nombre_usuario, Usuario.fecha_nacimiento, Usuario.sexo
+            ).order_by(Usuario.id_usuario), COLUMNAS_USUARIO),
+            'incorpora_comunidad': (select(
+                IncorporaComunidad.id_usuario, IncorporaComunidad.id_comunidad,
+                IncorporaComunidad.estado, IncorporaComunidad.fecha_union
+            ).order_by(IncorporaComunidad.id_comunidad, IncorporaComunidad.id_usuario), COLUMNAS_INCORPORACION),
+        }
+        for tabla, (consulta, columnas) in instantaneas.items():
+            reporte[tabla] = exportar_instantanea(
+                connection, consulta, columnas, os.path.join(destino, f"{tabla}.parquet"), tamano_lote
+            )
+
+    _guardar_estado(destino, estado)
+    return reporte
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--destino', required=True, help="Directorio de salida")
+    parser.add_argument('--hasta', type=date.fromisoformat,
+                        help="Exportar seguimientos anteriores a esta fecha (por defecto hoy)")
+    parser.add_argument('--lote', type=int, help="Filas leídas por lote")
+    parser.add_argument('--completo', action='store_true', help="Reexportar todo el historial")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    reporte = exportar_analitica(args.destino, args.hasta, args.lote, args.completo)
+    for tabla, filas in reporte.items():
+        print(f"{tabla}: {filas} filas")
+    print(f"Exportación terminada en {time.perf_counter() - inicio:.2f}s")
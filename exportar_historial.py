@@ -0,0 +1,73 @@
+"""Exportar el historial de seguimientos de un usuario a CSV o JSON Lines.
+
+Las filas se leen por lotes y se escriben a medida que llegan, así que la
+memoria no depende del tamaño del historial:
+    python exportar_historial.py --usuario 7 [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+                                 [--formato csv|jsonl] [--salida archivo]
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import date
+from typing import Iterable, Optional, TextIO
+
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+COLUMNAS = ('fecha', 'habito', 'categoria', 'estado')
+
+
+def escribir_csv(filas: Iterable[tuple], salida: TextIO) -> int:
+    escritor = csv.writer(salida)
+    escritor.writerow(COLUMNAS)
+    total = 0
+    for fecha, habito, categoria, estado in filas:
+        escritor.writerow((fecha.isoformat(), habito, categoria or '', estado))
+        total += 1
+    return total
+
+
+def escribir_jsonl(filas: Iterable[tuple], salida: TextIO) -> int:
+    total = 0
+    for fecha, habito, categoria, estado in filas:
+        salida.write(json.dumps(
+            {'fecha': fecha.isoformat(), 'habito': habito, 'categoria': categoria, 'estado': estado},
+            ensure_ascii=False
+        ))
+        salida.write('\n')
+        total += 1
+    return total
+
+
+FORMATOS = {'csv': escribir_csv, 'jsonl': escribir_jsonl}
+
+
+def exportar_historial(id_usuario: int, salida: TextIO, formato: str = 'csv',
+                       fecha_inicio: Optional[date] = None, fecha_fin: Optional[date] = None,
+                       tamano_lote: Optional[int] = None) -> int:
+    """Escribir el historial en salida y retornar la cantidad de filas exportadas"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    filas = SeguimientoDiarioRepository().iterar_historial_usuario(id_usuario, fecha_inicio, fecha_fin, tamano_lote)
+    return FORMATOS[formato](filas, salida)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--usuario', type=int, required=True, help="ID del usuario a exportar")
+    parser.add_argument('--desde', type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD)")
+    parser.add_argument('--hasta', type=date.fromisoformat, help="Fecha final (AAAA-MM-DD)")
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+    parser.add_argument('--salida', help="Archivo de destino (por defecto la salida estándar)")
+    parser.add_argument('--lote', type=int, help="Filas leídas por lote")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.salida:
+        with open(args.salida, 'w', newline='', encoding='utf-8') as archivo:
+            filas = exportar_historial(args.usuario, archivo, args.formato, args.desde, args.hasta, args.lote)
+    else:
+        filas = exportar_historial(args.usuario, sys.stdout, args.formato, args.desde, args.hasta, args.lote)
+    print(f"{filas} seguimientos exportados en {time.perf_counter() - inicio:.2f}s", file=sys.stderr)
@@ -0,0 +1,165 @@
+"""Importar hábitos y su historial diario desde un CSV.
+
+    python importar_habitos.py --usuario 7 archivo.csv [--lote N]
+
+Columnas (con encabezado): habito, y opcionalmente categoria, frecuencia, fecha
+(AAAA-MM-DD) y estado. Una fila sin fecha solo crea el hábito. Acepta el CSV
+de exportar_historial.py. El archivo se lee en streaming y se guarda por lotes:
+un INSERT para los hábitos nuevos y un upsert para los seguimientos de cada lote.
+"""
+import argparse
+import csv
+import logging
+import sys
+import time
+from datetime import date
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from db.Connection import DatabaseConnection
+from repository.CategoriaRepository import CategoriasRepository
+from repository.HabitosRepository import HabitosRepository
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+logger = logging.getLogger(__name__)
+
+FRECUENCIA_POR_DEFECTO = 'diario'
+
+# (hábito, categoría, frecuencia, fecha, estado) de una fila válida
+Registro = Tuple[str, str, str, Optional[date], Optional[str]]
+
+
+class ImportadorHabitos:
+    """Importa filas de CSV para un usuario, reutilizando los hábitos que ya tiene por nombre"""
+
+    TAMANO_LOTE = 1000
+
+    def __init__(self, id_usuario: int, tamano_lote: Optional[int] = None):
+        self.db = DatabaseConnection()
+        self.id_usuario = id_usuario
+        self.tamano_lote = tamano_lote or self.TAMANO_LOTE
+        self.habitos_repository = HabitosRepository()
+        self.seguimientos_repository = SeguimientoDiarioRepository()
+
+        # Caches de toda la importación: una consulta por tabla, no una por nombre
+        self.categorias = {
+            nombre.strip().casefold(): id_categoria
+            for nombre, id_categoria in CategoriasRepository().obtener_ids_por_nombre().items()
+        }
+        self.habitos = {
+            habito.nombre: habito.id_habito
+            for habito in self.habitos_repository.obtener_habitos_por_usuario(id_usuario)
+        }
+
+        self.reporte = {'filas': 0, 'habitos_creados': 0, 'seguimientos': 0, 'filas_invalidas': 0}
+        self.categorias_desconocidas = set()
+
+    def importar(self, entrada: TextIO) -> Dict[str, int]:
+        """Leer el CSV completo y retornar el reporte de la importación"""
+        lector = csv.DictReader(entrada)
+        if not lector.fieldnames or 'habito' not in lector.fieldnames:
+            raise ValueError("El CSV debe tener encabezado con al menos la columna 'habito'")
+
+        lote: List[Registro] = []
+        for numero_linea, fila in enumerate(lector, start=2):
+            self.reporte['filas'] += 1
+            registro = self._interpretar(numero_linea, fila)
+            if registro is None:
+                self.reporte['filas_invalidas'] += 1
+                continue
+
+            lote.append(registro)
+            if len(lote) >= self.tamano_lote:
+                self._guardar_lote(lote)
+                lote = []
+
+        if lote:
+            self._guardar_lote(lote)
+
+        if self.categorias_desconocidas:
+            logger.warning(f"Categorías inexistentes (hábitos creados sin categoría): "
+                           f"{sorted(self.categorias_desconocidas)}")
+        return self.reporte
+
+    def _interpretar(self, numero_linea: int, fila: dict) -> Optional[Registro]:
+        nombre = (fila.get('habito') or '').strip()
+        fecha_texto = (fila.get('fecha') or '').strip()
+        estado = (fila.get('estado') or '').strip() or None
+
+        if not nombre or len(nombre) > 100:
+            logger.warning(f"Línea {numero_linea}: nombre de hábito vacío o demasiado largo")
+            return None
+
+        fecha = None
+        if fecha_texto:
+            try:
+                fecha = date.fromisoformat(fecha_texto)
+            except ValueError:
+                logger.warning(f"Línea {numero_linea}: fecha inválida '{fecha_texto}'")
+                return None
+            if estado not in SeguimientoDiarioRepository.ESTADOS_VALIDOS:
+                logger.warning(f"Línea {numero_linea}: estado inválido '{estado}'")
+                return None
+
+        categoria = (fila.get('categoria') or '').strip()
+        frecuencia = (fila.get('frecuencia') or '').strip() or FRECUENCIA_POR_DEFECTO
+        return nombre, categoria, frecuencia, fecha, estado
+
+    def _guardar_lote(self, lote: List[Registro]) -> None:
+        nuevos: Dict[str, dict] = {}
+        for nombre, categoria, frecuencia, fecha, _ in lote:
+            if nombre not in self.habitos and nombre not in nuevos:
+                nuevos[nombre] = {
+                    'nombre': nombre,
+                    'frecuencia': frecuencia,
+                    'fecha_creacion': fecha or date.today(),
+                    'id_categoria': self._id_categoria(categoria),
+                    'id_usuario': self.id_usuario
+                }
+
+        with self.db.get_session() as session:
+            ids_nuevos = self.habitos_repository.insertar_habitos(session, list(nuevos.values()))
+            ids_habito = {**self.habitos, **ids_nuevos}
+
+            # Si una fecha se repite para el mismo hábito gana la última fila
+            seguimientos = {
+                (fecha, ids_habito[nombre]): estado
+                for nombre, _, _, fecha, estado in lote if fecha is not None
+            }
+            self.seguimientos_repository.guardar_seguimientos_en_lote(session, [
+                {'fecha': fecha, 'id_habito': id_habito, 'id_usuario': self.id_usuario, 'estado': estado}
+                for (fecha, id_habito), estado in seguimientos.items()
+            ])
+
+        # La cache solo se actualiza cuando el lote quedó guardado
+        self.habitos.update(ids_nuevos)
+        self.reporte['habitos_creados'] += len(ids_nuevos)
+        self.reporte['seguimientos'] += len(seguimientos)
+        logger.info(f"Lote importado: {len(ids_nuevos)} hábitos nuevos, {len(seguimientos)} seguimientos")
+
+    def _id_categoria(self, categoria: str) -> Optional[int]:
+        if not categoria:
+            return None
+        id_categoria = self.categorias.get(categoria.casefold())
+        if id_categoria is None:
+            self.categorias_desconocidas.add(categoria)
+        return id_categoria
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('archivo', help="CSV a importar ('-' para la entrada estándar)")
+    parser.add_argument('--usuario', type=int, required=True, help="ID del usuario que recibe los hábitos")
+    parser.add_argument('--lote', type=int, help="Filas guardadas por transacción")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    importador = ImportadorHabitos(args.usuario, args.lote)
+    if args.archivo == '-':
+        reporte = importador.importar(sys.stdin)
+    else:
+        with open(args.archivo, newline='', encoding='utf-8-sig') as archivo:
+            reporte = importador.importar(archivo)
+
+    print(f"{reporte['filas']} filas leídas: {reporte['habitos_creados']} hábitos creados, "
+          f"{reporte['seguimientos']} seguimientos, {reporte['filas_invalidas']} filas inválidas, "
+          f"en {time.perf_counter() - inicio:.2f}s")
@@ -1,11 +1,17 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from controller.LoginController import LoginController
+from db.ColaSincronizacion import SincronizadorCola
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
 
+    # Envía en segundo plano las escrituras guardadas en el almacén local
+    sincronizador = SincronizadorCola()
+    sincronizador.iniciar()
+    app.aboutToQuit.connect(sincronizador.detener)
+
     controller = LoginController()
     controller.vista.show()
 
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
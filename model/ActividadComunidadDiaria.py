@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
+from model.Base import Base
+
+
+class ActividadComunidadDiaria(Base):
+    """Actividad de una comunidad en un día: uniones de miembros y hábitos completados por ellos"""
+
+    __tablename__ = 'actividad_comunidad_diaria'
+
+    id_comunidad = Column(Integer, ForeignKey('comunidad.id_comunidad', ondelete='CASCADE'), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    uniones = Column(Integer, nullable=False, default=0)
+    completados = Column(Integer, nullable=False, default=0)
+
+    # La ventana de tendencia filtra por fecha y agrupa por comunidad
+    __table_args__ = (
+        Index('ix_actividad_comunidad_fecha', 'fecha', 'id_comunidad'),
+    )
+
+    def __repr__(self):
+        return (f"<ActividadComunidadDiaria(id_comunidad={self.id_comunidad}, fecha={self.fecha}, "
+                f"uniones={self.uniones}, completados={self.completados})>")
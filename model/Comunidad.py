@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from model.Base import Base
 import logging
@@ -15,6 +15,12 @@ class Comunidad(Base):
     id_comunidad = Column(Integer, primary_key=True, autoincrement=True)
     nombre = Column(String(50), nullable=False)
     id_creador = Column(Integer, ForeignKey('usuarios.id_usuario', ondelete='SET DEFAULT'))
+    # Contador desnormalizado de incorporaciones activas, mantenido por IncorporaComunidadRepository
+    miembros_activos = Column(Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        Index('ix_comunidad_miembros_activos', 'miembros_activos'),
+    )
 
     # Relaciones
     usuario_creador = relationship("Usuario", back_populates="comunidades_creadas", foreign_keys=[id_creador])
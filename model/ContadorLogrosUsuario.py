@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey
+from model.Base import Base
+
+
+class ContadorLogrosUsuario(Base):
+    """Contadores por usuario que alimentan las reglas de logros automáticos"""
+
+    __tablename__ = 'contador_logros_usuario'
+
+    id_usuario = Column(BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True)
+    completados_total = Column(Integer, nullable=False, default=0)
+    racha_actual = Column(Integer, nullable=False, default=0)
+    racha_maxima = Column(Integer, nullable=False, default=0)
+    ultima_fecha_activa = Column(Date, nullable=True)
+    comunidades_activas = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<ContadorLogrosUsuario(id_usuario={self.id_usuario}, completados_total={self.completados_total}, "
+                f"racha_maxima={self.racha_maxima}, comunidades_activas={self.comunidades_activas})>")
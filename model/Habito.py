@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from model.Base import Base
 
@@ -12,6 +12,12 @@ class Habito(Base):
     id_categoria = Column(Integer, ForeignKey('categorias.id_categoria', ondelete='CASCADE'))
     id_usuario = Column(BigInteger, ForeignKey('usuarios.id_usuario'), nullable=False)
 
+    # Índices para los filtros del repositorio: hábitos de un usuario ordenados por nombre y por categoría
+    __table_args__ = (
+        Index('ix_habito_usuario_nombre', 'id_usuario', 'nombre'),
+        Index('ix_habito_categoria', 'id_categoria'),
+    )
+
     categoria_rel = relationship("Categoria", back_populates="habitos", lazy="select")
     usuario_rel = relationship("Usuario", back_populates="habitos")
     seguimientos = relationship("SeguimientoDiario", back_populates="habito_rel", lazy="dynamic")
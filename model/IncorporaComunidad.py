@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, BigInteger, String, Date, ForeignKey, PrimaryKeyConstraint, Index
 from sqlalchemy.orm import relationship
 from model.Base import Base
 import logging
@@ -17,9 +17,14 @@ class IncorporaComunidad(Base):
     estado = Column(String(50), nullable=False)
     fecha_union = Column(Date, nullable=False)
 
-    # Clave primaria compuesta
+    # Clave primaria compuesta e índices de las consultas por comunidad, por usuario y por fecha
     __table_args__ = (
         PrimaryKeyConstraint('id_usuario', 'id_comunidad'),
+        Index('ix_incorpora_comunidad_comunidad_estado', 'id_comunidad', 'estado', 'fecha_union'),
+        Index('ix_incorpora_comunidad_usuario_estado_fecha', 'id_usuario', 'estado', 'fecha_union'),
+        Index('ix_incorpora_comunidad_fecha_union', 'fecha_union'),
+        Index('ix_incorpora_comunidad_activos', 'id_comunidad', 'id_usuario',
+              postgresql_where=(estado == 'activo'), sqlite_where=(estado == 'activo')),
     )
 
     # Relaciones
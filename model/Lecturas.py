@@ -0,0 +1,50 @@
+"""Objetos de solo lectura para los listados.
+
+Las consultas de listado seleccionan solo estas columnas y construyen estos
+objetos sin pasar por el identity map ni el unit of work de la sesión. Los
+campos llevan los mismos nombres que los atributos del modelo, así que los
+llamadores que solo leen no notan la diferencia.
+"""
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Optional
+
+
+def columnas_de(lectura, modelo) -> list:
+    """Columnas del modelo en el orden de los campos de la clase de lectura"""
+    return [getattr(modelo, campo.name) for campo in fields(lectura)]
+
+
+@dataclass(frozen=True, slots=True)
+class HabitoLectura:
+    id_habito: int
+    nombre: str
+    frecuencia: str
+    fecha_creacion: date
+    id_categoria: Optional[int]
+    id_usuario: int
+
+
+@dataclass(frozen=True, slots=True)
+class ComunidadLectura:
+    id_comunidad: int
+    nombre: str
+    id_creador: Optional[int]
+    miembros_activos: int
+
+
+@dataclass(frozen=True, slots=True)
+class IncorporacionLectura:
+    id_usuario: int
+    id_comunidad: int
+    estado: str
+    fecha_union: date
+
+    def es_activo(self):
+        return self.estado.lower() == 'activo'
+
+    def es_pendiente(self):
+        return self.estado.lower() == 'pendiente'
+
+    def es_bloqueado(self):
+        return self.estado.lower() == 'bloqueado'
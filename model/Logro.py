@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 from model.Base import Base
 
@@ -10,6 +10,14 @@ class Logro(Base):
     puntos = Column(Integer, nullable=False)
     descripcion = Column(String(255), nullable=False)
 
+    # Regla de desbloqueo automático (ver ReglasLogroRepository); NULL para logros manuales
+    tipo_regla = Column(String(30), nullable=True)
+    umbral = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index('ix_logros_regla', 'tipo_regla', 'umbral'),
+    )
+
     # Relación con Usuario (a través de Desbloquea)
     usuarios = relationship(
         "Usuario",
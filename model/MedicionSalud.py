@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey
+from model.Base import Base
+
+
+class MedicionSalud(Base):
+    """Medición de peso y altura de un usuario en un día; la serie solo crece.
+
+    Cada columna es opcional: una medición solo de peso toma la última altura
+    registrada al calcular el IMC. REAL (4 bytes) alcanza para kg y metros.
+    """
+
+    __tablename__ = 'medicion_salud'
+
+    id_usuario = Column(Integer, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    peso = Column(Float(precision=24), nullable=True)
+    altura = Column(Float(precision=24), nullable=True)
+
+    def __repr__(self):
+        return f"<MedicionSalud(id_usuario={self.id_usuario}, fecha={self.fecha}, peso={self.peso}, altura={self.altura})>"
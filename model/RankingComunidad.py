@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey, Index
+from model.Base import Base
+
+
+class RankingComunidad(Base):
+    """Puntos de logros de cada miembro activo de una comunidad, materializados para el ranking"""
+
+    __tablename__ = 'ranking_comunidad'
+
+    id_comunidad = Column(Integer, ForeignKey('comunidad.id_comunidad', ondelete='CASCADE'), primary_key=True)
+    id_usuario = Column(BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True)
+    puntos = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_ranking_comunidad_puntos', 'id_comunidad', 'puntos'),
+        Index('ix_ranking_comunidad_usuario', 'id_usuario'),
+    )
+
+    def __repr__(self):
+        return (f"<RankingComunidad(id_comunidad={self.id_comunidad}, id_usuario={self.id_usuario}, "
+                f"puntos={self.puntos})>")
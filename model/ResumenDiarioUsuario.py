@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey
+from model.Base import Base
+
+
+class ResumenDiarioUsuario(Base):
+    """Resumen precalculado de los seguimientos de un usuario en un día"""
+
+    __tablename__ = 'resumen_diario_usuario'
+
+    id_usuario = Column(BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    total_seguimientos = Column(Integer, nullable=False, default=0)
+    completados = Column(Integer, nullable=False, default=0)
+    habitos_distintos = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<ResumenDiarioUsuario(id_usuario={self.id_usuario}, fecha={self.fecha}, "
+                f"total_seguimientos={self.total_seguimientos}, completados={self.completados})>")
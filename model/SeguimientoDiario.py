@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import Date, BigInteger
@@ -13,6 +13,15 @@ class SeguimientoDiario(Base):
     id_usuario = Column(BigInteger, ForeignKey('usuarios.id_usuario', ondelete='CASCADE'), primary_key=True)
     estado = Column(String(50), nullable=False)
 
+    # La clave primaria empieza por fecha; las consultas filtran primero por usuario o hábito
+    __table_args__ = (
+        Index('ix_seguimiento_usuario_habito_fecha', 'id_usuario', 'id_habito', 'fecha'),
+        Index('ix_seguimiento_usuario_fecha', 'id_usuario', 'fecha'),
+        Index('ix_seguimiento_habito_fecha', 'id_habito', 'fecha'),
+        Index('ix_seguimiento_completado', 'id_usuario', 'id_habito', 'fecha',
+              postgresql_where=(estado == 'completado'), sqlite_where=(estado == 'completado')),
+    )
+
     habito_rel = relationship("Habito", back_populates="seguimientos")
     usuario_rel = relationship("Usuario", back_populates="seguimientos")
 
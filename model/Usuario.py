@@ -1,6 +1,17 @@
-from sqlalchemy import Column, Integer, String, Date, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, Text, Index
+from sqlalchemy.orm import relationship, validates
 from model.Base import Base
+import unicodedata
+
+
+def normalizar_identificador(valor: str) -> str:
+    """Forma sin mayúsculas ni espacios extremos con la que se indexan y buscan nombre de usuario y correo.
+
+    Se calcula en Python y no con lower() de la BD: el de SQLite solo convierte
+    ASCII y el de PostgreSQL depende de la configuración regional.
+    """
+    return unicodedata.normalize('NFKC', valor).strip().casefold()
+
 
 class Usuario(Base):
     __tablename__ = 'usuarios'
@@ -9,10 +20,19 @@ class Usuario(Base):
     nombre = Column(String(50), nullable=False)
     apellido = Column(String(50), nullable=False)
     correo_electronico = Column(String(100), nullable=False)
-    contrasenia = Column(String(20), nullable=False)
+    contrasenia = Column(String(255), nullable=False)  # hash pbkdf2_sha256, ver repository.Contrasenias
     fecha_nacimiento = Column(Date, nullable=False)
     sexo = Column(String(2), nullable=False)
     nombre_usuario = Column(Text, nullable=False, unique=True)
+    # Copias normalizadas que se asignan al cambiar nombre_usuario o correo_electronico
+    nombre_usuario_normalizado = Column(Text, nullable=False)
+    correo_normalizado = Column(String(100), nullable=False)
+
+    # Login y unicidad sin distinguir mayúsculas: búsqueda por índice único sobre el valor normalizado
+    __table_args__ = (
+        Index('ux_usuarios_login_nombre', nombre_usuario_normalizado, unique=True),
+        Index('ux_usuarios_login_correo', correo_normalizado, unique=True),
+    )
 
     # Usar string en lugar de clase directa
     perfil = relationship("PerfilUsuario", uselist=False, back_populates="usuario", lazy="select")
@@ -23,5 +43,14 @@ class Usuario(Base):
     logros = relationship("Logro", secondary="desbloquea", back_populates="usuarios")
     asignacion_nivel = relationship("AsignacionNivel", uselist=False, back_populates="usuario")
 
+    @validates('nombre_usuario', 'correo_electronico')
+    def _normalizar(self, clave, valor):
+        normalizado = normalizar_identificador(valor) if valor is not None else None
+        if clave == 'nombre_usuario':
+            self.nombre_usuario_normalizado = normalizado
+        else:
+            self.correo_normalizado = normalizado
+        return valor
+
     def __repr__(self):
         return f"<Usuario(id_usuario={self.id_usuario}, nombre='{self.nombre}', apellido='{self.apellido}')>"
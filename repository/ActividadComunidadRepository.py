@@ -0,0 +1,216 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, select, insert, delete, literal
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import argparse
+import logging
+
+from db.Connection import DatabaseConnection
+from model.ActividadComunidadDiaria import ActividadComunidadDiaria
+from model.Comunidad import Comunidad
+from model.IncorporaComunidad import IncorporaComunidad
+from model.SeguimientoDiario import SeguimientoDiario
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class ActividadComunidadRepository:
+    """Actividad diaria por comunidad y ranking de comunidades en tendencia.
+
+    Los contadores diarios se incrementan en la misma transacción que la unión o
+    el seguimiento que los origina; la tendencia suma solo los días de la ventana.
+    Las uniones se cuentan en la fecha_union de cada miembro activo, igual que en
+    reconstruir. Los días anteriores a DIAS_CONSERVADOS se purgan con el comando
+    de mantenimiento de este módulo.
+    """
+
+    VENTANA_DIAS = 7
+    DIAS_CONSERVADOS = 90
+    PESO_UNION = 5
+    PESO_COMPLETADO = 1
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def registrar_union(self, session, id_comunidad: int, fecha_union: date, cantidad: int = 1) -> None:
+        """Contar un miembro que pasa a activo (o descontarlo con cantidad=-1) en su fecha de unión"""
+        self._sumar(session, {(id_comunidad, fecha_union): (cantidad, 0)})
+
+    def registrar_completados(self, session, deltas: Dict[Tuple[int, date], int]) -> None:
+        """Repartir cambios de completados por (id_usuario, fecha) entre las comunidades activas de cada usuario"""
+        deltas = {clave: delta for clave, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        usuarios = {id_usuario for id_usuario, _ in deltas}
+        membresias = session.query(IncorporaComunidad.id_usuario, IncorporaComunidad.id_comunidad).filter(
+            IncorporaComunidad.id_usuario.in_(usuarios),
+            IncorporaComunidad.estado == 'activo'
+        ).all()
+
+        comunidades_por_usuario: Dict[int, List[int]] = {}
+        for id_usuario, id_comunidad in membresias:
+            comunidades_por_usuario.setdefault(id_usuario, []).append(id_comunidad)
+
+        incrementos: Dict[Tuple[int, date], Tuple[int, int]] = {}
+        for (id_usuario, fecha), delta in deltas.items():
+            for id_comunidad in comunidades_por_usuario.get(id_usuario, []):
+                _, completados = incrementos.get((id_comunidad, fecha), (0, 0))
+                incrementos[(id_comunidad, fecha)] = (0, completados + delta)
+
+        self._sumar(session, incrementos)
+
+    def obtener_comunidades_tendencia(self, limite: int = 10, fecha_referencia: Optional[date] = None,
+                                      dias: int = VENTANA_DIAS) -> List[Dict[str, Any]]:
+        """Top-K de comunidades por actividad reciente (uniones y hábitos completados en la ventana)"""
+        fecha_referencia = fecha_referencia or date.today()
+        desde = fecha_referencia - timedelta(days=dias - 1)
+
+        try:
+            with self.db.get_session() as session:
+                actividad = session.query(
+                    ActividadComunidadDiaria.id_comunidad.label('id_comunidad'),
+                    func.sum(ActividadComunidadDiaria.uniones).label('uniones'),
+                    func.sum(ActividadComunidadDiaria.completados).label('completados')
+                ).filter(
+                    ActividadComunidadDiaria.fecha.between(desde, fecha_referencia)
+                ).group_by(ActividadComunidadDiaria.id_comunidad).subquery()
+
+                puntuacion = (self.PESO_UNION * actividad.c.uniones
+                              + self.PESO_COMPLETADO * actividad.c.completados).label('puntuacion')
+
+                filas = session.query(
+                    Comunidad, actividad.c.uniones, actividad.c.completados, puntuacion
+                ).join(
+                    actividad, actividad.c.id_comunidad == Comunidad.id_comunidad
+                ).filter(puntuacion > 0).order_by(
+                    puntuacion.desc(), Comunidad.nombre
+                ).limit(limite).all()
+
+                resultado = []
+                for comunidad, uniones, completados, valor in filas:
+                    session.expunge(comunidad)
+                    resultado.append({
+                        'comunidad': comunidad,
+                        'uniones': int(uniones),
+                        'completados': int(completados),
+                        'puntuacion': int(valor)
+                    })
+                return resultado
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo comunidades en tendencia: {e}")
+            return []
+
+    def reconstruir(self, desde: date, hasta: Optional[date] = None) -> None:
+        """Recalcular la actividad de un rango desde incorporaciones y seguimientos.
+
+        Los completados se atribuyen a las comunidades de las que el usuario es miembro activo hoy.
+        """
+        hasta = hasta or date.today()
+        rango = ActividadComunidadDiaria.fecha.between(desde, hasta)
+
+        uniones = select(
+            IncorporaComunidad.id_comunidad.label('id_comunidad'),
+            IncorporaComunidad.fecha_union.label('fecha'),
+            func.count().label('uniones'),
+            literal(0).label('completados')
+        ).where(
+            IncorporaComunidad.estado == 'activo',
+            IncorporaComunidad.fecha_union.between(desde, hasta)
+        ).group_by(IncorporaComunidad.id_comunidad, IncorporaComunidad.fecha_union)
+
+        completados = select(
+            IncorporaComunidad.id_comunidad.label('id_comunidad'),
+            SeguimientoDiario.fecha.label('fecha'),
+            literal(0).label('uniones'),
+            func.count().label('completados')
+        ).join(
+            SeguimientoDiario, SeguimientoDiario.id_usuario == IncorporaComunidad.id_usuario
+        ).where(
+            IncorporaComunidad.estado == 'activo',
+            SeguimientoDiario.estado == 'completado',
+            SeguimientoDiario.fecha.between(desde, hasta)
+        ).group_by(IncorporaComunidad.id_comunidad, SeguimientoDiario.fecha)
+
+        eventos = uniones.union_all(completados).subquery()
+        agregado = select(
+            eventos.c.id_comunidad, eventos.c.fecha, func.sum(eventos.c.uniones), func.sum(eventos.c.completados)
+        ).group_by(eventos.c.id_comunidad, eventos.c.fecha)
+
+        try:
+            with self.db.get_session() as session:
+                session.execute(delete(ActividadComunidadDiaria).where(rango))
+                session.execute(insert(ActividadComunidadDiaria).from_select(
+                    ['id_comunidad', 'fecha', 'uniones', 'completados'], agregado
+                ))
+                logger.info(f"Actividad de comunidades reconstruida entre {desde} y {hasta}")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error reconstruyendo actividad de comunidades: {e}")
+            raise
+
+    def purgar_anterior_a(self, fecha: date) -> int:
+        """Eliminar los días anteriores a la fecha indicada. Retorna las filas eliminadas."""
+        try:
+            with self.db.get_session() as session:
+                resultado = session.execute(
+                    delete(ActividadComunidadDiaria).where(ActividadComunidadDiaria.fecha < fecha)
+                )
+                return resultado.rowcount
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error purgando actividad de comunidades: {e}")
+            return 0
+
+    def _sumar(self, session, incrementos: Dict[Tuple[int, date], Tuple[int, int]]) -> None:
+        """Sumar (uniones, completados) a cada (id_comunidad, fecha), creando el día si no existe"""
+        filas = [
+            {'id_comunidad': id_comunidad, 'fecha': fecha, 'uniones': uniones, 'completados': completados}
+            for (id_comunidad, fecha), (uniones, completados) in incrementos.items()
+            if uniones or completados
+        ]
+        if not filas:
+            return
+
+        upsert = self.db.dialect_insert(ActividadComunidadDiaria)
+        if upsert is not None:
+            upsert = upsert.values(filas)
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=['id_comunidad', 'fecha'],
+                set_={
+                    'uniones': ActividadComunidadDiaria.uniones + upsert.excluded.uniones,
+                    'completados': ActividadComunidadDiaria.completados + upsert.excluded.completados
+                }
+            ))
+            return
+
+        for fila in filas:
+            actividad = session.get(ActividadComunidadDiaria, (fila['id_comunidad'], fila['fecha']))
+            if actividad:
+                actividad.uniones += fila['uniones']
+                actividad.completados += fila['completados']
+            else:
+                session.add(ActividadComunidadDiaria(**fila))
+        session.flush()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mantenimiento de la actividad diaria de comunidades")
+    parser.add_argument('--purgar', action='store_true',
+                        help="Eliminar los días anteriores a los últimos --conservar días")
+    parser.add_argument('--conservar', type=int, default=ActividadComunidadRepository.DIAS_CONSERVADOS,
+                        help="Días recientes que se conservan al purgar")
+    parser.add_argument('--reconstruir-desde', type=date.fromisoformat,
+                        help="Recalcular la actividad desde esta fecha (AAAA-MM-DD) hasta hoy")
+    args = parser.parse_args()
+
+    repository = ActividadComunidadRepository()
+    if args.reconstruir_desde:
+        repository.reconstruir(args.reconstruir_desde)
+        print(f"Actividad reconstruida desde {args.reconstruir_desde}")
+    if args.purgar:
+        # Nunca purgar dentro de la ventana de tendencia
+        limite = date.today() - timedelta(days=max(args.conservar, ActividadComunidadRepository.VENTANA_DIAS))
+        print(f"Días purgados: {repository.purgar_anterior_a(limite)} filas anteriores a {limite}")
@@ -1,7 +1,7 @@
 from sqlalchemy.exc import SQLAlchemyError
 from db.Connection import DatabaseConnection
 from model.Categorias import Categoria
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class CategoriasRepository:
     """Repositorio para operaciones de base de datos de Categoria"""
@@ -52,6 +52,15 @@ class CategoriasRepository:
             print(f"Error obteniendo categoría por nombre: {e}")
             return None
 
+    def obtener_ids_por_nombre(self) -> Dict[str, int]:
+        """Mapa nombre -> id_categoria de todas las categorías, con una sola consulta"""
+        try:
+            with self.db.get_session() as session:
+                return dict(session.query(Categoria.nombre, Categoria.id_categoria).all())
+        except SQLAlchemyError as e:
+            print(f"Error obteniendo mapa de categorías: {e}")
+            return {}
+
     def obtener_todas_categorias(self) -> List[Categoria]:
         """Obtener todas las categorías"""
         try:
@@ -1,11 +1,15 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from sqlalchemy import func, select
+from typing import List, Optional, Dict, Tuple
+import argparse
 import logging
 
 from db.Connection import DatabaseConnection
 from model.Comunidad import Comunidad
+from model.Lecturas import ComunidadLectura, columnas_de
 from model.ComunidadCategoria import ComunidadCategoria
+from model.IncorporaComunidad import IncorporaComunidad
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -97,15 +101,12 @@ class ComunidadRepository:
             logger.error(f"Error obteniendo comunidades por categoría {id_categoria}: {e}")
             return []
 
-    def obtener_todas_comunidades(self) -> List[Comunidad]:
-        """Obtener todas las comunidades"""
+    def obtener_todas_comunidades(self) -> List[ComunidadLectura]:
+        """Obtener todas las comunidades (objetos de solo lectura)"""
         try:
             with self.db.get_session() as session:
-                comunidades = session.query(Comunidad).order_by(Comunidad.nombre).all()
-
-                for comunidad in comunidades:
-                    session.expunge(comunidad)
-                return comunidades
+                filas = session.query(*columnas_de(ComunidadLectura, Comunidad)).order_by(Comunidad.nombre)
+                return [ComunidadLectura(*fila) for fila in filas]
 
         except SQLAlchemyError as e:
             logger.error(f"Error obteniendo todas las comunidades: {e}")
@@ -130,7 +131,7 @@ class ComunidadRepository:
 
                 # Actualizar solo campos válidos
                 for key, value in comunidad_data.items():
-                    if hasattr(comunidad, key) and key != 'id_comunidad':
+                    if hasattr(comunidad, key) and key not in ('id_comunidad', 'miembros_activos'):
                         setattr(comunidad, key, value)
 
                 session.flush()
@@ -173,6 +174,53 @@ class ComunidadRepository:
             logger.error(f"Error eliminando comunidad {id_comunidad}: {e}")
             return False
 
+    def obtener_comunidades_populares(self, limite: int = 10) -> List[Comunidad]:
+        """Obtener las comunidades con más miembros activos (usa el contador desnormalizado)"""
+        try:
+            with self.db.get_session() as session:
+                comunidades = session.query(Comunidad).order_by(
+                    Comunidad.miembros_activos.desc(), Comunidad.nombre
+                ).limit(limite).all()
+
+                for comunidad in comunidades:
+                    session.expunge(comunidad)
+                return comunidades
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo comunidades populares: {e}")
+            return []
+
+    def verificar_contadores_miembros(self, reparar: bool = False) -> Dict[int, Tuple[int, int]]:
+        """Comparar miembros_activos con el conteo real de incorporaciones activas.
+
+        Retorna {id_comunidad: (contador_guardado, conteo_real)} de las comunidades
+        desincronizadas; con reparar=True además las corrige en la misma transacción.
+        """
+        conteo_real = select(func.count()).where(
+            IncorporaComunidad.id_comunidad == Comunidad.id_comunidad,
+            IncorporaComunidad.estado == 'activo'
+        ).correlate(Comunidad).scalar_subquery()
+
+        try:
+            with self.db.get_session() as session:
+                filas = session.query(
+                    Comunidad.id_comunidad, Comunidad.miembros_activos, conteo_real
+                ).filter(Comunidad.miembros_activos != conteo_real).with_for_update(of=Comunidad).all()
+
+                diferencias = {id_comunidad: (guardado, real) for id_comunidad, guardado, real in filas}
+
+                if reparar and diferencias:
+                    session.query(Comunidad).filter(
+                        Comunidad.id_comunidad.in_(diferencias.keys())
+                    ).update({Comunidad.miembros_activos: conteo_real}, synchronize_session=False)
+                    logger.warning(f"Contadores de miembros reparados en {len(diferencias)} comunidades")
+
+                return diferencias
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error verificando contadores de miembros: {e}")
+            return {}
+
     def buscar_comunidades_por_nombre(self, nombre: str) -> List[Comunidad]:
         """Buscar comunidades por nombre (búsqueda parcial)"""
         if not nombre or len(nombre.strip()) == 0:
@@ -285,4 +333,15 @@ class ComunidadRepository:
             raise ValueError("El nombre de la comunidad no puede exceder 50 caracteres")
 
         if 'id_creador' in comunidad_data and not self._validar_id(comunidad_data['id_creador']):
-            raise ValueError("El id_creador debe ser un entero positivo válido")
\ No newline at end of file
+            raise ValueError("El id_creador debe ser un entero positivo válido")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Verificar los contadores de miembros activos de las comunidades")
+    parser.add_argument('--reparar', action='store_true', help="Corregir los contadores desincronizados")
+    args = parser.parse_args()
+
+    diferencias = ComunidadRepository().verificar_contadores_miembros(args.reparar)
+    for id_comunidad, (guardado, real) in sorted(diferencias.items()):
+        print(f"Comunidad {id_comunidad}: contador {guardado}, real {real}")
+    print(f"{len(diferencias)} comunidades desincronizadas{' (reparadas)' if args.reparar else ''}")
@@ -0,0 +1,88 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Formato almacenado: pbkdf2_sha256$<iteraciones>$<sal base64>$<hash base64>
+ALGORITMO = 'pbkdf2_sha256'
+
+# Factor de trabajo por defecto; se ajusta con la variable de entorno contrasenia_iteraciones
+ITERACIONES_POR_DEFECTO = 600_000
+
+BYTES_SAL = 16
+
+# Hash de una contraseña aleatoria por cantidad de iteraciones, para verificar_senuelo
+_senuelos = {}
+
+
+def iteraciones_configuradas() -> int:
+    """Iteraciones de PBKDF2 para los hashes nuevos"""
+    return max(int(os.getenv('contrasenia_iteraciones', ITERACIONES_POR_DEFECTO)), 1)
+
+
+def generar_hash(contrasenia: str, iteraciones: int = None) -> str:
+    """Hash salado de la contraseña en el formato almacenado en usuarios.contrasenia.
+
+    Es costoso a propósito: desde la interfaz debe llamarse fuera del hilo principal.
+    """
+    iteraciones = iteraciones or iteraciones_configuradas()
+    sal = secrets.token_bytes(BYTES_SAL)
+    derivada = hashlib.pbkdf2_hmac('sha256', contrasenia.encode('utf-8'), sal, iteraciones)
+    return '$'.join((ALGORITMO, str(iteraciones), _b64(sal), _b64(derivada)))
+
+
+def es_hash(valor: str) -> bool:
+    """Distinguir un hash de una contraseña heredada guardada en texto plano"""
+    return bool(valor) and valor.startswith(ALGORITMO + '$') and valor.count('$') == 3
+
+
+def verificar(contrasenia: str, almacenada: str) -> bool:
+    """Comparar en tiempo constante contra un hash o contra un valor heredado en texto plano.
+
+    Un valor almacenado con forma de hash pero mal formado retorna False en lugar de lanzar.
+    """
+    if not almacenada:
+        return False
+    if not es_hash(almacenada):
+        verificar_senuelo(contrasenia)
+        return hmac.compare_digest(contrasenia.encode('utf-8'), almacenada.encode('utf-8'))
+
+    try:
+        _, iteraciones, sal, esperada = almacenada.split('$')
+        derivada = hashlib.pbkdf2_hmac('sha256', contrasenia.encode('utf-8'), base64.b64decode(sal, validate=True),
+                                       int(iteraciones))
+        return hmac.compare_digest(derivada, base64.b64decode(esperada, validate=True))
+    except ValueError:
+        # Hash mal formado (binascii.Error deriva de ValueError): no coincide con ninguna contraseña
+        verificar_senuelo(contrasenia)
+        return False
+
+
+def verificar_senuelo(contrasenia: str) -> bool:
+    """Hacer el trabajo de una verificación real sin hash contra el cual comparar; siempre retorna False.
+
+    Para usuarios inexistentes o contraseñas heredadas: el tiempo de respuesta no
+    revela si el nombre de usuario existe.
+    """
+    iteraciones = iteraciones_configuradas()
+    if iteraciones not in _senuelos:
+        _senuelos[iteraciones] = generar_hash(secrets.token_urlsafe(), iteraciones)
+    verificar(contrasenia, _senuelos[iteraciones])
+    return False
+
+
+def necesita_rehash(almacenada: str) -> bool:
+    """Texto plano o hash con menos iteraciones que las configuradas"""
+    if not es_hash(almacenada):
+        return True
+    return int(almacenada.split('$')[1]) < iteraciones_configuradas()
+
+
+def _b64(datos: bytes) -> str:
+    return base64.b64encode(datos).decode('ascii')
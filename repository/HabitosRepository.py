@@ -1,12 +1,16 @@
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, insert
 from datetime import date
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import logging
 
 from db.Connection import DatabaseConnection
+from db.ColaSincronizacion import (ColaSincronizacion, SincronizadorCola, ENTIDAD_HABITO,
+                                   ENTIDAD_SEGUIMIENTO, clave_seguimiento)
 from model.Habito import Habito
+from model.Lecturas import HabitoLectura, columnas_de
 from model.SeguimientoDiario import SeguimientoDiario
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -25,6 +29,8 @@ class HabitosRepository:
 
     def __init__(self):
         self.db = DatabaseConnection()
+        self.cola = ColaSincronizacion()
+        self.resumen = ResumenDiarioRepository()
 
     def crear_habito(self, habito_data: dict) -> Optional[Habito]:
         """Crear hábito en BD"""
@@ -46,6 +52,23 @@ class HabitosRepository:
             logger.error(f"Error de BD creando hábito: {e}")
             return None
 
+    def insertar_habitos(self, session, habitos: List[dict]) -> Dict[str, int]:
+        """Insertar varios hábitos dentro de la transacción del llamador. Retorna nombre -> id_habito"""
+        if not habitos:
+            return {}
+
+        if session.get_bind().dialect.insert_executemany_returning:
+            filas = session.execute(
+                insert(Habito).returning(Habito.nombre, Habito.id_habito, sort_by_parameter_order=True),
+                habitos
+            )
+            return dict(filas.all())
+
+        nuevos = [Habito(**habito_data) for habito_data in habitos]
+        session.add_all(nuevos)
+        session.flush()
+        return {habito.nombre: habito.id_habito for habito in nuevos}
+
     def obtener_habito_por_id(self, id_habito: int) -> Optional[Habito]:
         """Obtener hábito por ID"""
         if not self._validar_id(id_habito):
@@ -66,20 +89,17 @@ class HabitosRepository:
             logger.error(f"Error obteniendo hábito {id_habito}: {e}")
             return None
 
-    def obtener_habitos_por_usuario(self, id_usuario: int) -> List[Habito]:
-        """Obtener todos los hábitos de un usuario"""
+    def obtener_habitos_por_usuario(self, id_usuario: int) -> List[HabitoLectura]:
+        """Obtener todos los hábitos de un usuario (objetos de solo lectura)"""
         if not self._validar_id(id_usuario):
             return []
 
         try:
             with self.db.get_session() as session:
-                habitos = session.query(Habito).filter(
+                filas = session.query(*columnas_de(HabitoLectura, Habito)).filter(
                     Habito.id_usuario == id_usuario
-                ).order_by(Habito.nombre).all()
-
-                for habito in habitos:
-                    session.expunge(habito)
-                return habitos
+                ).order_by(Habito.nombre)
+                return [HabitoLectura(*fila) for fila in filas]
 
         except SQLAlchemyError as e:
             logger.error(f"Error obteniendo hábitos del usuario {id_usuario}: {e}")
@@ -139,7 +159,7 @@ class HabitosRepository:
                         'estado': estado or 'pendiente'
                     })
 
-                return habitos_con_estado
+            return self._aplicar_cambios_pendientes(id_usuario, fecha, habitos_con_estado)
 
         except SQLAlchemyError as e:
             logger.error(f"Error obteniendo hábitos por fecha {fecha} del usuario {id_usuario}: {e}")
@@ -196,9 +216,11 @@ class HabitosRepository:
         try:
             with self.db.get_session() as session:
                 # Eliminar seguimientos asociados primero
+                dias_afectados = self.resumen.claves_afectadas(session, SeguimientoDiario.id_habito == id_habito)
                 session.query(SeguimientoDiario).filter(
                     SeguimientoDiario.id_habito == id_habito
                 ).delete()
+                self.resumen.recalcular_dias(session, dias_afectados)
 
                 # Eliminar el hábito
                 habito_eliminado = session.query(Habito).filter(
@@ -216,6 +238,41 @@ class HabitosRepository:
             logger.error(f"Error eliminando hábito {id_habito}: {e}")
             return False
 
+    def actualizar_habito_diferido(self, id_habito: int, habito_data: dict) -> bool:
+        """Registrar la actualización en el almacén local; se envía a la BD remota en segundo plano"""
+        if not self._validar_id(id_habito):
+            return False
+
+        try:
+            self._validar_datos_habito_actualizacion(habito_data)
+            datos = {key: value for key, value in habito_data.items() if key != 'id_habito'}
+            self.cola.encolar(ENTIDAD_HABITO, 'actualizar', str(id_habito), datos)
+            SincronizadorCola().notificar()
+            logger.info(f"Actualización del hábito {id_habito} encolada para sincronizar")
+            return True
+
+        except ValueError as e:
+            logger.error(f"Datos inválidos para actualizar hábito {id_habito}: {e}")
+            return False
+        except SQLAlchemyError as e:
+            logger.error(f"Error del almacén local actualizando hábito {id_habito}: {e}")
+            return False
+
+    def eliminar_habito_diferido(self, id_habito: int) -> bool:
+        """Registrar la eliminación en el almacén local; se envía a la BD remota en segundo plano"""
+        if not self._validar_id(id_habito):
+            return False
+
+        try:
+            self.cola.encolar(ENTIDAD_HABITO, 'eliminar', str(id_habito), {})
+            SincronizadorCola().notificar()
+            logger.info(f"Eliminación del hábito {id_habito} encolada para sincronizar")
+            return True
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error del almacén local eliminando hábito {id_habito}: {e}")
+            return False
+
     def actualizar_estado_habito_fecha(self, id_habito: int, id_usuario: int,
                                        nuevo_estado: str, fecha: date) -> bool:
         """Actualizar o crear el estado de un hábito para una fecha específica"""
@@ -245,13 +302,12 @@ class HabitosRepository:
                         fecha=fecha,
                         id_habito=id_habito,
                         id_usuario=id_usuario,
-                        estado=nuevo_estado,
-                        observaciones='',
-                        edad=0
+                        estado=nuevo_estado
                     )
                     session.add(nuevo_seguimiento)
                     logger.info(f"Nuevo seguimiento creado para hábito {id_habito} en fecha {fecha}")
 
+                self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
                 return True
 
         except SQLAlchemyError as e:
@@ -268,32 +324,100 @@ class HabitosRepository:
             return {}
 
         try:
-            with self.db.get_session() as session:
-                total_seguimientos = session.query(SeguimientoDiario).filter(
-                    and_(
-                        SeguimientoDiario.id_usuario == id_usuario,
-                        SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
-                    )
-                ).count()
+            totales = self.resumen.obtener_totales(id_usuario, fecha_inicio, fecha_fin)
+            total_seguimientos = totales['total_seguimientos']
+            completados = totales['completados']
 
-                completados = session.query(SeguimientoDiario).filter(
+            return {
+                'total_seguimientos': total_seguimientos,
+                'completados': completados,
+                'porcentaje_completado': (completados / total_seguimientos * 100) if total_seguimientos > 0 else 0
+            }
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo estadísticas del usuario {id_usuario}: {e}")
+            return {}
+
+    def obtener_matriz_cumplimiento(self, id_usuario: int, fecha_inicio: date, fecha_fin: date) -> Dict[str, Any]:
+        """Obtener la matriz densa hábitos × días de un rango, para el mapa de calor del calendario.
+
+        Una sola consulta trae los hábitos del usuario con sus seguimientos
+        completados del rango; el resto se calcula con NumPy:
+        'programados' y 'completados' son matrices booleanas (hábitos × días),
+        y 'ratio_diario' es la fracción de hábitos programados completados por
+        día (NaN si ese día no había hábitos programados). Los seguimientos
+        del rango que siguen en la cola de sincronización se superponen a lo
+        leído de la BD remota, igual que en obtener_habitos_por_fecha.
+        """
+        if not self._validar_id(id_usuario) or fecha_inicio > fecha_fin:
+            return {}
+
+        import numpy as np
+
+        try:
+            with self.db.get_session() as session:
+                filas = session.query(
+                    Habito.id_habito,
+                    Habito.frecuencia,
+                    Habito.fecha_creacion,
+                    SeguimientoDiario.fecha
+                ).outerjoin(
+                    SeguimientoDiario,
                     and_(
+                        Habito.id_habito == SeguimientoDiario.id_habito,
                         SeguimientoDiario.id_usuario == id_usuario,
                         SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin),
                         SeguimientoDiario.estado == 'completado'
                     )
-                ).count()
-
-                return {
-                    'total_seguimientos': total_seguimientos,
-                    'completados': completados,
-                    'porcentaje_completado': (completados / total_seguimientos * 100) if total_seguimientos > 0 else 0
-                }
+                ).filter(
+                    Habito.id_usuario == id_usuario
+                ).order_by(Habito.nombre, Habito.id_habito).all()
 
         except SQLAlchemyError as e:
-            logger.error(f"Error obteniendo estadísticas del usuario {id_usuario}: {e}")
+            logger.error(f"Error obteniendo matriz de cumplimiento del usuario {id_usuario}: {e}")
             return {}
 
+        num_dias = (fecha_fin - fecha_inicio).days + 1
+        indices: Dict[int, int] = {}
+        mascaras_semana = []
+        desfases_creacion = []
+        filas_completadas = []
+        columnas_completadas = []
+
+        for id_habito, frecuencia, fecha_creacion, fecha in filas:
+            if id_habito not in indices:
+                indices[id_habito] = len(indices)
+                mascaras_semana.append([dia in (frecuencia or '') for dia in self.DIAS_SEMANA.values()])
+                desfases_creacion.append((fecha_creacion - fecha_inicio).days if fecha_creacion else 0)
+            if fecha is not None:
+                filas_completadas.append(indices[id_habito])
+                columnas_completadas.append((fecha - fecha_inicio).days)
+
+        dia_semana = (np.arange(num_dias) + fecha_inicio.weekday()) % 7
+        mascaras = np.array(mascaras_semana, dtype=bool).reshape(len(indices), 7)
+        desfases = np.array(desfases_creacion, dtype=np.int32)
+
+        programados = mascaras[:, dia_semana] & (np.arange(num_dias)[None, :] >= desfases[:, None])
+        completados = np.zeros((len(indices), num_dias), dtype=bool)
+        completados[filas_completadas, columnas_completadas] = True
+        for (id_habito, fecha), estado in self._seguimientos_pendientes(id_usuario, fecha_inicio, fecha_fin).items():
+            if id_habito in indices:
+                completados[indices[id_habito], (fecha - fecha_inicio).days] = estado == 'completado'
+
+        total_programados = programados.sum(axis=0)
+        total_completados = (completados & programados).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio_diario = np.where(total_programados > 0, total_completados / total_programados, np.nan)
+
+        return {
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+            'ids_habitos': np.fromiter(indices.keys(), dtype=np.int64, count=len(indices)),
+            'programados': programados,
+            'completados': completados,
+            'ratio_diario': ratio_diario
+        }
+
     # Métodos privados de validación y utilidad
     def _validar_id(self, id_valor: int) -> bool:
         """Validar que el ID sea válido"""
@@ -320,6 +444,57 @@ class HabitosRepository:
         if 'nombre' in habito_data and len(habito_data['nombre']) > 100:
             raise ValueError("El nombre del hábito no puede exceder 100 caracteres")
 
+    def _aplicar_cambios_pendientes(self, id_usuario: int, fecha: date,
+                                    habitos_con_estado: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Superponer las mutaciones aún no sincronizadas sobre lo leído de la BD remota"""
+        try:
+            cambios_habitos = {
+                int(cambio['clave']): cambio
+                for cambio in self.cola.obtener_pendientes_de(ENTIDAD_HABITO)
+            }
+            estados = {
+                cambio['clave']: cambio['datos']['estado']
+                for cambio in self.cola.obtener_pendientes_de(ENTIDAD_SEGUIMIENTO)
+            }
+        except SQLAlchemyError as e:
+            logger.error(f"Error leyendo cambios pendientes del almacén local: {e}")
+            return habitos_con_estado
+
+        resultado = []
+        for item in habitos_con_estado:
+            habito = item['habito']
+            cambio = cambios_habitos.get(habito.id_habito)
+            if cambio and cambio['operacion'] == 'eliminar':
+                continue
+            if cambio:
+                for key, value in cambio['datos'].items():
+                    setattr(habito, key, value)
+
+            clave = clave_seguimiento(id_usuario, habito.id_habito, fecha)
+            resultado.append({
+                'habito': habito,
+                'estado': estados.get(clave, item['estado'])
+            })
+
+        return resultado
+
+    def _seguimientos_pendientes(self, id_usuario: int, fecha_inicio: date,
+                                 fecha_fin: date) -> Dict[Tuple[int, date], str]:
+        """Estados aún no sincronizados de los seguimientos del usuario en el rango, por (hábito, fecha)"""
+        try:
+            cambios = self.cola.obtener_pendientes_de(ENTIDAD_SEGUIMIENTO)
+        except SQLAlchemyError as e:
+            logger.error(f"Error leyendo cambios pendientes del almacén local: {e}")
+            return {}
+
+        estados = {}
+        for cambio in cambios:
+            id_usuario_cambio, id_habito, fecha = cambio['clave'].split(':')
+            fecha = date.fromisoformat(fecha)
+            if int(id_usuario_cambio) == id_usuario and fecha_inicio <= fecha <= fecha_fin:
+                estados[(int(id_habito), fecha)] = cambio['datos']['estado']
+        return estados
+
     def _obtener_dia_semana(self, fecha: date) -> str:
         """Obtener el nombre del día de la semana en español"""
         return self.DIAS_SEMANA[fecha.weekday()]
\ No newline at end of file
@@ -1,13 +1,18 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import joinedload
-from typing import List, Optional
+from sqlalchemy import func
+from typing import List, Optional, Dict, Iterable, Iterator, Set
 from datetime import date
 import logging
 
 from db.Connection import DatabaseConnection
 from model.IncorporaComunidad import IncorporaComunidad
 from model.Comunidad import Comunidad
+from model.Lecturas import IncorporacionLectura, columnas_de
 from model.Usuario import Usuario
+from repository.ActividadComunidadRepository import ActividadComunidadRepository
+from repository.RankingComunidadRepository import RankingComunidadRepository
+from repository.ReglasLogroRepository import ReglasLogroRepository
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -16,8 +21,18 @@ logger = logging.getLogger(__name__)
 class IncorporaComunidadRepository:
     """Repositorio para operaciones de base de datos de IncorporaComunidad"""
 
+    # Contador de estadísticas para cada estado de incorporación
+    CLAVES_ESTADISTICAS = {
+        'activo': 'miembros_activos',
+        'pendiente': 'miembros_pendientes',
+        'bloqueado': 'miembros_bloqueados'
+    }
+
     def __init__(self):
         self.db = DatabaseConnection()
+        self.actividad = ActividadComunidadRepository()
+        self.ranking = RankingComunidadRepository()
+        self.reglas = ReglasLogroRepository()
 
     def incorporar_usuario_a_comunidad(self, incorporacion_data: dict) -> Optional[IncorporaComunidad]:
         """Incorporar usuario a una comunidad"""
@@ -42,6 +57,11 @@ class IncorporaComunidadRepository:
                 incorporacion = IncorporaComunidad(**incorporacion_data)
                 session.add(incorporacion)
                 session.flush()
+                if incorporacion.estado == 'activo':
+                    self._ajustar_miembros_activos(session, incorporacion.id_comunidad, 1)
+                    self.actividad.registrar_union(session, incorporacion.id_comunidad, incorporacion.fecha_union)
+                    self.ranking.agregar_miembro(session, incorporacion.id_comunidad, incorporacion.id_usuario)
+                    self.reglas.procesar_membresia(session, incorporacion.id_usuario, 1)
                 session.expunge(incorporacion)
                 logger.info(f"Usuario {incorporacion.id_usuario} incorporado exitosamente a comunidad {incorporacion.id_comunidad}")
                 return incorporacion
@@ -74,25 +94,67 @@ class IncorporaComunidadRepository:
             logger.error(f"Error obteniendo incorporación usuario {id_usuario} en comunidad {id_comunidad}: {e}")
             return None
 
-    def obtener_comunidades_de_usuario(self, id_usuario: int, estado: Optional[str] = None) -> List[IncorporaComunidad]:
-        """Obtener todas las comunidades de un usuario, opcionalmente filtradas por estado"""
+    def obtener_incorporaciones_usuario_en(self, id_usuario: int,
+                                           ids_comunidad: Iterable[int]) -> Dict[int, IncorporaComunidad]:
+        """Obtener las incorporaciones de un usuario en varias comunidades con una sola consulta.
+
+        Retorna {id_comunidad: incorporación}; las comunidades sin incorporación no aparecen.
+        """
+        ids_validos = {id_comunidad for id_comunidad in ids_comunidad if self._validar_id(id_comunidad)}
+        if not self._validar_id(id_usuario) or not ids_validos:
+            return {}
+
+        try:
+            with self.db.get_session() as session:
+                incorporaciones = session.query(IncorporaComunidad).filter(
+                    IncorporaComunidad.id_usuario == id_usuario,
+                    IncorporaComunidad.id_comunidad.in_(ids_validos)
+                ).all()
+
+                for incorporacion in incorporaciones:
+                    session.expunge(incorporacion)
+                return {incorporacion.id_comunidad: incorporacion for incorporacion in incorporaciones}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo incorporaciones del usuario {id_usuario}: {e}")
+            return {}
+
+    def obtener_comunidades_con_creador_incorporado(self, ids_comunidad: Iterable[int]) -> Set[int]:
+        """De las comunidades indicadas, cuáles tienen a su creador en la tabla de incorporaciones"""
+        ids_validos = {id_comunidad for id_comunidad in ids_comunidad if self._validar_id(id_comunidad)}
+        if not ids_validos:
+            return set()
+
+        try:
+            with self.db.get_session() as session:
+                filas = session.query(IncorporaComunidad.id_comunidad).join(
+                    Comunidad, Comunidad.id_comunidad == IncorporaComunidad.id_comunidad
+                ).filter(
+                    IncorporaComunidad.id_comunidad.in_(ids_validos),
+                    IncorporaComunidad.id_usuario == Comunidad.id_creador
+                ).all()
+                return {id_comunidad for id_comunidad, in filas}
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error verificando creadores incorporados: {e}")
+            return set()
+
+    def obtener_comunidades_de_usuario(self, id_usuario: int, estado: Optional[str] = None) -> List[IncorporacionLectura]:
+        """Obtener todas las comunidades de un usuario, opcionalmente filtradas por estado (solo lectura)"""
         if not self._validar_id(id_usuario):
             return []
 
         try:
             with self.db.get_session() as session:
-                query = session.query(IncorporaComunidad).filter(
+                query = session.query(*columnas_de(IncorporacionLectura, IncorporaComunidad)).filter(
                     IncorporaComunidad.id_usuario == id_usuario
                 )
 
                 if estado:
                     query = query.filter(IncorporaComunidad.estado == estado)
 
-                incorporaciones = query.order_by(IncorporaComunidad.fecha_union.desc()).all()
-
-                for incorporacion in incorporaciones:
-                    session.expunge(incorporacion)
-                return incorporaciones
+                filas = query.order_by(IncorporaComunidad.fecha_union.desc())
+                return [IncorporacionLectura(*fila) for fila in filas]
 
         except SQLAlchemyError as e:
             logger.error(f"Error obteniendo comunidades del usuario {id_usuario}: {e}")
@@ -187,14 +249,23 @@ class IncorporaComunidadRepository:
                 incorporacion = session.query(IncorporaComunidad).filter(
                     IncorporaComunidad.id_usuario == id_usuario,
                     IncorporaComunidad.id_comunidad == id_comunidad
-                ).first()
+                ).with_for_update().first()
 
                 if not incorporacion:
                     logger.warning(f"Incorporación no encontrada: usuario {id_usuario} en comunidad {id_comunidad}")
                     return False
 
+                delta = (nuevo_estado == 'activo') - (incorporacion.estado == 'activo')
                 incorporacion.estado = nuevo_estado
                 session.flush()
+                self._ajustar_miembros_activos(session, id_comunidad, delta)
+                self.reglas.procesar_membresia(session, id_usuario, delta)
+                if delta:
+                    self.actividad.registrar_union(session, id_comunidad, incorporacion.fecha_union, delta)
+                if delta > 0:
+                    self.ranking.agregar_miembro(session, id_comunidad, id_usuario)
+                elif delta < 0:
+                    self.ranking.quitar_miembro(session, id_comunidad, id_usuario)
                 logger.info(f"Estado actualizado para usuario {id_usuario} en comunidad {id_comunidad}: {nuevo_estado}")
                 return True
 
@@ -209,12 +280,22 @@ class IncorporaComunidadRepository:
 
         try:
             with self.db.get_session() as session:
+                anterior = session.query(IncorporaComunidad.estado, IncorporaComunidad.fecha_union).filter(
+                    IncorporaComunidad.id_usuario == id_usuario,
+                    IncorporaComunidad.id_comunidad == id_comunidad
+                ).with_for_update().first()
+
                 incorporacion_eliminada = session.query(IncorporaComunidad).filter(
                     IncorporaComunidad.id_usuario == id_usuario,
                     IncorporaComunidad.id_comunidad == id_comunidad
                 ).delete()
 
                 if incorporacion_eliminada:
+                    if anterior.estado == 'activo':
+                        self._ajustar_miembros_activos(session, id_comunidad, -1)
+                        self.actividad.registrar_union(session, id_comunidad, anterior.fecha_union, -1)
+                        self.ranking.quitar_miembro(session, id_comunidad, id_usuario)
+                        self.reglas.procesar_membresia(session, id_usuario, -1)
                     logger.info(f"Usuario {id_usuario} eliminado de comunidad {id_comunidad}")
                     return True
 
@@ -250,10 +331,7 @@ class IncorporaComunidadRepository:
         """Obtener incorporaciones en un rango de fechas"""
         try:
             with self.db.get_session() as session:
-                incorporaciones = session.query(IncorporaComunidad).filter(
-                    IncorporaComunidad.fecha_union >= fecha_inicio,
-                    IncorporaComunidad.fecha_union <= fecha_fin
-                ).order_by(IncorporaComunidad.fecha_union.desc()).all()
+                incorporaciones = self._query_incorporaciones_por_fecha(session, fecha_inicio, fecha_fin).all()
 
                 for incorporacion in incorporaciones:
                     session.expunge(incorporacion)
@@ -263,43 +341,74 @@ class IncorporaComunidadRepository:
             logger.error(f"Error obteniendo incorporaciones por fecha: {e}")
             return []
 
+    def iterar_incorporaciones_por_fecha(self, fecha_inicio: date, fecha_fin: date,
+                                         tamano_lote: Optional[int] = None) -> Iterator[IncorporaComunidad]:
+        """Recorrer por lotes las incorporaciones de un rango de fechas"""
+        return self.db.iterar_consulta(
+            lambda session: self._query_incorporaciones_por_fecha(session, fecha_inicio, fecha_fin), tamano_lote
+        )
+
+    def _query_incorporaciones_por_fecha(self, session, fecha_inicio: date, fecha_fin: date):
+        return session.query(IncorporaComunidad).filter(
+            IncorporaComunidad.fecha_union >= fecha_inicio,
+            IncorporaComunidad.fecha_union <= fecha_fin
+        ).order_by(IncorporaComunidad.fecha_union.desc(), IncorporaComunidad.id_usuario,
+                   IncorporaComunidad.id_comunidad)
+
     def obtener_estadisticas_comunidad(self, id_comunidad: int) -> dict:
         """Obtener estadísticas de miembros de una comunidad"""
         if not self._validar_id(id_comunidad):
             return {}
 
+        return self.obtener_estadisticas_comunidades([id_comunidad]).get(id_comunidad, {})
+
+    def obtener_estadisticas_comunidades(self, ids_comunidad: List[int]) -> Dict[int, dict]:
+        """Obtener estadísticas de miembros de varias comunidades con una sola consulta agrupada"""
+        ids_validos = sorted({id_comunidad for id_comunidad in ids_comunidad if self._validar_id(id_comunidad)})
+        if not ids_validos:
+            return {}
+
         try:
             with self.db.get_session() as session:
-                total = session.query(IncorporaComunidad).filter(
-                    IncorporaComunidad.id_comunidad == id_comunidad
-                ).count()
-
-                activos = session.query(IncorporaComunidad).filter(
-                    IncorporaComunidad.id_comunidad == id_comunidad,
-                    IncorporaComunidad.estado == 'activo'
-                ).count()
-
-                pendientes = session.query(IncorporaComunidad).filter(
-                    IncorporaComunidad.id_comunidad == id_comunidad,
-                    IncorporaComunidad.estado == 'pendiente'
-                ).count()
-
-                bloqueados = session.query(IncorporaComunidad).filter(
-                    IncorporaComunidad.id_comunidad == id_comunidad,
-                    IncorporaComunidad.estado == 'bloqueado'
-                ).count()
-
-                return {
-                    'total_miembros': total,
-                    'miembros_activos': activos,
-                    'miembros_pendientes': pendientes,
-                    'miembros_bloqueados': bloqueados
-                }
+                filas = session.query(
+                    IncorporaComunidad.id_comunidad,
+                    IncorporaComunidad.estado,
+                    func.count()
+                ).filter(
+                    IncorporaComunidad.id_comunidad.in_(ids_validos)
+                ).group_by(
+                    IncorporaComunidad.id_comunidad,
+                    IncorporaComunidad.estado
+                ).all()
+
+                estadisticas = {id_comunidad: {
+                    'total_miembros': 0,
+                    'miembros_activos': 0,
+                    'miembros_pendientes': 0,
+                    'miembros_bloqueados': 0
+                } for id_comunidad in ids_validos}
+
+                for id_comunidad, estado, cantidad in filas:
+                    contadores = estadisticas[id_comunidad]
+                    contadores['total_miembros'] += cantidad
+                    clave = self.CLAVES_ESTADISTICAS.get(estado)
+                    if clave:
+                        contadores[clave] += cantidad
+
+                return estadisticas
 
         except SQLAlchemyError as e:
-            logger.error(f"Error obteniendo estadísticas de comunidad {id_comunidad}: {e}")
+            logger.error(f"Error obteniendo estadísticas de comunidades {ids_validos}: {e}")
             return {}
 
+    def _ajustar_miembros_activos(self, session, id_comunidad: int, delta: int) -> None:
+        """Sumar delta al contador de miembros activos dentro de la transacción del cambio"""
+        if delta:
+            session.query(Comunidad).filter(Comunidad.id_comunidad == id_comunidad).update(
+                {Comunidad.miembros_activos: Comunidad.miembros_activos + delta},
+                synchronize_session=False
+            )
+
     # Métodos privados de validación
     def _validar_id(self, id_valor: int) -> bool:
         """Validar que el ID sea válido"""
@@ -1,10 +1,12 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from db.Connection import DatabaseConnection
 from model.Logro import Logro
 from model.Desbloquea import Desbloquea
 from model.Usuario import Usuario
+from repository.RankingComunidadRepository import RankingComunidadRepository
+from repository.NivelRepository import NivelRepository
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,8 +14,13 @@ logger = logging.getLogger(__name__)
 class LogroRepository:
     """Repositorio para la gestión de logros."""
 
+    # Pares (usuario, logro) por sentencia INSERT en los desbloqueos en lote
+    TAMANO_LOTE_DESBLOQUEO = 1000
+
     def __init__(self):
         self.db = DatabaseConnection()
+        self.ranking_comunidad = RankingComunidadRepository()
+        self.nivel_repository = NivelRepository()
 
     def crear_logro(self, logro_data: dict) -> Optional[Logro]:
         """Crear un nuevo logro."""
@@ -31,25 +38,74 @@ class LogroRepository:
 
     def asociar_logro_a_usuario(self, id_usuario: int, id_logro: int) -> bool:
         """Asociar un logro a un usuario (desbloquea)."""
+        if self.desbloquear_logros([(id_usuario, id_logro)]):
+            logger.info(f"Usuario {id_usuario} desbloqueó logro {id_logro}")
+            return True
+
+        logger.warning(f"Usuario {id_usuario} no desbloqueó el logro {id_logro} (ya lo tenía o hubo un error)")
+        return False
+
+    def desbloquear_logros(self, pares: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Desbloquear en lote pares (id_usuario, id_logro). Retorna solo los pares nuevos."""
+        pares = sorted(set(pares))
+        if not pares:
+            return []
+
         try:
             with self.db.get_session() as session:
-                # Verificar que no existe ya la relación
-                existe = session.query(Desbloquea).filter_by(
-                    id_usuario=id_usuario,
-                    id_logro=id_logro
-                ).first()
-
-                if existe:
-                    logger.warning(f"Usuario {id_usuario} ya desbloqueó el logro {id_logro}")
-                    return False
-
-                relacion = Desbloquea(id_usuario=id_usuario, id_logro=id_logro)
-                session.add(relacion)
-                logger.info(f"Usuario {id_usuario} desbloqueó logro {id_logro}")
-                return True
+                nuevos = self.insertar_desbloqueos(session, pares)
+                logger.info(f"Desbloqueos en lote: {len(nuevos)} nuevos de {len(pares)} solicitados")
+                return nuevos
         except SQLAlchemyError as e:
-            logger.error(f"Error asociando logro {id_logro} a usuario {id_usuario}: {e}")
-            return False
+            logger.error(f"Error desbloqueando logros en lote: {e}")
+            return []
+
+    def desbloquear_logro_para_usuarios(self, id_logro: int, ids_usuario: Iterable[int]) -> List[int]:
+        """Otorgar un logro a muchos usuarios (p. ej. al cerrar un desafío). Retorna los usuarios nuevos."""
+        return [id_usuario for id_usuario, _ in self.desbloquear_logros(
+            (id_usuario, id_logro) for id_usuario in ids_usuario
+        )]
+
+    def insertar_desbloqueos(self, session, pares: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Insertar desbloqueos dentro de la transacción del llamador, ignorando los ya existentes.
+
+        Usa INSERT ... ON CONFLICT DO NOTHING RETURNING por lotes, y en la misma
+        transacción suma los puntos al ranking de comunidades y reasigna el nivel
+        de los usuarios afectados.
+        """
+        nuevos: List[Tuple[int, int]] = []
+        upsert = self.db.dialect_insert(Desbloquea)
+
+        if upsert is not None:
+            for inicio in range(0, len(pares), self.TAMANO_LOTE_DESBLOQUEO):
+                lote = pares[inicio:inicio + self.TAMANO_LOTE_DESBLOQUEO]
+                sentencia = upsert.values([
+                    {'id_usuario': id_usuario, 'id_logro': id_logro} for id_usuario, id_logro in lote
+                ]).on_conflict_do_nothing(
+                    index_elements=['id_usuario', 'id_logro']
+                ).returning(Desbloquea.id_usuario, Desbloquea.id_logro)
+                nuevos.extend((id_usuario, id_logro) for id_usuario, id_logro in session.execute(sentencia))
+        else:
+            existentes = set(session.query(Desbloquea.id_usuario, Desbloquea.id_logro).filter(
+                Desbloquea.id_usuario.in_({id_usuario for id_usuario, _ in pares})
+            ).all())
+            nuevos = [par for par in pares if par not in existentes]
+            session.add_all([Desbloquea(id_usuario=id_usuario, id_logro=id_logro) for id_usuario, id_logro in nuevos])
+            session.flush()
+
+        if not nuevos:
+            return []
+
+        puntos_logro = dict(session.query(Logro.id_logro, Logro.puntos).filter(
+            Logro.id_logro.in_({id_logro for _, id_logro in nuevos})
+        ).all())
+        puntos_por_usuario: Dict[int, int] = {}
+        for id_usuario, id_logro in nuevos:
+            puntos_por_usuario[id_usuario] = puntos_por_usuario.get(id_usuario, 0) + (puntos_logro.get(id_logro) or 0)
+
+        self.ranking_comunidad.sumar_puntos(session, puntos_por_usuario)
+        self.nivel_repository.recalcular_niveles_usuarios(session, puntos_por_usuario.keys())
+        return nuevos
 
     def obtener_logros_por_usuario(self, id_usuario: int) -> List[Logro]:
         """Obtener logros desbloqueados por un usuario."""
@@ -65,6 +121,52 @@ class LogroRepository:
             logger.error(f"Error obteniendo logros para usuario {id_usuario}: {e}")
             return []
 
+    def obtener_pagina_logros_usuario(self, id_usuario: int, limite: int = 50,
+                                      desplazamiento: int = 0) -> List[Dict[str, Any]]:
+        """Página del catálogo de logros marcando cuáles desbloqueó el usuario.
+
+        Un solo LEFT JOIN con desbloquea; primero los desbloqueados y luego por puntos.
+        """
+        try:
+            with self.db.get_session() as session:
+                desbloqueado = Desbloquea.id_usuario.is_not(None)
+                resultado = session.query(
+                    Logro.id_logro,
+                    Logro.nombre,
+                    Logro.descripcion,
+                    Logro.puntos,
+                    desbloqueado.label('desbloqueado')
+                ).outerjoin(
+                    Desbloquea, (Desbloquea.id_logro == Logro.id_logro) & (Desbloquea.id_usuario == id_usuario)
+                ).order_by(
+                    desbloqueado.desc(), Logro.puntos.desc(), Logro.id_logro
+                ).limit(limite).offset(desplazamiento).all()
+
+                return [{
+                    'id_logro': id_logro,
+                    'nombre': nombre,
+                    'descripcion': descripcion,
+                    'puntos': puntos or 0,
+                    'desbloqueado': bool(es_desbloqueado)
+                } for id_logro, nombre, descripcion, puntos, es_desbloqueado in resultado]
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo página de logros para usuario {id_usuario}: {e}")
+            return []
+
+    def contar_logros_usuario(self, id_usuario: int) -> Dict[str, int]:
+        """Total de logros del catálogo y cuántos desbloqueó el usuario."""
+        try:
+            with self.db.get_session() as session:
+                total, desbloqueados = session.query(
+                    func.count(Logro.id_logro), func.count(Desbloquea.id_usuario)
+                ).outerjoin(
+                    Desbloquea, (Desbloquea.id_logro == Logro.id_logro) & (Desbloquea.id_usuario == id_usuario)
+                ).one()
+                return {'total': total, 'desbloqueados': desbloqueados}
+        except SQLAlchemyError as e:
+            logger.error(f"Error contando logros para usuario {id_usuario}: {e}")
+            return {'total': 0, 'desbloqueados': 0}
+
     def obtener_ranking_general(self) -> List[Dict[str, Any]]:
         """Obtener ranking general de usuarios por puntos totales."""
         try:
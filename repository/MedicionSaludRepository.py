@@ -0,0 +1,167 @@
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date
+from typing import Any, Dict, Optional
+import logging
+
+from db.Connection import DatabaseConnection
+from model.MedicionSalud import MedicionSalud
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class MedicionSaludRepository:
+    """Historial de peso, altura e IMC por usuario.
+
+    Las mediciones se agregan a la tabla medicion_salud, una fila por
+    (id_usuario, fecha). Registrar otra vez el mismo día corrige los valores
+    informados sin borrar los demás. La serie y sus agregados se devuelven como
+    arrays de NumPy listos para graficar.
+    """
+
+    PERIODOS = ('semana', 'mes')
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def registrar_medicion(self, id_usuario: int, peso: Optional[float] = None, altura: Optional[float] = None,
+                           fecha: Optional[date] = None) -> bool:
+        """Agregar la medición del día (hoy si no se indica fecha)"""
+        if peso is None and altura is None:
+            return False
+        try:
+            with self.db.get_session() as session:
+                self.registrar_en_sesion(session, id_usuario, fecha or date.today(), peso, altura)
+                return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error registrando medición del usuario {id_usuario}: {e}")
+            return False
+
+    def registrar_en_sesion(self, session, id_usuario: int, fecha: date,
+                            peso: Optional[float], altura: Optional[float]) -> None:
+        """Upsert de la medición en la transacción de quien llama (p. ej. al guardar el perfil)"""
+        upsert = self.db.dialect_insert(MedicionSalud)
+        if upsert is not None:
+            upsert = upsert.values(id_usuario=id_usuario, fecha=fecha, peso=peso, altura=altura)
+            tabla = MedicionSalud.__table__
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=['id_usuario', 'fecha'],
+                set_={
+                    'peso': func.coalesce(upsert.excluded.peso, tabla.c.peso),
+                    'altura': func.coalesce(upsert.excluded.altura, tabla.c.altura)
+                }
+            ))
+            return
+
+        medicion = session.get(MedicionSalud, (id_usuario, fecha))
+        if medicion is None:
+            session.add(MedicionSalud(id_usuario=id_usuario, fecha=fecha, peso=peso, altura=altura))
+        else:
+            medicion.peso = peso if peso is not None else medicion.peso
+            medicion.altura = altura if altura is not None else medicion.altura
+
+    def obtener_serie(self, id_usuario: int, fecha_inicio: Optional[date] = None,
+                      fecha_fin: Optional[date] = None) -> Dict[str, Any]:
+        """Serie ordenada por fecha con el IMC de cada medición.
+
+        'fechas' es datetime64[D]; 'peso', 'altura' e 'imc' son float64 con NaN
+        donde falta el dato. La altura se arrastra desde la última medición que
+        la tenía, incluso si es anterior a fecha_inicio.
+        """
+        import numpy as np
+
+        try:
+            with self.db.get_session() as session:
+                query = session.query(
+                    MedicionSalud.fecha, MedicionSalud.peso, MedicionSalud.altura
+                ).filter(MedicionSalud.id_usuario == id_usuario)
+                if fecha_fin is not None:
+                    query = query.filter(MedicionSalud.fecha <= fecha_fin)
+                if fecha_inicio is not None:
+                    query = query.filter(MedicionSalud.fecha >= fecha_inicio)
+                filas = query.order_by(MedicionSalud.fecha).all()
+
+                altura_previa = None
+                if fecha_inicio is not None:
+                    altura_previa = session.query(MedicionSalud.altura).filter(
+                        MedicionSalud.id_usuario == id_usuario,
+                        MedicionSalud.fecha < fecha_inicio,
+                        MedicionSalud.altura.isnot(None)
+                    ).order_by(MedicionSalud.fecha.desc()).limit(1).scalar()
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo mediciones del usuario {id_usuario}: {e}")
+            return {}
+
+        fechas = np.array([fila.fecha for fila in filas], dtype='datetime64[D]')
+        peso = np.array([fila.peso for fila in filas], dtype=np.float64)
+        altura = np.array([fila.altura for fila in filas], dtype=np.float64)
+        if altura_previa is not None and len(altura) and np.isnan(altura[0]):
+            altura[0] = altura_previa
+
+        altura = self._arrastrar(altura)
+        return {'fechas': fechas, 'peso': peso, 'altura': altura, 'imc': self.calcular_imc(peso, altura)}
+
+    def obtener_agregados(self, id_usuario: int, periodo: str = 'semana', fecha_inicio: Optional[date] = None,
+                          fecha_fin: Optional[date] = None) -> Dict[str, Any]:
+        """Promedios de peso e IMC por semana (desde el lunes) o por mes, para gráficos de rangos largos.
+
+        'periodos' es la fecha de inicio de cada período con datos; 'mediciones'
+        cuenta las filas de cada uno. Los promedios ignoran los NaN.
+        """
+        if periodo not in self.PERIODOS:
+            raise ValueError(f"Periodo '{periodo}' no válido. Periodos válidos: {self.PERIODOS}")
+
+        import numpy as np
+
+        serie = self.obtener_serie(id_usuario, fecha_inicio, fecha_fin)
+        if not serie:
+            return {}
+
+        fechas = serie['fechas']
+        if periodo == 'semana':
+            # datetime64[W] corta en jueves (1970-01-01); desplazar 3 días alinea al lunes
+            inicios = (fechas + np.timedelta64(3, 'D')).astype('datetime64[W]').astype('datetime64[D]') \
+                - np.timedelta64(3, 'D')
+        else:
+            inicios = fechas.astype('datetime64[M]').astype('datetime64[D]')
+
+        periodos, grupos = np.unique(inicios, return_inverse=True)
+        return {
+            'periodos': periodos,
+            'peso_promedio': self._promedio_por_grupo(serie['peso'], grupos, len(periodos)),
+            'imc_promedio': self._promedio_por_grupo(serie['imc'], grupos, len(periodos)),
+            'mediciones': np.bincount(grupos, minlength=len(periodos))
+        }
+
+    @staticmethod
+    def calcular_imc(peso, altura):
+        """IMC vectorizado (peso / altura²); acepta altura en metros o en centímetros como el perfil"""
+        import numpy as np
+
+        peso = np.asarray(peso, dtype=np.float64)
+        altura = np.asarray(altura, dtype=np.float64)
+        altura_m = np.where(altura > 10, altura / 100, altura)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            imc = peso / altura_m ** 2
+        return np.where(altura_m > 0, np.round(imc, 2), np.nan)
+
+    @staticmethod
+    def _arrastrar(valores):
+        """Rellenar cada NaN con el último valor conocido anterior (los iniciales quedan en NaN)"""
+        import numpy as np
+
+        indices = np.where(np.isnan(valores), 0, np.arange(len(valores)))
+        np.maximum.accumulate(indices, out=indices)
+        return valores[indices]
+
+    @staticmethod
+    def _promedio_por_grupo(valores, grupos, cantidad):
+        import numpy as np
+
+        validos = ~np.isnan(valores)
+        sumas = np.bincount(grupos[validos], weights=valores[validos], minlength=cantidad)
+        cuentas = np.bincount(grupos[validos], minlength=cantidad)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(cuentas > 0, sumas / np.maximum(cuentas, 1), np.nan)
@@ -1,17 +1,24 @@
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import func, select, update, exists, and_, or_, literal
+from typing import List, Optional, Dict, Any, Iterable
 from db.Connection import DatabaseConnection
 from model.Nivel import Nivel
 from model.AsignacionNivel import AsignacionNivel
 from model.Usuario import Usuario
+from model.Desbloquea import Desbloquea
+from model.Logro import Logro
+import argparse
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class NivelRepository:
     """Repositorio para la gestión de niveles y asignaciones de nivel."""
 
+    # Usuarios procesados por transacción en el recálculo completo de niveles
+    TAMANO_LOTE_NIVELES = 5000
+
     def __init__(self):
         self.db = DatabaseConnection()
 
@@ -132,6 +139,131 @@ class NivelRepository:
             logger.error(f"Error actualizando nivel de usuario {id_usuario} con {puntos_totales} puntos: {e}")
             return False
 
+    def recalcular_niveles_usuarios(self, session, ids_usuario: Iterable[int]) -> None:
+        """Reasignar el nivel de varios usuarios según sus puntos, dentro de la transacción del llamador.
+
+        Los usuarios sin nivel alcanzable conservan su asignación.
+        """
+        ids_usuario = sorted(set(ids_usuario))
+        if not ids_usuario:
+            return
+
+        alcanzados = self._niveles_alcanzados(Usuario.id_usuario.in_(ids_usuario))
+        asignaciones = select(alcanzados.c.id_usuario, alcanzados.c.id_nivel)
+
+        upsert = self.db.dialect_insert(AsignacionNivel)
+        if upsert is not None:
+            # SQLite no distingue ON CONFLICT de un JOIN ... ON en INSERT ... SELECT sin WHERE
+            sentencia = upsert.from_select(['id_usuario', 'id_nivel'], asignaciones.where(literal(True)))
+            session.execute(sentencia.on_conflict_do_update(
+                index_elements=['id_usuario'], set_={'id_nivel': sentencia.excluded.id_nivel}
+            ))
+            return
+
+        for id_usuario, id_nivel in session.execute(asignaciones).all():
+            session.merge(AsignacionNivel(id_usuario=id_usuario, id_nivel=id_nivel))
+        session.flush()
+
+    def recalcular_todos_niveles(self, tamano_lote: Optional[int] = None) -> Dict[str, Any]:
+        """Reasignar el nivel de todos los usuarios, p. ej. tras cambiar los umbrales de nivel.
+
+        Recorre los usuarios por rangos de id (una transacción por lote). En cada
+        lote un UPDATE ... FROM corrige las asignaciones desactualizadas y un
+        INSERT ... SELECT crea las que faltan. Retorna conteos y tiempos.
+        """
+        tamano_lote = tamano_lote or self.TAMANO_LOTE_NIVELES
+        reporte = {'usuarios': 0, 'lotes': 0, 'actualizados': 0, 'insertados': 0, 'segundos': 0.0}
+        inicio = time.perf_counter()
+        ultimo_id = None
+
+        try:
+            while True:
+                inicio_lote = time.perf_counter()
+                with self.db.get_session() as session:
+                    query = session.query(Usuario.id_usuario).order_by(Usuario.id_usuario)
+                    if ultimo_id is not None:
+                        query = query.filter(Usuario.id_usuario > ultimo_id)
+                    ids = [id_usuario for id_usuario, in query.limit(tamano_lote)]
+                    if not ids:
+                        break
+
+                    condicion = Usuario.id_usuario.between(ids[0], ids[-1])
+                    actualizados, insertados = self._reasignar_niveles(session, condicion)
+                    ultimo_id = ids[-1]
+
+                reporte['usuarios'] += len(ids)
+                reporte['lotes'] += 1
+                reporte['actualizados'] += actualizados
+                reporte['insertados'] += insertados
+                logger.info(
+                    f"Niveles lote {reporte['lotes']} (usuarios {ids[0]}-{ids[-1]}): "
+                    f"{actualizados} actualizados, {insertados} insertados "
+                    f"en {time.perf_counter() - inicio_lote:.3f}s"
+                )
+
+                if len(ids) < tamano_lote:
+                    break
+        except SQLAlchemyError as e:
+            logger.error(f"Error recalculando niveles (último usuario procesado: {ultimo_id}): {e}")
+            raise
+
+        reporte['segundos'] = time.perf_counter() - inicio
+        logger.info(f"Recálculo de niveles terminado: {reporte}")
+        return reporte
+
+    def _reasignar_niveles(self, session, condicion) -> tuple:
+        """(actualizados, insertados) al alinear asignacion_nivel con los puntos de los usuarios de condicion"""
+        alcanzados = self._niveles_alcanzados(condicion)
+
+        actualizados = session.execute(
+            update(AsignacionNivel).where(
+                AsignacionNivel.id_usuario == alcanzados.c.id_usuario,
+                AsignacionNivel.id_nivel.is_distinct_from(alcanzados.c.id_nivel)
+            ).values(id_nivel=alcanzados.c.id_nivel),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+
+        insertados = session.execute(
+            AsignacionNivel.__table__.insert().from_select(
+                ['id_usuario', 'id_nivel'],
+                select(alcanzados.c.id_usuario, alcanzados.c.id_nivel).where(
+                    ~exists().where(AsignacionNivel.id_usuario == alcanzados.c.id_usuario)
+                )
+            )
+        ).rowcount
+
+        return actualizados, insertados
+
+    def _niveles_alcanzados(self, condicion):
+        """Subconsulta (id_usuario, id_nivel) con el nivel que corresponde a los puntos de cada usuario.
+
+        Los umbrales se convierten en rangos [puntos_requeridos, siguiente umbral)
+        y se cruzan con los puntos totales por usuario en un solo join por rango.
+        """
+        totales = select(
+            Usuario.id_usuario.label('id_usuario'),
+            func.coalesce(func.sum(Logro.puntos), 0).label('puntos')
+        ).select_from(Usuario).outerjoin(
+            Desbloquea, Desbloquea.id_usuario == Usuario.id_usuario
+        ).outerjoin(
+            Logro, Logro.id_logro == Desbloquea.id_logro
+        ).where(condicion).group_by(Usuario.id_usuario).subquery('totales')
+
+        rangos = select(
+            Nivel.id_nivel.label('id_nivel'),
+            Nivel.puntos_requeridos.label('desde'),
+            func.lead(Nivel.puntos_requeridos).over(
+                order_by=(Nivel.puntos_requeridos, Nivel.id_nivel)
+            ).label('hasta')
+        ).where(Nivel.puntos_requeridos.is_not(None)).subquery('rangos')
+
+        return select(totales.c.id_usuario, rangos.c.id_nivel).join(
+            rangos, and_(
+                totales.c.puntos >= rangos.c.desde,
+                or_(rangos.c.hasta.is_(None), totales.c.puntos < rangos.c.hasta)
+            )
+        ).subquery('alcanzados')
+
     def obtener_usuarios_por_nivel(self, id_nivel: int) -> List[Dict[str, Any]]:
         """Obtener todos los usuarios que tienen un nivel específico."""
         try:
@@ -180,3 +312,14 @@ class NivelRepository:
         except SQLAlchemyError as e:
             logger.error(f"Error eliminando asignación de nivel para usuario {id_usuario}: {e}")
             return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Recalcular el nivel de todos los usuarios según sus puntos")
+    parser.add_argument('--lote', type=int, default=NivelRepository.TAMANO_LOTE_NIVELES,
+                        help="Usuarios por transacción")
+    args = parser.parse_args()
+
+    reporte = NivelRepository().recalcular_todos_niveles(args.lote)
+    print(f"{reporte['usuarios']} usuarios en {reporte['lotes']} lotes: {reporte['actualizados']} niveles "
+          f"actualizados, {reporte['insertados']} asignados, en {reporte['segundos']:.2f}s")
@@ -2,7 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from db.Connection import DatabaseConnection
 from model.PerfilUsuario import PerfilUsuario  # Asume que tienes este modelo
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 
 class PerfilUsuarioRepository:
@@ -52,6 +52,12 @@ class PerfilUsuarioRepository:
             print(f"Error obteniendo perfiles: {e}")
             return []
 
+    def iterar_perfiles(self, tamano_lote: Optional[int] = None) -> Iterator[PerfilUsuario]:
+        """Recorrer todos los perfiles por lotes, sin cargar la tabla completa en memoria"""
+        return self.db.iterar_consulta(
+            lambda session: session.query(PerfilUsuario).order_by(PerfilUsuario.id_usuario), tamano_lote
+        )
+
     def actualizar_perfil(self, id_usuario: int, perfil_data: dict) -> Optional[PerfilUsuario]:
         """Actualizar perfil de usuario"""
         try:
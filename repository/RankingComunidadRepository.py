@@ -0,0 +1,119 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, select, insert, delete, literal
+from typing import Dict, Any, Iterable, List, Optional
+import logging
+
+from db.Connection import DatabaseConnection
+from model.RankingComunidad import RankingComunidad
+from model.IncorporaComunidad import IncorporaComunidad
+from model.Desbloquea import Desbloquea
+from model.Logro import Logro
+from model.Usuario import Usuario
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class RankingComunidadRepository:
+    """Ranking de logros por comunidad, materializado en ranking_comunidad.
+
+    Las altas y bajas de miembros activos agregan o quitan su fila y cada logro
+    desbloqueado suma sus puntos a las filas del usuario, en la misma transacción
+    que el cambio; leer un ranking no recalcula nada.
+    """
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+
+    def agregar_miembro(self, session, id_comunidad: int, id_usuario: int) -> None:
+        """Incorporar al ranking un nuevo miembro activo con sus puntos actuales"""
+        session.execute(delete(RankingComunidad).where(
+            RankingComunidad.id_comunidad == id_comunidad,
+            RankingComunidad.id_usuario == id_usuario
+        ))
+        session.execute(insert(RankingComunidad).from_select(
+            ['id_comunidad', 'id_usuario', 'puntos'],
+            select(literal(id_comunidad), literal(id_usuario), self._puntos_de_usuario(id_usuario))
+        ))
+
+    def quitar_miembro(self, session, id_comunidad: int, id_usuario: int) -> None:
+        """Quitar del ranking a quien deja de ser miembro activo"""
+        session.execute(delete(RankingComunidad).where(
+            RankingComunidad.id_comunidad == id_comunidad,
+            RankingComunidad.id_usuario == id_usuario
+        ))
+
+    def sumar_puntos(self, session, puntos_por_usuario: Dict[int, int]) -> None:
+        """Sumar puntos recién desbloqueados a las filas de cada usuario en todas sus comunidades"""
+        for id_usuario, puntos in puntos_por_usuario.items():
+            if puntos:
+                session.query(RankingComunidad).filter(RankingComunidad.id_usuario == id_usuario).update(
+                    {RankingComunidad.puntos: RankingComunidad.puntos + puntos},
+                    synchronize_session=False
+                )
+
+    def obtener_ranking_comunidad(self, id_comunidad: int, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Obtener el ranking de miembros activos de una comunidad por puntos de logros"""
+        try:
+            with self.db.get_session() as session:
+                query = session.query(
+                    RankingComunidad.id_usuario,
+                    Usuario.nombre_usuario,
+                    RankingComunidad.puntos
+                ).join(
+                    Usuario, Usuario.id_usuario == RankingComunidad.id_usuario
+                ).filter(
+                    RankingComunidad.id_comunidad == id_comunidad
+                ).order_by(
+                    RankingComunidad.puntos.desc(), Usuario.nombre_usuario
+                )
+
+                if limite:
+                    query = query.limit(limite)
+
+                return [{
+                    'posicion': posicion,
+                    'id_usuario': id_usuario,
+                    'nombre_usuario': nombre_usuario,
+                    'puntos_totales': int(puntos)
+                } for posicion, (id_usuario, nombre_usuario, puntos) in enumerate(query.all(), start=1)]
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo ranking de comunidad {id_comunidad}: {e}")
+            return []
+
+    def reconstruir(self, ids_comunidad: Optional[Iterable[int]] = None) -> None:
+        """Recalcular el ranking con un solo join de miembros activos contra sus logros"""
+        condiciones = [IncorporaComunidad.estado == 'activo']
+        borrado = delete(RankingComunidad)
+        if ids_comunidad is not None:
+            ids_comunidad = list(ids_comunidad)
+            condiciones.append(IncorporaComunidad.id_comunidad.in_(ids_comunidad))
+            borrado = borrado.where(RankingComunidad.id_comunidad.in_(ids_comunidad))
+
+        agregado = select(
+            IncorporaComunidad.id_comunidad,
+            IncorporaComunidad.id_usuario,
+            func.coalesce(func.sum(Logro.puntos), 0)
+        ).select_from(IncorporaComunidad).outerjoin(
+            Desbloquea, Desbloquea.id_usuario == IncorporaComunidad.id_usuario
+        ).outerjoin(
+            Logro, Logro.id_logro == Desbloquea.id_logro
+        ).where(*condiciones).group_by(IncorporaComunidad.id_comunidad, IncorporaComunidad.id_usuario)
+
+        try:
+            with self.db.get_session() as session:
+                session.execute(borrado)
+                session.execute(insert(RankingComunidad).from_select(
+                    ['id_comunidad', 'id_usuario', 'puntos'], agregado
+                ))
+                logger.info("Ranking de comunidades reconstruido")
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error reconstruyendo ranking de comunidades: {e}")
+            raise
+
+    def _puntos_de_usuario(self, id_usuario: int):
+        return select(func.coalesce(func.sum(Logro.puntos), 0)).select_from(Desbloquea).join(
+            Logro, Logro.id_logro == Desbloquea.id_logro
+        ).where(Desbloquea.id_usuario == id_usuario).scalar_subquery()
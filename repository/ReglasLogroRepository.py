@@ -0,0 +1,240 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import and_, or_, func, exists
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from db.Connection import DatabaseConnection
+from model.ContadorLogrosUsuario import ContadorLogrosUsuario
+from model.Desbloquea import Desbloquea
+from model.IncorporaComunidad import IncorporaComunidad
+from model.Logro import Logro
+from model.ResumenDiarioUsuario import ResumenDiarioUsuario
+from repository.LogroRepository import LogroRepository
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class ReglasLogroRepository:
+    """Motor de logros automáticos evaluado por eventos.
+
+    Cada escritura de seguimientos o de membresías actualiza los contadores del
+    usuario (contador_logros_usuario) y solo evalúa los tipos de regla cuyo
+    contador cambió, sin recorrer el historial. Un logro es automático cuando
+    tiene tipo_regla y umbral:
+
+    - 'completados': total de hábitos completados
+    - 'racha': mayor cantidad de días consecutivos con al menos un hábito completado
+    - 'comunidades': comunidades en las que el usuario es miembro activo
+    """
+
+    TIPOS_REGLA = ('completados', 'racha', 'comunidades')
+
+    # Filas del resumen diario leídas por consulta al recorrer una racha
+    PAGINA_RACHA = 64
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+        self.logros = LogroRepository()
+
+    def procesar_completados(self, session, antes: Dict[Tuple[int, date], int],
+                             despues: Dict[Tuple[int, date], int]) -> None:
+        """Aplicar el cambio de completados por (id_usuario, fecha) y evaluar las reglas afectadas.
+
+        Debe llamarse con el resumen diario ya actualizado en la sesión.
+        """
+        cambios_por_usuario: Dict[int, List[Tuple[date, int, int]]] = {}
+        for clave in antes.keys() | despues.keys():
+            previo, nuevo = antes.get(clave, 0), despues.get(clave, 0)
+            if previo != nuevo:
+                id_usuario, fecha = clave
+                cambios_por_usuario.setdefault(id_usuario, []).append((fecha, previo, nuevo))
+
+        tipos_por_usuario: Dict[int, Set[str]] = {}
+        for id_usuario, cambios in cambios_por_usuario.items():
+            contador = self._obtener_contador(session, id_usuario)
+            contador.completados_total += sum(nuevo - previo for _, previo, nuevo in cambios)
+            tipos_por_usuario[id_usuario] = {'completados'}
+
+            activados = sorted(fecha for fecha, previo, nuevo in cambios if previo == 0 and nuevo > 0)
+            desactivados = [fecha for fecha, previo, nuevo in cambios if previo > 0 and nuevo == 0]
+            if activados or desactivados:
+                self._actualizar_racha(session, contador, activados, desactivados)
+                tipos_por_usuario[id_usuario].add('racha')
+
+        self._evaluar(session, tipos_por_usuario)
+
+    def procesar_membresia(self, session, id_usuario: int, delta: int) -> None:
+        """Aplicar un alta (+1) o baja (-1) de membresía activa y evaluar las reglas de comunidades"""
+        if not delta:
+            return
+        contador = self._obtener_contador(session, id_usuario)
+        contador.comunidades_activas = max(contador.comunidades_activas + delta, 0)
+        self._evaluar(session, {id_usuario: {'comunidades'}})
+
+    def reconstruir_contadores(self, ids_usuario: Iterable[int]) -> None:
+        """Recalcular desde cero los contadores de los usuarios indicados y desbloquear lo que corresponda"""
+        ids_usuario = sorted(set(ids_usuario))
+        if not ids_usuario:
+            return
+
+        try:
+            with self.db.get_session() as session:
+                completados = dict(session.query(
+                    ResumenDiarioUsuario.id_usuario, func.sum(ResumenDiarioUsuario.completados)
+                ).filter(
+                    ResumenDiarioUsuario.id_usuario.in_(ids_usuario)
+                ).group_by(ResumenDiarioUsuario.id_usuario).all())
+
+                comunidades = dict(session.query(
+                    IncorporaComunidad.id_usuario, func.count()
+                ).filter(
+                    IncorporaComunidad.id_usuario.in_(ids_usuario),
+                    IncorporaComunidad.estado == 'activo'
+                ).group_by(IncorporaComunidad.id_usuario).all())
+
+                dias_activos: Dict[int, List[date]] = {}
+                for id_usuario, fecha in session.query(
+                    ResumenDiarioUsuario.id_usuario, ResumenDiarioUsuario.fecha
+                ).filter(
+                    ResumenDiarioUsuario.id_usuario.in_(ids_usuario),
+                    ResumenDiarioUsuario.completados > 0
+                ).order_by(ResumenDiarioUsuario.id_usuario, ResumenDiarioUsuario.fecha):
+                    dias_activos.setdefault(id_usuario, []).append(fecha)
+
+                for id_usuario in ids_usuario:
+                    contador = self._obtener_contador(session, id_usuario)
+                    contador.completados_total = int(completados.get(id_usuario) or 0)
+                    contador.comunidades_activas = int(comunidades.get(id_usuario) or 0)
+                    contador.racha_actual, contador.racha_maxima, contador.ultima_fecha_activa = \
+                        self._calcular_rachas(dias_activos.get(id_usuario, []))
+
+                self._evaluar(session, {id_usuario: set(self.TIPOS_REGLA) for id_usuario in ids_usuario})
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error reconstruyendo contadores de logros: {e}")
+            raise
+
+    def _obtener_contador(self, session, id_usuario: int) -> ContadorLogrosUsuario:
+        contador = session.get(ContadorLogrosUsuario, id_usuario, with_for_update=True)
+        if contador is None:
+            contador = ContadorLogrosUsuario(
+                id_usuario=id_usuario, completados_total=0, racha_actual=0, racha_maxima=0, comunidades_activas=0
+            )
+            session.add(contador)
+        return contador
+
+    def _actualizar_racha(self, session, contador: ContadorLogrosUsuario,
+                          activados: List[date], desactivados: List[date]) -> None:
+        """Mantener la racha actual y la máxima.
+
+        Marcar un día posterior al último activo es O(1); cualquier otro cambio
+        recorre solo las rachas tocadas en el resumen diario. Desmarcar un día
+        puede acortar la racha máxima: si el día pertenecía a una racha tan larga
+        como la máxima, esta se recalcula desde el resumen.
+        """
+        ultima = contador.ultima_fecha_activa
+        if not desactivados and len(activados) == 1 and (ultima is None or activados[0] > ultima):
+            fecha = activados[0]
+            contigua = ultima is not None and fecha == ultima + timedelta(days=1)
+            contador.racha_actual = contador.racha_actual + 1 if contigua else 1
+            contador.ultima_fecha_activa = fecha
+        else:
+            id_usuario = contador.id_usuario
+            ultima = session.query(func.max(ResumenDiarioUsuario.fecha)).filter(
+                ResumenDiarioUsuario.id_usuario == id_usuario,
+                ResumenDiarioUsuario.completados > 0
+            ).scalar()
+            contador.ultima_fecha_activa = ultima
+            contador.racha_actual = 0 if ultima is None else 1 + self._dias_consecutivos(session, id_usuario, ultima, -1)
+
+            if desactivados and (len(desactivados) > 1 or self._largo_racha(session, id_usuario, desactivados[0])
+                                 >= contador.racha_maxima):
+                _, contador.racha_maxima, _ = self._calcular_rachas(self._dias_activos(session, id_usuario))
+
+            # Un día marcado en el pasado puede unir dos rachas
+            for fecha in activados:
+                if fecha != ultima:
+                    contador.racha_maxima = max(contador.racha_maxima, self._largo_racha(session, id_usuario, fecha))
+
+        contador.racha_maxima = max(contador.racha_maxima, contador.racha_actual)
+
+    def _largo_racha(self, session, id_usuario: int, fecha: date) -> int:
+        """Largo de la racha que forma fecha con sus días activos vecinos, contándola como activa"""
+        return (1 + self._dias_consecutivos(session, id_usuario, fecha, -1)
+                + self._dias_consecutivos(session, id_usuario, fecha, 1))
+
+    def _dias_activos(self, session, id_usuario: int) -> List[date]:
+        return [fecha for fecha, in session.query(ResumenDiarioUsuario.fecha).filter(
+            ResumenDiarioUsuario.id_usuario == id_usuario,
+            ResumenDiarioUsuario.completados > 0
+        ).order_by(ResumenDiarioUsuario.fecha)]
+
+    def _dias_consecutivos(self, session, id_usuario: int, fecha: date, sentido: int) -> int:
+        """Días activos seguidos a partir de fecha (sin incluirla) hacia atrás (-1) o adelante (1)"""
+        cuenta = 0
+        esperado = fecha + timedelta(days=sentido)
+        cursor = fecha
+        while True:
+            query = session.query(ResumenDiarioUsuario.fecha).filter(
+                ResumenDiarioUsuario.id_usuario == id_usuario,
+                ResumenDiarioUsuario.completados > 0
+            )
+            if sentido < 0:
+                query = query.filter(ResumenDiarioUsuario.fecha < cursor).order_by(ResumenDiarioUsuario.fecha.desc())
+            else:
+                query = query.filter(ResumenDiarioUsuario.fecha > cursor).order_by(ResumenDiarioUsuario.fecha)
+
+            fechas = [fila for fila, in query.limit(self.PAGINA_RACHA)]
+            for dia in fechas:
+                if dia != esperado:
+                    return cuenta
+                cuenta += 1
+                esperado += timedelta(days=sentido)
+
+            if len(fechas) < self.PAGINA_RACHA:
+                return cuenta
+            cursor = fechas[-1]
+
+    def _calcular_rachas(self, dias: List[date]) -> Tuple[int, int, Optional[date]]:
+        """(racha_actual, racha_maxima, ultima_fecha_activa) de una lista ordenada de días activos"""
+        racha = maxima = 0
+        anterior = None
+        for dia in dias:
+            racha = racha + 1 if anterior is not None and dia == anterior + timedelta(days=1) else 1
+            maxima = max(maxima, racha)
+            anterior = dia
+        return racha, maxima, anterior
+
+    def _evaluar(self, session, tipos_por_usuario: Dict[int, Set[str]]) -> None:
+        """Desbloquear en un solo lote los logros automáticos alcanzados por los contadores"""
+        tipos_por_usuario = {id_usuario: tipos for id_usuario, tipos in tipos_por_usuario.items() if tipos}
+        if not tipos_por_usuario:
+            return
+
+        session.flush()
+        alcanzados: List[Tuple[int, int]] = []
+        for id_usuario, tipos in tipos_por_usuario.items():
+            contador = session.get(ContadorLogrosUsuario, id_usuario)
+            valores = {
+                'completados': contador.completados_total,
+                'racha': contador.racha_maxima,
+                'comunidades': contador.comunidades_activas
+            }
+            condicion = or_(*[
+                and_(Logro.tipo_regla == tipo, Logro.umbral <= valores[tipo]) for tipo in tipos if tipo in valores
+            ])
+
+            ids_logro = session.query(Logro.id_logro).filter(
+                condicion,
+                ~exists().where(Desbloquea.id_usuario == id_usuario, Desbloquea.id_logro == Logro.id_logro)
+            ).all()
+            alcanzados.extend((id_usuario, id_logro) for id_logro, in ids_logro)
+
+        if not alcanzados:
+            return
+
+        # Puntos en rankings y niveles se actualizan en esta misma transacción
+        nuevos = self.logros.insertar_desbloqueos(session, alcanzados)
+        logger.info(f"Logros automáticos desbloqueados: {nuevos}")
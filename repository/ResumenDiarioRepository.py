@@ -0,0 +1,226 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import and_, or_, func, case, select, insert, delete, text
+from datetime import date
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+import argparse
+import logging
+import time
+
+from db.Connection import DatabaseConnection
+from model.Habito import Habito
+from model.ResumenDiarioUsuario import ResumenDiarioUsuario
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.ActividadComunidadRepository import ActividadComunidadRepository
+from repository.ReglasLogroRepository import ReglasLogroRepository
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+
+class ResumenDiarioRepository:
+    """Repositorio del resumen diario por usuario, mantenido en cada escritura de SeguimientoDiario"""
+
+    COLUMNAS = ['id_usuario', 'fecha', 'total_seguimientos', 'completados', 'habitos_distintos']
+
+    # Primera clave de pg_advisory_xact_lock(clave, id_usuario) al recalcular el resumen de un usuario
+    CLAVE_BLOQUEO_RESUMEN = 2901
+
+    def __init__(self):
+        self.db = DatabaseConnection()
+        self.actividad = ActividadComunidadRepository()
+        self.reglas = ReglasLogroRepository()
+
+    def claves_afectadas(self, session, *condiciones) -> Set[Tuple[int, date]]:
+        """Obtener los pares (id_usuario, fecha) de los seguimientos que cumplen las condiciones.
+
+        Se usa antes de un borrado masivo para saber qué días recalcular después.
+        """
+        filas = session.query(SeguimientoDiario.id_usuario, SeguimientoDiario.fecha).filter(
+            *condiciones
+        ).distinct().all()
+        return {(id_usuario, fecha) for id_usuario, fecha in filas}
+
+    def recalcular_dias(self, session, claves: Iterable[Tuple[int, date]]) -> None:
+        """Recalcular el resumen de los días indicados dentro de la transacción del llamador.
+
+        Cada día se recalcula desde sus propios seguimientos (un puñado de filas),
+        así el resumen queda exacto sin importar qué tipo de escritura lo cambió.
+        Dos transacciones que recalculan días del mismo usuario (la aplicación y
+        la sincronización) se serializan con un bloqueo por usuario tomado antes
+        de leer el resumen: la segunda espera al commit de la primera y agrega los
+        seguimientos ya confirmados, así su upsert y sus diferencias no parten de
+        una lectura vieja. Los días que quedaron sin seguimientos se borran.
+        La diferencia de completados se propaga a la actividad de las comunidades del usuario
+        y a las reglas de logros automáticos.
+        """
+        fechas_por_usuario: Dict[int, Set[date]] = {}
+        for id_usuario, fecha in claves:
+            fechas_por_usuario.setdefault(int(id_usuario), set()).add(fecha)
+        if not fechas_por_usuario:
+            return
+
+        # Las escrituras ORM pendientes deben verse en el recálculo (autoflush está desactivado)
+        session.flush()
+        self._bloquear_usuarios(session, fechas_por_usuario)
+
+        condicion_resumen = or_(*[
+            and_(ResumenDiarioUsuario.id_usuario == id_usuario, ResumenDiarioUsuario.fecha.in_(fechas))
+            for id_usuario, fechas in fechas_por_usuario.items()
+        ])
+        completados_antes = self._completados_por_dia(session, condicion_resumen)
+
+        condicion_seguimientos = or_(*[
+            and_(SeguimientoDiario.id_usuario == id_usuario, SeguimientoDiario.fecha.in_(fechas))
+            for id_usuario, fechas in fechas_por_usuario.items()
+        ])
+        upsert = self.db.dialect_insert(ResumenDiarioUsuario)
+        if upsert is not None:
+            upsert = upsert.from_select(self.COLUMNAS, self._agregado(condicion_seguimientos))
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=['id_usuario', 'fecha'],
+                set_={columna: upsert.excluded[columna] for columna in self.COLUMNAS[2:]}
+            ))
+            session.execute(delete(ResumenDiarioUsuario).where(
+                condicion_resumen,
+                ~select(SeguimientoDiario.id_usuario).where(
+                    SeguimientoDiario.id_usuario == ResumenDiarioUsuario.id_usuario,
+                    SeguimientoDiario.fecha == ResumenDiarioUsuario.fecha
+                ).exists()
+            ))
+        else:
+            session.execute(delete(ResumenDiarioUsuario).where(condicion_resumen))
+            session.execute(self._insertar_desde_seguimientos(condicion_seguimientos))
+
+        completados_despues = self._completados_por_dia(session, condicion_resumen)
+        self.actividad.registrar_completados(session, {
+            clave: completados_despues.get(clave, 0) - completados_antes.get(clave, 0)
+            for clave in completados_antes.keys() | completados_despues.keys()
+        })
+        self.reglas.procesar_completados(session, completados_antes, completados_despues)
+
+    def reconstruir(self, id_usuario: Optional[int] = None, fecha_inicio: Optional[date] = None,
+                    fecha_fin: Optional[date] = None) -> int:
+        """Reconstruir el resumen desde los seguimientos históricos. Retorna los días generados."""
+        condiciones_resumen = []
+        condiciones_seguimiento = []
+        if id_usuario is not None:
+            condiciones_resumen.append(ResumenDiarioUsuario.id_usuario == id_usuario)
+            condiciones_seguimiento.append(SeguimientoDiario.id_usuario == id_usuario)
+        if fecha_inicio is not None:
+            condiciones_resumen.append(ResumenDiarioUsuario.fecha >= fecha_inicio)
+            condiciones_seguimiento.append(SeguimientoDiario.fecha >= fecha_inicio)
+        if fecha_fin is not None:
+            condiciones_resumen.append(ResumenDiarioUsuario.fecha <= fecha_fin)
+            condiciones_seguimiento.append(SeguimientoDiario.fecha <= fecha_fin)
+
+        try:
+            with self.db.get_session() as session:
+                session.execute(delete(ResumenDiarioUsuario).where(and_(True, *condiciones_resumen)))
+                resultado = session.execute(
+                    self._insertar_desde_seguimientos(and_(True, *condiciones_seguimiento))
+                )
+                logger.info(f"Resumen diario reconstruido: {resultado.rowcount} días")
+                return resultado.rowcount
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error reconstruyendo resumen diario: {e}")
+            return 0
+
+    def obtener_totales(self, id_usuario: int, fecha_inicio: date, fecha_fin: date) -> Dict[str, int]:
+        """Sumar el resumen de un rango de fechas (una fila por día, no por seguimiento)"""
+        with self.db.get_session() as session:
+            resultado = session.query(
+                func.coalesce(func.sum(ResumenDiarioUsuario.total_seguimientos), 0),
+                func.coalesce(func.sum(ResumenDiarioUsuario.completados), 0)
+            ).filter(
+                ResumenDiarioUsuario.id_usuario == id_usuario,
+                ResumenDiarioUsuario.fecha.between(fecha_inicio, fecha_fin)
+            ).one()
+
+            return {
+                'total_seguimientos': int(resultado[0]),
+                'completados': int(resultado[1])
+            }
+
+    def contar_habitos_activos(self, id_usuario: int, fecha_inicio: date, fecha_fin: date) -> int:
+        """Hábitos del usuario con al menos un seguimiento en el rango.
+
+        Los hábitos distintos de cada día no se pueden sumar entre días, así que
+        no salen del resumen: se prueba cada hábito del usuario con una búsqueda
+        por índice (ix_seguimiento_usuario_habito_fecha). El costo depende de la
+        cantidad de hábitos, no de los seguimientos del rango.
+        """
+        with self.db.get_session() as session:
+            return session.query(func.count(Habito.id_habito)).filter(
+                Habito.id_usuario == id_usuario,
+                select(SeguimientoDiario.id_habito).where(
+                    SeguimientoDiario.id_usuario == id_usuario,
+                    SeguimientoDiario.id_habito == Habito.id_habito,
+                    SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
+                ).exists()
+            ).scalar()
+
+    def obtener_resumen_por_dia(self, id_usuario: int, fecha_inicio: date, fecha_fin: date) -> List[Dict[str, Any]]:
+        """Obtener el resumen día a día de un rango"""
+        try:
+            with self.db.get_session() as session:
+                filas = session.query(ResumenDiarioUsuario).filter(
+                    ResumenDiarioUsuario.id_usuario == id_usuario,
+                    ResumenDiarioUsuario.fecha.between(fecha_inicio, fecha_fin)
+                ).order_by(ResumenDiarioUsuario.fecha).all()
+
+                return [{
+                    'fecha': fila.fecha,
+                    'total_seguimientos': fila.total_seguimientos,
+                    'completados': fila.completados,
+                    'habitos_distintos': fila.habitos_distintos
+                } for fila in filas]
+
+        except SQLAlchemyError as e:
+            logger.error(f"Error obteniendo resumen diario del usuario {id_usuario}: {e}")
+            return []
+
+    def _bloquear_usuarios(self, session, ids_usuario: Iterable[int]) -> None:
+        """Bloqueo por usuario hasta el fin de la transacción, en orden de id para no causar deadlocks.
+
+        En PostgreSQL (READ COMMITTED) cada sentencia posterior ve lo confirmado por
+        quien tenía el bloqueo. SQLite no lo necesita: la escritura que motivó el
+        recálculo ya tomó el único bloqueo de escritura de la base.
+        """
+        if self.db.get_dialect_name() != 'postgresql':
+            return
+        for id_usuario in sorted(ids_usuario):
+            session.execute(text("SELECT pg_advisory_xact_lock(:clave, :id_usuario)"),
+                            {'clave': self.CLAVE_BLOQUEO_RESUMEN, 'id_usuario': id_usuario})
+
+    def _completados_por_dia(self, session, condicion) -> Dict[Tuple[int, date], int]:
+        filas = session.query(
+            ResumenDiarioUsuario.id_usuario, ResumenDiarioUsuario.fecha, ResumenDiarioUsuario.completados
+        ).filter(condicion).all()
+        return {(id_usuario, fecha): completados for id_usuario, fecha, completados in filas}
+
+    def _insertar_desde_seguimientos(self, condicion):
+        """INSERT ... SELECT agregando seguimientos por usuario y día"""
+        return insert(ResumenDiarioUsuario).from_select(self.COLUMNAS, self._agregado(condicion))
+
+    @staticmethod
+    def _agregado(condicion):
+        return select(
+            SeguimientoDiario.id_usuario,
+            SeguimientoDiario.fecha,
+            func.count(),
+            func.sum(case((SeguimientoDiario.estado == 'completado', 1), else_=0)),
+            func.count(func.distinct(SeguimientoDiario.id_habito))
+        ).where(condicion).group_by(SeguimientoDiario.id_usuario, SeguimientoDiario.fecha)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reconstruir el resumen diario de seguimientos")
+    parser.add_argument('--usuario', type=int, help="Reconstruir solo este usuario")
+    parser.add_argument('--desde', type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD)")
+    parser.add_argument('--hasta', type=date.fromisoformat, help="Fecha final (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    dias = ResumenDiarioRepository().reconstruir(args.usuario, args.desde, args.hasta)
+    print(f"Resumen reconstruido: {dias} días en {time.perf_counter() - inicio:.2f}s")
@@ -1,12 +1,15 @@
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import and_, or_, func, desc
 from datetime import date, timedelta
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 import logging
 
 from db.Connection import DatabaseConnection
+from db.ColaSincronizacion import ColaSincronizacion, SincronizadorCola, ENTIDAD_SEGUIMIENTO, clave_seguimiento
 from model.SeguimientoDiario import SeguimientoDiario
 from model.Habito import Habito
+from model.Categorias import Categoria
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -20,6 +23,8 @@ class SeguimientoDiarioRepository:
 
     def __init__(self):
         self.db = DatabaseConnection()
+        self.cola = ColaSincronizacion()
+        self.resumen = ResumenDiarioRepository()
 
     def crear_seguimiento(self, seguimiento_data: dict) -> Optional[SeguimientoDiario]:
         """Crear seguimiento diario en BD"""
@@ -30,6 +35,7 @@ class SeguimientoDiarioRepository:
                 seguimiento = SeguimientoDiario(**seguimiento_data)
                 session.add(seguimiento)
                 session.flush()
+                self.resumen.recalcular_dias(session, [(seguimiento.id_usuario, seguimiento.fecha)])
                 session.expunge(seguimiento)
                 logger.info(f"Seguimiento creado exitosamente para hábito {seguimiento.id_habito} en fecha {seguimiento.fecha}")
                 return seguimiento
@@ -73,20 +79,7 @@ class SeguimientoDiarioRepository:
 
         try:
             with self.db.get_session() as session:
-                query = session.query(SeguimientoDiario).filter(
-                    SeguimientoDiario.id_usuario == id_usuario
-                )
-
-                if fecha_inicio and fecha_fin:
-                    query = query.filter(
-                        SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
-                    )
-                elif fecha_inicio:
-                    query = query.filter(SeguimientoDiario.fecha >= fecha_inicio)
-                elif fecha_fin:
-                    query = query.filter(SeguimientoDiario.fecha <= fecha_fin)
-
-                seguimientos = query.order_by(desc(SeguimientoDiario.fecha)).all()
+                seguimientos = self._query_seguimientos_usuario(session, id_usuario, fecha_inicio, fecha_fin).all()
 
                 for seguimiento in seguimientos:
                     session.expunge(seguimiento)
@@ -96,6 +89,65 @@ class SeguimientoDiarioRepository:
             logger.error(f"Error obteniendo seguimientos del usuario {id_usuario}: {e}")
             return []
 
+    def iterar_seguimientos_por_usuario(self, id_usuario: int, fecha_inicio: Optional[date] = None,
+                                        fecha_fin: Optional[date] = None,
+                                        tamano_lote: Optional[int] = None) -> Iterator[SeguimientoDiario]:
+        """Recorrer por lotes los seguimientos de un usuario, en el mismo orden que obtener_seguimientos_por_usuario"""
+        if not self._validar_id(id_usuario):
+            return iter(())
+
+        return self.db.iterar_consulta(
+            lambda session: self._query_seguimientos_usuario(session, id_usuario, fecha_inicio, fecha_fin),
+            tamano_lote
+        )
+
+    def iterar_historial_usuario(self, id_usuario: int, fecha_inicio: Optional[date] = None,
+                                 fecha_fin: Optional[date] = None,
+                                 tamano_lote: Optional[int] = None) -> Iterator[tuple]:
+        """Recorrer por lotes (fecha, hábito, categoría, estado) de un usuario, del más antiguo al más reciente"""
+        if not self._validar_id(id_usuario):
+            return
+
+        with self.db.get_session() as session:
+            query = session.query(
+                SeguimientoDiario.fecha,
+                Habito.nombre,
+                Categoria.nombre,
+                SeguimientoDiario.estado
+            ).join(
+                Habito, Habito.id_habito == SeguimientoDiario.id_habito
+            ).outerjoin(
+                Categoria, Categoria.id_categoria == Habito.id_categoria
+            ).filter(
+                SeguimientoDiario.id_usuario == id_usuario
+            )
+
+            if fecha_inicio:
+                query = query.filter(SeguimientoDiario.fecha >= fecha_inicio)
+            if fecha_fin:
+                query = query.filter(SeguimientoDiario.fecha <= fecha_fin)
+
+            yield from query.order_by(SeguimientoDiario.fecha, SeguimientoDiario.id_habito).yield_per(
+                tamano_lote or self.db.TAMANO_LOTE_STREAMING
+            )
+
+    def _query_seguimientos_usuario(self, session, id_usuario: int, fecha_inicio: Optional[date],
+                                    fecha_fin: Optional[date]):
+        query = session.query(SeguimientoDiario).filter(
+            SeguimientoDiario.id_usuario == id_usuario
+        )
+
+        if fecha_inicio and fecha_fin:
+            query = query.filter(
+                SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
+            )
+        elif fecha_inicio:
+            query = query.filter(SeguimientoDiario.fecha >= fecha_inicio)
+        elif fecha_fin:
+            query = query.filter(SeguimientoDiario.fecha <= fecha_fin)
+
+        return query.order_by(desc(SeguimientoDiario.fecha))
+
     def obtener_seguimientos_por_habito(self, id_habito: int, fecha_inicio: Optional[date] = None,
                                       fecha_fin: Optional[date] = None) -> List[SeguimientoDiario]:
         """Obtener todos los seguimientos de un hábito en un rango de fechas"""
@@ -180,6 +232,7 @@ class SeguimientoDiarioRepository:
                         setattr(seguimiento, key, value)
 
                 session.flush()
+                self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
                 session.expunge(seguimiento)
                 logger.info(f"Seguimiento actualizado para usuario {id_usuario}, hábito {id_habito}, fecha {fecha}")
                 return seguimiento
@@ -208,6 +261,7 @@ class SeguimientoDiarioRepository:
 
                 if seguimiento:
                     seguimiento.estado = nuevo_estado
+                    self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
                     logger.info(f"Estado actualizado a '{nuevo_estado}' para usuario {id_usuario}, hábito {id_habito}, fecha {fecha}")
                     return True
                 else:
@@ -228,6 +282,19 @@ class SeguimientoDiarioRepository:
             fecha = seguimiento_data['fecha']
 
             with self.db.get_session() as session:
+                upsert = self.db.dialect_insert(SeguimientoDiario)
+                if upsert is not None:
+                    # Camino rápido: un solo INSERT ... ON CONFLICT DO UPDATE
+                    upsert = upsert.values(**seguimiento_data)
+                    upsert = upsert.on_conflict_do_update(
+                        index_elements=['fecha', 'id_habito', 'id_usuario'],
+                        set_={'estado': upsert.excluded.estado}
+                    )
+                    session.execute(upsert)
+                    self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
+                    logger.info(f"Seguimiento guardado para usuario {id_usuario}, hábito {id_habito}, fecha {fecha}")
+                    return SeguimientoDiario(**seguimiento_data)
+
                 seguimiento = session.query(SeguimientoDiario).filter(
                     and_(
                         SeguimientoDiario.id_usuario == id_usuario,
@@ -249,6 +316,7 @@ class SeguimientoDiarioRepository:
                     logger.info(f"Nuevo seguimiento creado para usuario {id_usuario}, hábito {id_habito}, fecha {fecha}")
 
                 session.flush()
+                self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
                 session.expunge(seguimiento)
                 return seguimiento
 
@@ -259,6 +327,50 @@ class SeguimientoDiarioRepository:
             logger.error(f"Error de BD creando/actualizando seguimiento: {e}")
             return None
 
+    def guardar_seguimientos_en_lote(self, session, seguimientos: List[dict]) -> None:
+        """Crear o actualizar varios seguimientos dentro de la transacción del llamador.
+
+        Un solo upsert con executemany y un único recálculo del resumen para los
+        días tocados. Las claves (fecha, id_habito, id_usuario) no deben repetirse.
+        """
+        if not seguimientos:
+            return
+
+        upsert = self.db.dialect_insert(SeguimientoDiario)
+        if upsert is not None:
+            upsert = upsert.on_conflict_do_update(
+                index_elements=['fecha', 'id_habito', 'id_usuario'],
+                set_={'estado': upsert.excluded.estado}
+            )
+            session.execute(upsert, seguimientos)
+        else:
+            for seguimiento_data in seguimientos:
+                session.merge(SeguimientoDiario(**seguimiento_data))
+            session.flush()
+
+        self.resumen.recalcular_dias(session, {(s['id_usuario'], s['fecha']) for s in seguimientos})
+
+    def guardar_seguimiento_diferido(self, seguimiento_data: dict) -> Optional[SeguimientoDiario]:
+        """Guardar seguimiento en el almacén local; se envía a la BD remota en segundo plano"""
+        try:
+            self._validar_datos_seguimiento(seguimiento_data)
+
+            clave = clave_seguimiento(
+                seguimiento_data['id_usuario'], seguimiento_data['id_habito'], seguimiento_data['fecha']
+            )
+            self.cola.encolar(ENTIDAD_SEGUIMIENTO, 'guardar', clave, seguimiento_data)
+            SincronizadorCola().notificar()
+
+            logger.info(f"Seguimiento {clave} encolado para sincronizar")
+            return SeguimientoDiario(**seguimiento_data)
+
+        except ValueError as e:
+            logger.error(f"Datos inválidos para guardar seguimiento: {e}")
+            return None
+        except SQLAlchemyError as e:
+            logger.error(f"Error del almacén local guardando seguimiento: {e}")
+            return None
+
     def eliminar_seguimiento(self, id_usuario: int, id_habito: int, fecha: date) -> bool:
         """Eliminar seguimiento específico"""
         if not self._validar_ids_y_fecha(id_usuario, id_habito, fecha):
@@ -275,6 +387,7 @@ class SeguimientoDiarioRepository:
                 ).delete()
 
                 if seguimiento_eliminado:
+                    self.resumen.recalcular_dias(session, [(id_usuario, fecha)])
                     logger.info(f"Seguimiento eliminado para usuario {id_usuario}, hábito {id_habito}, fecha {fecha}")
                     return True
 
@@ -292,9 +405,11 @@ class SeguimientoDiarioRepository:
 
         try:
             with self.db.get_session() as session:
+                dias_afectados = self.resumen.claves_afectadas(session, SeguimientoDiario.id_habito == id_habito)
                 seguimientos_eliminados = session.query(SeguimientoDiario).filter(
                     SeguimientoDiario.id_habito == id_habito
                 ).delete()
+                self.resumen.recalcular_dias(session, dias_afectados)
 
                 logger.info(f"Eliminados {seguimientos_eliminados} seguimientos del hábito {id_habito}")
                 return True
@@ -310,9 +425,11 @@ class SeguimientoDiarioRepository:
 
         try:
             with self.db.get_session() as session:
+                dias_afectados = self.resumen.claves_afectadas(session, SeguimientoDiario.id_usuario == id_usuario)
                 seguimientos_eliminados = session.query(SeguimientoDiario).filter(
                     SeguimientoDiario.id_usuario == id_usuario
                 ).delete()
+                self.resumen.recalcular_dias(session, dias_afectados)
 
                 logger.info(f"Eliminados {seguimientos_eliminados} seguimientos del usuario {id_usuario}")
                 return True
@@ -363,40 +480,23 @@ class SeguimientoDiarioRepository:
             return {}
 
         try:
-            with self.db.get_session() as session:
-                total_seguimientos = session.query(SeguimientoDiario).filter(
-                    and_(
-                        SeguimientoDiario.id_usuario == id_usuario,
-                        SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
-                    )
-                ).count()
-
-                completados = session.query(SeguimientoDiario).filter(
-                    and_(
-                        SeguimientoDiario.id_usuario == id_usuario,
-                        SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin),
-                        SeguimientoDiario.estado == 'completado'
-                    )
-                ).count()
-
-                # Obtener hábitos únicos del usuario
-                habitos_unicos = session.query(SeguimientoDiario.id_habito).filter(
-                    and_(
-                        SeguimientoDiario.id_usuario == id_usuario,
-                        SeguimientoDiario.fecha.between(fecha_inicio, fecha_fin)
-                    )
-                ).distinct().count()
-
-                return {
-                    'id_usuario': id_usuario,
-                    'fecha_inicio': fecha_inicio,
-                    'fecha_fin': fecha_fin,
-                    'total_seguimientos': total_seguimientos,
-                    'completados': completados,
-                    'pendientes': total_seguimientos - completados,
-                    'porcentaje_completado': (completados / total_seguimientos * 100) if total_seguimientos > 0 else 0,
-                    'habitos_activos': habitos_unicos
-                }
+            # Totales desde el resumen diario: una fila por día del rango
+            totales = self.resumen.obtener_totales(id_usuario, fecha_inicio, fecha_fin)
+            total_seguimientos = totales['total_seguimientos']
+            completados = totales['completados']
+
+            habitos_unicos = self.resumen.contar_habitos_activos(id_usuario, fecha_inicio, fecha_fin)
+
+            return {
+                'id_usuario': id_usuario,
+                'fecha_inicio': fecha_inicio,
+                'fecha_fin': fecha_fin,
+                'total_seguimientos': total_seguimientos,
+                'completados': completados,
+                'pendientes': total_seguimientos - completados,
+                'porcentaje_completado': (completados / total_seguimientos * 100) if total_seguimientos > 0 else 0,
+                'habitos_activos': habitos_unicos
+            }
 
         except SQLAlchemyError as e:
             logger.error(f"Error obteniendo estadísticas del usuario {id_usuario}: {e}")
@@ -1,17 +1,34 @@
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from db.Connection import DatabaseConnection
-from model.Usuario import Usuario
-from typing import List, Optional
+from model.PerfilUsuario import PerfilUsuario
+from model.Usuario import Usuario, normalizar_identificador
+from repository import Contrasenias
+from repository.MedicionSaludRepository import MedicionSaludRepository
+from datetime import date
+from typing import Iterator, List, Optional
 
 class UsuarioRepository:
     """Repositorio para operaciones de base de datos de Usuario"""
 
+    # Restricción (PostgreSQL) o columna (SQLite) única -> mensaje para el usuario
+    MENSAJES_DUPLICADO = {
+        'ux_usuarios_login_nombre': "El nombre de usuario ya está en uso",
+        'usuarios_nombre_usuario_key': "El nombre de usuario ya está en uso",
+        'usuarios.nombre_usuario_normalizado': "El nombre de usuario ya está en uso",
+        'usuarios.nombre_usuario': "El nombre de usuario ya está en uso",
+        'ux_usuarios_login_correo': "El correo electrónico ya está en uso",
+        'usuarios.correo_normalizado': "El correo electrónico ya está en uso",
+    }
+
     def __init__(self):
         self.db = DatabaseConnection()
+        self.mediciones = MedicionSaludRepository()
 
     def crear_usuario(self, usuario_data: dict) -> Optional[Usuario]:
-        """Crear usuario en BD"""
+        """Crear usuario en BD; la contraseña se guarda con hash (llamar fuera del hilo de la interfaz)"""
         try:
+            usuario_data = self._con_hash(usuario_data)
             with self.db.get_session() as session:
                 usuario = Usuario(**usuario_data)
                 session.add(usuario)
@@ -22,6 +39,56 @@ class UsuarioRepository:
             print(f"Error creando usuario: {e}")
             return None
 
+    def registrar_usuario_con_perfil(self, usuario_data: dict, perfil_data: dict) -> Optional[Usuario]:
+        """Crear usuario y perfil en una sola transacción.
+
+        La unicidad de nombre de usuario y correo la garantizan los índices únicos
+        normalizados, sin consultas previas: un duplicado hace fallar el INSERT y
+        se informa con ValueError. Un fallo al crear el perfil deshace también el
+        usuario. Calcula el hash de la contraseña: llamar fuera del hilo de la interfaz.
+        """
+        usuario_data = self._con_hash(usuario_data)
+        try:
+            with self.db.get_session() as session:
+                usuario = Usuario(**usuario_data)
+                usuario.perfil = PerfilUsuario(**perfil_data)
+                session.add(usuario)
+                session.flush()
+                self._registrar_medicion(session, usuario.id_usuario, perfil_data)
+                session.expunge(usuario.perfil)
+                session.expunge(usuario)
+                return usuario
+        except IntegrityError as e:
+            mensaje = self._mensaje_duplicado(e)
+            if mensaje:
+                raise ValueError(mensaje) from e
+            print(f"Error registrando usuario: {e}")
+            return None
+        except SQLAlchemyError as e:
+            print(f"Error registrando usuario: {e}")
+            return None
+
+    @classmethod
+    def _mensaje_duplicado(cls, error: IntegrityError) -> Optional[str]:
+        """Traducir la violación de unicidad a un mensaje según la restricción afectada.
+
+        No se busca texto en el mensaje completo: el DETAIL de PostgreSQL incluye
+        el valor duplicado, y un nombre de usuario como 'correo_fan' se confundiría
+        con el correo. PostgreSQL informa el nombre de la restricción; SQLite, las
+        columnas del índice ("UNIQUE constraint failed: usuarios.correo_normalizado").
+        """
+        restriccion = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+        if restriccion:
+            return cls.MENSAJES_DUPLICADO.get(restriccion)
+
+        detalle = str(error.orig)
+        prefijo = 'UNIQUE constraint failed: '
+        if not detalle.startswith(prefijo):
+            return None
+        claves = detalle[len(prefijo):]
+        claves = [claves[len('index '):].strip("'")] if claves.startswith('index ') else claves.split(', ')
+        return next((cls.MENSAJES_DUPLICADO[clave] for clave in claves if clave in cls.MENSAJES_DUPLICADO), None)
+
     def obtener_usuario_por_id(self, id_usuario: int) -> Optional[Usuario]:
         """Obtener usuario por ID"""
         try:
@@ -41,51 +108,108 @@ class UsuarioRepository:
         """Obtener todos los usuarios"""
         try:
             with self.db.get_session() as session:
-                return session.query(Usuario).all()
+                usuarios = session.query(Usuario).all()
+                for usuario in usuarios:
+                    session.expunge(usuario)
+                return usuarios
         except SQLAlchemyError as e:
             print(f"Error obteniendo usuarios: {e}")
             return []
 
+    def iterar_usuarios(self, tamano_lote: Optional[int] = None) -> Iterator[Usuario]:
+        """Recorrer todos los usuarios por lotes, sin cargar la tabla completa en memoria"""
+        return self.db.iterar_consulta(
+            lambda session: session.query(Usuario).order_by(Usuario.id_usuario), tamano_lote
+        )
 
 
-    def actualizar_usuario(self, id_usuario: int, datos: dict) -> Optional[Usuario]:
-        """Actualiza tanto el usuario como su perfil"""
-        try:
-            from model.PerfilUsuario import PerfilUsuario
 
+    def obtener_usuario_con_perfil(self, id_usuario: int) -> Optional[Usuario]:
+        """Obtener usuario y perfil en una sola consulta (LEFT JOIN); perfil queda en None si no tiene"""
+        try:
             with self.db.get_session() as session:
-                usuario = session.query(Usuario).filter(Usuario.id_usuario == id_usuario).first()
-                if not usuario:
-                    print("Usuario no encontrado")
-                    return None
-
-                # Actualizar campos del usuario
-                for key, value in datos.get('usuario', {}).items():
-                    if hasattr(usuario, key):
-                        setattr(usuario, key, value)
-
-                # Actualizar o crear el perfil
-                perfil_data = datos.get('perfil', {})
-                if perfil_data:
+                usuario = session.query(Usuario).options(
+                    joinedload(Usuario.perfil)
+                ).filter(
+                    Usuario.id_usuario == id_usuario
+                ).first()
+                if usuario:
                     if usuario.perfil:
-                        perfil = usuario.perfil
-                    else:
-                        perfil = PerfilUsuario()
-                        usuario.perfil = perfil
-                        session.add(perfil)
+                        session.expunge(usuario.perfil)
+                    session.expunge(usuario)
+                    return usuario
+                return None
+        except SQLAlchemyError as e:
+            print(f"Error obteniendo usuario con perfil: {e}")
+            return None
 
-                    for key, value in perfil_data.items():
-                        if hasattr(perfil, key):
-                            setattr(perfil, key, value)
+    def actualizar_usuario(self, id_usuario: int, datos: dict) -> bool:
+        """Actualiza el usuario y su perfil sin leerlos antes.
 
-                session.commit()
-                session.expunge(usuario)
-                return usuario
+        datos = {'usuario': {...}, 'perfil': {...}} con solo las columnas a cambiar:
+        el usuario recibe un UPDATE de esas columnas y el perfil un upsert (se crea
+        si no existía). Retorna False si el usuario no existe; un nombre de usuario
+        o correo ya usados por otro se informan con ValueError.
+        """
+        try:
+            valores_usuario = self._con_normalizados(
+                self._columnas(Usuario, self._con_hash(datos.get('usuario', {})))
+            )
+            valores_perfil = self._columnas(PerfilUsuario, datos.get('perfil', {}))
+            valores_perfil.pop('id_usuario', None)
+
+            with self.db.get_session() as session:
+                if valores_usuario:
+                    actualizados = session.query(Usuario).filter(
+                        Usuario.id_usuario == id_usuario
+                    ).update(valores_usuario, synchronize_session=False)
+                    if not actualizados:
+                        print("Usuario no encontrado")
+                        return False
+
+                if valores_perfil:
+                    self._guardar_perfil(session, id_usuario, valores_perfil)
+                    self._registrar_medicion(session, id_usuario, valores_perfil)
+                return True
 
+        except IntegrityError as e:
+            mensaje = self._mensaje_duplicado(e)
+            if mensaje:
+                raise ValueError(mensaje) from e
+            print(f"Error actualizando usuario: {e}")
+            return False
         except SQLAlchemyError as e:
             print(f"Error actualizando usuario: {e}")
-            return None
+            return False
+
+    def _guardar_perfil(self, session, id_usuario: int, valores: dict):
+        """UPDATE de las columnas indicadas del perfil, o INSERT si el usuario aún no tiene"""
+        upsert = self.db.dialect_insert(PerfilUsuario)
+        if upsert is not None:
+            upsert = upsert.values(id_usuario=id_usuario, **valores)
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=['id_usuario'],
+                set_={columna: upsert.excluded[columna] for columna in valores}
+            ))
+            return
+
+        actualizados = session.query(PerfilUsuario).filter(
+            PerfilUsuario.id_usuario == id_usuario
+        ).update(valores, synchronize_session=False)
+        if not actualizados:
+            session.add(PerfilUsuario(id_usuario=id_usuario, **valores))
 
+    def _registrar_medicion(self, session, id_usuario: int, valores_perfil: dict):
+        """Agregar al historial de salud el peso o la altura que se guardan en el perfil"""
+        peso, altura = valores_perfil.get('peso'), valores_perfil.get('altura')
+        if peso is not None or altura is not None:
+            self.mediciones.registrar_en_sesion(session, id_usuario, date.today(), peso, altura)
+
+    @staticmethod
+    def _columnas(modelo, valores: dict) -> dict:
+        """Descartar claves que no son columnas del modelo"""
+        columnas = modelo.__table__.columns.keys()
+        return {clave: valor for clave, valor in valores.items() if clave in columnas}
 
     """def actualizar_usuario(self, id_usuario: int, usuario_data: dict) -> Optional[Usuario]:
         #Actualizar usuario
@@ -121,33 +245,87 @@ class UsuarioRepository:
             return False
 
     def autenticar_usuario(self, nombre_usuario: str, contrasenia: str) -> Optional[Usuario]:
-        """Autenticar usuario por nombre y contraseña"""
+        """Autenticar por nombre de usuario o correo (sin distinguir mayúsculas) y contraseña.
+
+        La búsqueda usa los índices únicos normalizados y la contraseña se verifica
+        fuera de la BD. Si lo almacenado es texto plano heredado o un hash con menos
+        iteraciones que las configuradas, se reemplaza por un hash nuevo.
+        Derivar el hash es costoso: desde la interfaz debe llamarse en segundo plano.
+        """
         try:
             with self.db.get_session() as session:
                 usuario = session.query(Usuario).filter(
-                    Usuario.nombre_usuario == nombre_usuario,
-                    Usuario.contrasenia == contrasenia
+                    self._filtro_identificador(nombre_usuario)
                 ).first()
                 if usuario:
                     session.expunge(usuario)
-                    return usuario
+
+            if not usuario:
+                # Mismo costo que una contraseña incorrecta: el tiempo no delata qué usuarios existen
+                Contrasenias.verificar_senuelo(contrasenia)
                 return None
+            if not Contrasenias.verificar(contrasenia, usuario.contrasenia):
+                return None
+
+            if Contrasenias.necesita_rehash(usuario.contrasenia):
+                self._rehash_contrasenia(usuario, contrasenia)
+            return usuario
         except SQLAlchemyError as e:
             print(f"Error autenticando usuario: {e}")
             return None
 
+    def _rehash_contrasenia(self, usuario: Usuario, contrasenia: str):
+        """Migrar la contraseña al hash actual; solo si nadie la cambió desde la lectura"""
+        nuevo_hash = Contrasenias.generar_hash(contrasenia)
+        with self.db.get_session() as session:
+            actualizadas = session.query(Usuario).filter(
+                Usuario.id_usuario == usuario.id_usuario,
+                Usuario.contrasenia == usuario.contrasenia
+            ).update({Usuario.contrasenia: nuevo_hash}, synchronize_session=False)
+        if actualizadas:
+            usuario.contrasenia = nuevo_hash
+
     def usuario_existe(self, nombre_usuario: str = None, correo_electronico: str = None) -> bool:
-        """Verificar si un usuario existe por nombre de usuario o correo electrónico"""
+        """Verificar si un usuario existe por nombre de usuario o correo electrónico (sin distinguir mayúsculas)"""
         try:
             with self.db.get_session() as session:
-                query = session.query(Usuario)
+                query = session.query(Usuario.id_usuario)
                 if nombre_usuario:
-                    query = query.filter(Usuario.nombre_usuario == nombre_usuario)
+                    query = query.filter(Usuario.nombre_usuario_normalizado == self.normalizar(nombre_usuario))
                 elif correo_electronico:
-                    query = query.filter(Usuario.correo_electronico == correo_electronico)
+                    query = query.filter(Usuario.correo_normalizado == self.normalizar(correo_electronico))
                 else:
                     return False
                 return query.first() is not None
         except SQLAlchemyError as e:
             print(f"Error verificando usuario: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def normalizar(valor: str) -> str:
+        """Forma del nombre de usuario o correo que indexan ux_usuarios_login_*"""
+        return normalizar_identificador(valor)
+
+    def _filtro_identificador(self, identificador: str):
+        if '@' in identificador:
+            return Usuario.correo_normalizado == self.normalizar(identificador)
+        return Usuario.nombre_usuario_normalizado == self.normalizar(identificador)
+
+    def _con_normalizados(self, valores: dict) -> dict:
+        """Agregar las columnas normalizadas a un UPDATE masivo, que no pasa por los validadores del modelo"""
+        if valores.get('nombre_usuario') is not None:
+            valores['nombre_usuario_normalizado'] = self.normalizar(valores['nombre_usuario'])
+        if valores.get('correo_electronico') is not None:
+            valores['correo_normalizado'] = self.normalizar(valores['correo_electronico'])
+        return valores
+
+    def _con_hash(self, usuario_data: dict) -> dict:
+        """Reemplazar la contraseña recibida por su hash.
+
+        Siempre se deriva, aunque el valor ya parezca un hash: quien llama no
+        puede elegir el valor almacenado ni su costo.
+        """
+        contrasenia = usuario_data.get('contrasenia')
+        if contrasenia:
+            return {**usuario_data, 'contrasenia': Contrasenias.generar_hash(contrasenia)}
+        return usuario_data
@@ -0,0 +1,49 @@
+# Archivo: test/conftest.py
+import os
+
+# Las pruebas corren contra SQLite en memoria; no requieren un servidor PostgreSQL
+os.environ.setdefault("database_url", "sqlite://")
+os.environ.setdefault("local_database_url", "sqlite://")
+
+# Hash de contraseñas barato en pruebas; el costo real se configura en producción
+os.environ.setdefault("contrasenia_iteraciones", "1000")
+
+# Importar después de configurar el entorno, que DatabaseConnection lee al conectarse
+import pytest
+from datetime import date
+
+from db.Connection import DatabaseConnection
+from model.Base import Base
+from model.Usuario import Usuario
+
+
+@pytest.fixture
+def db():
+    """BD SQLite en memoria (migrada al iniciar la conexión), vaciada al terminar cada prueba.
+
+    Cada módulo agrega sus propios datos con un fixture que depende de este.
+    """
+    conexion = DatabaseConnection()
+    yield conexion
+    with conexion.get_session() as session:
+        for tabla in reversed(Base.metadata.sorted_tables):
+            session.execute(tabla.delete())
+
+
+@pytest.fixture
+def crear_usuario():
+    """Agregar a una sesión un usuario con datos personales de relleno.
+
+    crear_usuario(session, id_usuario=1, nombre_usuario=None): el nombre de
+    usuario por defecto es 'u<id>' y el correo '<nombre_usuario>@test.com'.
+    """
+    def crear(session, id_usuario: int = 1, nombre_usuario: str = None) -> Usuario:
+        nombre_usuario = nombre_usuario or f'u{id_usuario}'
+        usuario = Usuario(
+            id_usuario=id_usuario, nombre='N', apellido='A', correo_electronico=f'{nombre_usuario}@test.com',
+            contrasenia='x', fecha_nacimiento=date(1990, 1, 1), sexo='F', nombre_usuario=nombre_usuario
+        )
+        session.add(usuario)
+        return usuario
+
+    return crear
@@ -0,0 +1,107 @@
+# Archivo: test/test_actividad_comunidad.py
+import pytest
+from datetime import date, timedelta
+
+from model.Habito import Habito
+from model.Comunidad import Comunidad
+from model.ActividadComunidadDiaria import ActividadComunidadDiaria
+from repository.ActividadComunidadRepository import ActividadComunidadRepository
+from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+HOY = date(2024, 3, 10)
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Tres usuarios con un hábito cada uno y dos comunidades"""
+    with db.get_session() as session:
+        for id_usuario in (1, 2, 3):
+            crear_usuario(session, id_usuario)
+            session.add(Habito(id_habito=id_usuario, nombre='Leer', frecuencia='Lunes',
+                               fecha_creacion=date(2024, 1, 1), id_usuario=id_usuario))
+        session.add(Comunidad(id_comunidad=1, nombre='Lectores'))
+        session.add(Comunidad(id_comunidad=2, nombre='Corredores'))
+
+
+def _unir(id_usuario, id_comunidad, fecha=HOY):
+    IncorporaComunidadRepository().incorporar_usuario_a_comunidad(
+        {'id_usuario': id_usuario, 'id_comunidad': id_comunidad, 'estado': 'activo', 'fecha_union': fecha}
+    )
+
+
+def _completar(id_usuario, fecha=HOY, estado='completado'):
+    SeguimientoDiarioRepository().crear_o_actualizar_seguimiento(
+        {'id_usuario': id_usuario, 'id_habito': id_usuario, 'fecha': fecha, 'estado': estado}
+    )
+
+
+def test_tendencia_incremental(db):
+    """Uniones y completados de los miembros se acumulan por día y puntúan en la ventana"""
+    _unir(1, 1)
+    _unir(2, 2)
+    _unir(3, 2)
+    _completar(1)
+    _completar(1, date(2024, 3, 9))
+    _completar(2, estado='pendiente')
+
+    tendencia = ActividadComunidadRepository().obtener_comunidades_tendencia(fecha_referencia=HOY)
+    assert [(t['comunidad'].id_comunidad, t['uniones'], t['completados']) for t in tendencia] == [
+        (2, 2, 0), (1, 1, 2)
+    ]
+
+    # Desmarcar resta el completado y el día fuera de la ventana deja de contar
+    _completar(1, estado='pendiente')
+    tendencia = ActividadComunidadRepository().obtener_comunidades_tendencia(
+        fecha_referencia=date(2024, 3, 16)
+    )
+    assert [(t['comunidad'].id_comunidad, t['completados']) for t in tendencia] == [(2, 0), (1, 0)]
+    tendencia = ActividadComunidadRepository().obtener_comunidades_tendencia(
+        fecha_referencia=date(2024, 3, 17)
+    )
+    assert tendencia == []
+
+
+def test_reconstruir_coincide_con_incremental(db):
+    """La reconstrucción produce los mismos contadores que el mantenimiento incremental"""
+    _unir(1, 1, date(2024, 3, 8))
+    _unir(2, 1)
+    _completar(1)
+    _completar(2)
+
+    def contadores():
+        with db.get_session() as session:
+            return sorted((a.id_comunidad, a.fecha, a.uniones, a.completados)
+                          for a in session.query(ActividadComunidadDiaria).all())
+
+    incremental = contadores()
+    ActividadComunidadRepository().reconstruir(date(2024, 3, 1), HOY)
+    assert contadores() == incremental
+
+    # Desactivar, reactivar y eliminar miembros mueve las uniones en su fecha_union, como la reconstrucción
+    incorporaciones = IncorporaComunidadRepository()
+    incorporaciones.actualizar_estado_incorporacion(1, 1, 'inactivo')
+    incorporaciones.actualizar_estado_incorporacion(1, 1, 'activo')
+    incorporaciones.actualizar_estado_incorporacion(2, 1, 'inactivo')
+    _unir(3, 2, date(2024, 3, 9))
+    incorporaciones.eliminar_incorporacion(3, 2)
+
+    incremental = contadores()
+    assert [(c[1], c[2]) for c in incremental if c[0] == 1] == [(date(2024, 3, 8), 1), (HOY, 0)]
+    ActividadComunidadRepository().reconstruir(date(2024, 3, 1), HOY)
+    # Los completados se atribuyen a los miembros activos de hoy: solo se comparan las uniones
+    assert [c[:3] for c in contadores() if c[2]] == [c[:3] for c in incremental if c[2]]
+
+
+def test_purgar_dias_antiguos(db):
+    """La purga elimina solo los días anteriores a la fecha límite"""
+    _unir(1, 1, date(2024, 1, 5))
+    _unir(2, 1)
+
+    repository = ActividadComunidadRepository()
+    assert repository.purgar_anterior_a(HOY - timedelta(days=repository.DIAS_CONSERVADOS)) == 0
+    assert repository.purgar_anterior_a(HOY - timedelta(days=repository.VENTANA_DIAS)) == 1
+
+    with db.get_session() as session:
+        assert [a.fecha for a in session.query(ActividadComunidadDiaria).all()] == [HOY]
+    assert [t['uniones'] for t in repository.obtener_comunidades_tendencia(fecha_referencia=HOY)] == [1]
@@ -0,0 +1,148 @@
+# Archivo: test/test_cola_sincronizacion.py
+import pytest
+from datetime import date
+from sqlalchemy import delete, select
+from sqlalchemy.exc import OperationalError
+
+from db.ColaSincronizacion import ColaSincronizacion, SincronizadorCola, cola_sincronizacion, ENTIDAD_HABITO
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.HabitosRepository import HabitosRepository
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+LUNES = date(2024, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un usuario con dos hábitos en la BD remota (SQLite en memoria); vacía la cola local al terminar"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Habito(id_habito=1, nombre='Leer', frecuencia='Lunes', fecha_creacion=LUNES, id_usuario=1))
+        session.add(Habito(id_habito=2, nombre='Correr', frecuencia='Lunes', fecha_creacion=LUNES, id_usuario=1))
+    yield
+    with ColaSincronizacion()._engine.begin() as connection:
+        connection.execute(delete(cola_sincronizacion))
+
+
+def _seguimiento(id_habito, estado, fecha=LUNES):
+    return {'id_usuario': 1, 'id_habito': id_habito, 'fecha': fecha, 'estado': estado}
+
+
+def test_escrituras_repetidas_se_compactan(db):
+    """Varios cambios del mismo seguimiento dejan una sola entrada pendiente"""
+    repository = SeguimientoDiarioRepository()
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'pendiente'))
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+
+    assert ColaSincronizacion().contar_pendientes() == 1
+
+
+def test_lecturas_incluyen_cambios_pendientes(db):
+    """Los hábitos del día reflejan estados y eliminaciones aún no sincronizados"""
+    SeguimientoDiarioRepository().guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+    repository = HabitosRepository()
+    repository.eliminar_habito_diferido(2)
+
+    habitos = repository.obtener_habitos_por_fecha(1, LUNES)
+
+    assert [(item['habito'].id_habito, item['estado']) for item in habitos] == [(1, 'completado')]
+
+
+def test_sincronizar_lote_aplica_y_vacia_la_cola(db):
+    """Un lote aplica seguimientos y cambios de hábitos en la BD remota"""
+    SeguimientoDiarioRepository().guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+    HabitosRepository().actualizar_habito_diferido(2, {'nombre': 'Trotar'})
+
+    assert SincronizadorCola().sincronizar_lote() == 2
+    assert ColaSincronizacion().contar_pendientes() == 0
+
+    with db.get_session() as session:
+        assert session.query(SeguimientoDiario).one().estado == 'completado'
+        assert session.query(Habito).filter(Habito.id_habito == 2).one().nombre == 'Trotar'
+
+
+def test_mutacion_conflictiva_no_bloquea_la_cola(db):
+    """Un seguimiento de un hábito inexistente se descarta y el resto se aplica"""
+    repository = SeguimientoDiarioRepository()
+    repository.guardar_seguimiento_diferido(_seguimiento(99, 'completado'))
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+
+    assert SincronizadorCola().sincronizar_lote() == 2
+    assert ColaSincronizacion().contar_pendientes() == 0
+
+    with db.get_session() as session:
+        assert session.query(SeguimientoDiario).count() == 1
+
+
+def test_mutaciones_invalidas_se_aislan(db):
+    """Datos que no se pueden interpretar o que la BD rechaza se marcan como error sin frenar el resto"""
+    cola = ColaSincronizacion()
+    cola.encolar(ENTIDAD_HABITO, 'actualizar', 'no-es-id', {'nombre': 'X'})
+    cola.encolar(ENTIDAD_HABITO, 'actualizar', '2', {'columna_inexistente': 1})
+    SeguimientoDiarioRepository().guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+
+    assert SincronizadorCola().sincronizar_lote() == 3
+    assert cola.contar_pendientes() == 0
+
+    with cola._engine.connect() as connection:
+        errores = connection.execute(
+            select(cola_sincronizacion.c.clave).where(cola_sincronizacion.c.estado == 'error')
+        ).scalars().all()
+    assert sorted(errores) == ['2', 'no-es-id']
+    with db.get_session() as session:
+        assert session.query(SeguimientoDiario).count() == 1
+
+
+def test_sin_conexion_conserva_el_lote(db, monkeypatch):
+    """Un error de conexión se propaga para reintentar y no descarta mutaciones"""
+    SeguimientoDiarioRepository().guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+
+    def sin_conexion(session, entradas):
+        raise OperationalError('SELECT 1', {}, Exception('server closed the connection'))
+
+    sincronizador = SincronizadorCola()
+    monkeypatch.setattr(sincronizador, '_aplicar', sin_conexion)
+    with pytest.raises(OperationalError):
+        sincronizador.sincronizar_lote()
+    assert ColaSincronizacion().contar_pendientes() == 1
+
+
+def test_error_inesperado_no_termina_el_hilo(db, monkeypatch):
+    """El bucle registra un error fuera de SQLAlchemy y vuelve a intentar"""
+    sincronizador = SincronizadorCola()
+    llamadas = []
+
+    def sincronizar_lote():
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise RuntimeError("fallo inesperado")
+        sincronizador._detener.set()
+        return 0
+
+    monkeypatch.setattr(SincronizadorCola, 'INTERVALO_SEGUNDOS', 0.01)
+    monkeypatch.setattr(sincronizador, 'sincronizar_lote', sincronizar_lote)
+    try:
+        sincronizador._ejecutar()
+    finally:
+        sincronizador._detener.clear()
+    assert len(llamadas) == 2
+
+
+
+def test_matriz_incluye_seguimientos_pendientes(db):
+    """El mapa de calor refleja los seguimientos marcados o desmarcados aún no sincronizados"""
+    with db.get_session() as session:
+        session.add(SeguimientoDiario(id_usuario=1, id_habito=2, fecha=LUNES, estado='completado'))
+    repository = SeguimientoDiarioRepository()
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'completado'))
+    repository.guardar_seguimiento_diferido(_seguimiento(2, 'pendiente'))
+    repository.guardar_seguimiento_diferido(_seguimiento(1, 'completado', fecha=date(2024, 1, 15)))
+
+    matriz = HabitosRepository().obtener_matriz_cumplimiento(1, LUNES, date(2024, 1, 8))
+
+    assert matriz['ids_habitos'].tolist() == [2, 1]
+    assert matriz['completados'][:, 0].tolist() == [False, True]
+    assert not matriz['completados'][:, 1:].any()
+    assert matriz['ratio_diario'][0] == 0.5
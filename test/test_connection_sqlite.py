@@ -0,0 +1,52 @@
+# Archivo: test/test_connection_sqlite.py
+import pytest
+from datetime import date
+from sqlalchemy import text
+
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+
+@pytest.fixture
+def habito(db, crear_usuario):
+    """Usuario y hábito base para registrar seguimientos"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Habito(
+            id_habito=1, nombre='Leer', frecuencia='Lunes', fecha_creacion=date(2024, 1, 1), id_usuario=1
+        ))
+    return 1
+
+
+def test_dialecto_sqlite(db):
+    """La URL sqlite:// selecciona el dialecto SQLite"""
+    assert db.get_dialect_name() == 'sqlite'
+
+
+def test_pragmas_sqlite(db):
+    """Las conexiones SQLite aplican los pragmas configurados"""
+    with db.get_engine().connect() as connection:
+        assert connection.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+def test_memoria_compartida_entre_sesiones(db, habito):
+    """Las sesiones comparten la misma base en memoria"""
+    with db.get_session() as session:
+        assert session.query(Habito).count() == 1
+
+
+def test_crear_o_actualizar_seguimiento_upsert(db, habito):
+    """El upsert crea el seguimiento y luego actualiza su estado"""
+    repository = SeguimientoDiarioRepository()
+    datos = {'id_usuario': 1, 'id_habito': habito, 'fecha': date(2024, 1, 1), 'estado': 'completado'}
+
+    assert repository.crear_o_actualizar_seguimiento(datos) is not None
+    assert repository.crear_o_actualizar_seguimiento({**datos, 'estado': 'pendiente'}) is not None
+
+    with db.get_session() as session:
+        seguimientos = session.query(SeguimientoDiario).all()
+        assert len(seguimientos) == 1
+        assert seguimientos[0].estado == 'pendiente'
+
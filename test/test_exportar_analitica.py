@@ -0,0 +1,42 @@
+# Archivo: test/test_exportar_analitica.py
+import pytest
+from datetime import date, timedelta
+
+from model.Habito import Habito
+from model.Categorias import Categoria
+from model.SeguimientoDiario import SeguimientoDiario
+from exportar_analitica import exportar_analitica
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un hábito seguido del 30 de enero al 2 de febrero"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Categoria(id_categoria=1, nombre='Salud'))
+        session.flush()
+        session.add(Habito(id_habito=1, nombre='Correr', frecuencia='Diaria', fecha_creacion=date(2024, 1, 1),
+                           id_categoria=1, id_usuario=1))
+        session.flush()
+        for dia in range(4):
+            session.add(SeguimientoDiario(fecha=date(2024, 1, 30) + timedelta(days=dia), id_habito=1,
+                                          id_usuario=1, estado='completado'))
+
+
+def test_exportacion_particionada_e_incremental(db, tmp_path):
+    """Los seguimientos se parten por mes y una segunda corrida solo agrega los días nuevos"""
+    reporte = exportar_analitica(str(tmp_path), hasta=date(2024, 2, 2), tamano_lote=2)
+    assert reporte == {'seguimiento_diario': 3, 'habito': 1, 'usuarios': 1, 'incorpora_comunidad': 0}
+    assert pq.read_table(tmp_path / 'seguimiento_diario' / 'mes=2024-01').num_rows == 2
+
+    tabla = pq.read_table(tmp_path / 'seguimiento_diario' / 'mes=2024-02')
+    assert tabla.num_rows == 1
+    assert str(tabla.schema.field('estado').type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    assert tabla.column('categoria').to_pylist() == ['Salud']
+
+    reporte = exportar_analitica(str(tmp_path), hasta=date(2024, 2, 3))
+    assert reporte['seguimiento_diario'] == 1
+    assert pq.read_table(tmp_path / 'seguimiento_diario' / 'mes=2024-02').num_rows == 2
+    assert 'correo_electronico' not in pq.read_table(tmp_path / 'usuarios.parquet').column_names
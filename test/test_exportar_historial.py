@@ -0,0 +1,52 @@
+# Archivo: test/test_exportar_historial.py
+import io
+import json
+import pytest
+from datetime import date, timedelta
+
+from model.Habito import Habito
+from model.Categorias import Categoria
+from model.SeguimientoDiario import SeguimientoDiario
+from exportar_historial import exportar_historial
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Dos hábitos (uno sin categoría) y diez días de seguimientos"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Categoria(id_categoria=1, nombre='Salud'))
+        session.flush()
+        session.add(Habito(id_habito=1, nombre='Correr', frecuencia='Diaria', fecha_creacion=date(2024, 1, 1),
+                           id_categoria=1, id_usuario=1))
+        session.add(Habito(id_habito=2, nombre='Leer, 20 min', frecuencia='Diaria', fecha_creacion=date(2024, 1, 1),
+                           id_usuario=1))
+        session.flush()
+        for dia in range(10):
+            for id_habito in (1, 2):
+                session.add(SeguimientoDiario(fecha=date(2024, 1, 1) + timedelta(days=dia), id_habito=id_habito,
+                                              id_usuario=1, estado='completado' if dia % 2 else 'pendiente'))
+
+
+def test_exportar_csv_con_rango(db):
+    """El CSV trae encabezado, nombres de hábito y categoría y respeta el rango de fechas"""
+    salida = io.StringIO()
+    filas = exportar_historial(1, salida, 'csv', date(2024, 1, 2), date(2024, 1, 3), tamano_lote=1)
+
+    assert filas == 4
+    assert salida.getvalue().splitlines() == [
+        'fecha,habito,categoria,estado',
+        '2024-01-02,Correr,Salud,completado',
+        '2024-01-02,"Leer, 20 min",,completado',
+        '2024-01-03,Correr,Salud,pendiente',
+        '2024-01-03,"Leer, 20 min",,pendiente',
+    ]
+
+
+def test_exportar_jsonl(db):
+    """JSON Lines escribe un objeto por seguimiento"""
+    salida = io.StringIO()
+    assert exportar_historial(1, salida, 'jsonl', fecha_inicio=date(2024, 1, 10)) == 2
+
+    primera = json.loads(salida.getvalue().splitlines()[0])
+    assert primera == {'fecha': '2024-01-10', 'habito': 'Correr', 'categoria': 'Salud', 'estado': 'completado'}
@@ -0,0 +1,52 @@
+# Archivo: test/test_habitos_repository.py
+import math
+import pytest
+from datetime import date
+
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.HabitosRepository import HabitosRepository
+
+TODOS_LOS_DIAS = "Lunes, Martes, Miércoles, Jueves, Viernes, Sábado, Domingo"
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un usuario con dos hábitos (diario y de lunes)"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Habito(id_habito=1, nombre='Leer', frecuencia=TODOS_LOS_DIAS,
+                           fecha_creacion=date(2024, 1, 3), id_usuario=1))
+        session.add(Habito(id_habito=2, nombre='Correr', frecuencia='Lunes',
+                           fecha_creacion=date(2023, 12, 1), id_usuario=1))
+
+
+def test_obtener_matriz_cumplimiento(db):
+    """La matriz respeta frecuencia, fecha de creación y seguimientos completados"""
+    with db.get_session() as session:
+        session.add(SeguimientoDiario(fecha=date(2024, 1, 8), id_habito=2, id_usuario=1, estado='completado'))
+        session.add(SeguimientoDiario(fecha=date(2024, 1, 8), id_habito=1, id_usuario=1, estado='pendiente'))
+        session.add(SeguimientoDiario(fecha=date(2024, 1, 4), id_habito=1, id_usuario=1, estado='completado'))
+
+    # Del lunes 1 al lunes 8 de enero de 2024
+    matriz = HabitosRepository().obtener_matriz_cumplimiento(1, date(2024, 1, 1), date(2024, 1, 8))
+
+    assert matriz['ids_habitos'].tolist() == [2, 1]
+    assert matriz['programados'].astype(int).tolist() == [
+        [1, 0, 0, 0, 0, 0, 0, 1],
+        [0, 0, 1, 1, 1, 1, 1, 1],
+    ]
+    assert matriz['completados'].astype(int).tolist() == [
+        [0, 0, 0, 0, 0, 0, 0, 1],
+        [0, 0, 0, 1, 0, 0, 0, 0],
+    ]
+    ratio = matriz['ratio_diario'].tolist()
+    assert ratio[0] == 0.0
+    assert math.isnan(ratio[1])
+    assert ratio[3] == 1.0
+    assert ratio[7] == 0.5
+
+
+def test_obtener_matriz_cumplimiento_rango_invalido(db):
+    """Un rango invertido no consulta la BD"""
+    assert HabitosRepository().obtener_matriz_cumplimiento(1, date(2024, 2, 1), date(2024, 1, 1)) == {}
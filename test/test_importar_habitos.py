@@ -0,0 +1,57 @@
+# Archivo: test/test_importar_habitos.py
+import io
+import pytest
+from datetime import date
+
+from model.Habito import Habito
+from model.Categorias import Categoria
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
+from importar_habitos import ImportadorHabitos
+
+CSV = """habito,categoria,frecuencia,fecha,estado
+Correr,salud,"Lunes,Jueves",2024-01-01,completado
+Meditar,Mente,,,
+Leer,Lectura,,2024-01-01,completado
+Correr,Salud,,2024-01-02,pendiente
+Correr,Salud,,2024-01-02,completado
+Leer,,,fecha-mala,completado
+Leer,,,2024-01-03,hecho
+,Salud,,2024-01-03,completado
+"""
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un usuario que ya tiene el hábito Leer y la categoría Salud"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Categoria(id_categoria=1, nombre='Salud'))
+        session.flush()
+        session.add(Habito(id_habito=1, nombre='Leer', frecuencia='diario', fecha_creacion=date(2023, 1, 1),
+                           id_usuario=1))
+
+
+def test_importar_csv_por_lotes(db):
+    """Crea solo los hábitos nuevos, guarda los seguimientos válidos y actualiza el resumen diario"""
+    reporte = ImportadorHabitos(1, tamano_lote=2).importar(io.StringIO(CSV))
+
+    # Las dos filas de Correr del 2 de enero caen en lotes distintos: dos upserts sobre la misma clave
+    assert reporte == {'filas': 8, 'habitos_creados': 2, 'seguimientos': 4, 'filas_invalidas': 3}
+    with db.get_session() as session:
+        habitos = {h.nombre: (h.id_categoria, h.frecuencia, h.fecha_creacion) for h in session.query(Habito)}
+        estados = {(s.fecha.day, s.id_habito): s.estado for s in session.query(SeguimientoDiario)}
+
+    assert habitos == {
+        'Leer': (None, 'diario', date(2023, 1, 1)),
+        'Correr': (1, 'Lunes,Jueves', date(2024, 1, 1)),
+        'Meditar': (None, 'diario', date.today()),
+    }
+    correr = 2
+    assert estados == {(1, correr): 'completado', (1, 1): 'completado', (2, correr): 'completado'}
+    assert ResumenDiarioRepository().obtener_totales(1, date(2024, 1, 1), date(2024, 1, 31))['completados'] == 3
+
+
+def test_importar_requiere_columna_habito(db):
+    with pytest.raises(ValueError):
+        ImportadorHabitos(1).importar(io.StringIO("nombre,fecha\nCorrer,2024-01-01\n"))
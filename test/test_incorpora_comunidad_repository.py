@@ -0,0 +1,125 @@
+# Archivo: test/test_incorpora_comunidad_repository.py
+import pytest
+from datetime import date
+
+from model.Comunidad import Comunidad
+from model.IncorporaComunidad import IncorporaComunidad
+from repository.ComunidadRepository import ComunidadRepository
+from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Cuatro usuarios, dos comunidades y sus incorporaciones en distintos estados"""
+    with db.get_session() as session:
+        for id_usuario in range(1, 5):
+            crear_usuario(session, id_usuario)
+        session.add(Comunidad(id_comunidad=1, nombre='Lectores'))
+        session.add(Comunidad(id_comunidad=2, nombre='Corredores'))
+        session.flush()
+        for id_usuario, id_comunidad, estado in ((1, 1, 'activo'), (2, 1, 'activo'), (3, 1, 'pendiente'),
+                                                 (4, 1, 'bloqueado'), (1, 2, 'inactivo')):
+            session.add(IncorporaComunidad(id_usuario, id_comunidad, estado, date(2024, 1, id_usuario)))
+
+
+def test_estadisticas_de_varias_comunidades(db):
+    """Una sola consulta agrupada devuelve los contadores de cada comunidad pedida"""
+    estadisticas = IncorporaComunidadRepository().obtener_estadisticas_comunidades([1, 2, 3])
+
+    assert estadisticas[1] == {'total_miembros': 4, 'miembros_activos': 2,
+                               'miembros_pendientes': 1, 'miembros_bloqueados': 1}
+    assert estadisticas[2] == {'total_miembros': 1, 'miembros_activos': 0,
+                               'miembros_pendientes': 0, 'miembros_bloqueados': 0}
+    assert estadisticas[3]['total_miembros'] == 0
+
+
+def test_estadisticas_de_una_comunidad(db):
+    """La versión individual usa la consulta agrupada"""
+    repository = IncorporaComunidadRepository()
+    assert repository.obtener_estadisticas_comunidad(1)['miembros_activos'] == 2
+    assert repository.obtener_estadisticas_comunidad(0) == {}
+
+
+def test_contador_miembros_activos(db):
+    """Incorporar, cambiar de estado y eliminar mantienen comunidad.miembros_activos"""
+    repository = IncorporaComunidadRepository()
+
+    def contador():
+        return ComunidadRepository().obtener_comunidad_por_id(2).miembros_activos
+
+    repository.incorporar_usuario_a_comunidad({'id_usuario': 2, 'id_comunidad': 2, 'estado': 'activo'})
+    repository.incorporar_usuario_a_comunidad({'id_usuario': 3, 'id_comunidad': 2, 'estado': 'pendiente'})
+    assert contador() == 1
+
+    repository.actualizar_estado_incorporacion(3, 2, 'activo')
+    repository.actualizar_estado_incorporacion(3, 2, 'activo')
+    assert contador() == 2
+
+    repository.actualizar_estado_incorporacion(2, 2, 'bloqueado')
+    repository.eliminar_incorporacion(3, 2)
+    repository.eliminar_incorporacion(2, 2)
+    assert contador() == 0
+
+
+def test_verificar_y_reparar_contadores(db):
+    """La verificación detecta contadores desincronizados y los repara"""
+    repository = ComunidadRepository()
+
+    # El fixture inserta incorporaciones sin pasar por el repositorio
+    assert repository.verificar_contadores_miembros() == {1: (0, 2)}
+    assert repository.verificar_contadores_miembros(reparar=True) == {1: (0, 2)}
+    assert repository.verificar_contadores_miembros() == {}
+    assert [c.id_comunidad for c in repository.obtener_comunidades_populares(1)] == [1]
+
+
+def test_incorporaciones_usuario_en_varias_comunidades(db):
+    """Una consulta IN devuelve el mapa de incorporaciones del usuario"""
+    repository = IncorporaComunidadRepository()
+
+    incorporaciones = repository.obtener_incorporaciones_usuario_en(1, [1, 2, 3])
+    assert {id_comunidad: i.estado for id_comunidad, i in incorporaciones.items()} == {1: 'activo', 2: 'inactivo'}
+    assert repository.obtener_incorporaciones_usuario_en(3, [2]) == {}
+    assert repository.obtener_incorporaciones_usuario_en(1, []) == {}
+
+
+def test_comunidades_con_creador_incorporado(db):
+    """Detecta en lote las comunidades cuyo creador figura como incorporado"""
+    ComunidadRepository().actualizar_comunidad(1, {'id_creador': 2})
+    ComunidadRepository().actualizar_comunidad(2, {'id_creador': 3})
+
+    assert IncorporaComunidadRepository().obtener_comunidades_con_creador_incorporado([1, 2]) == {1}
+
+
+def test_listados_devuelven_objetos_de_solo_lectura(db):
+    """Los listados devuelven objetos livianos con los mismos atributos que el modelo"""
+    incorporaciones = IncorporaComunidadRepository().obtener_comunidades_de_usuario(1)
+    assert sorted((i.id_comunidad, i.estado, i.es_activo()) for i in incorporaciones) == [
+        (1, 'activo', True), (2, 'inactivo', False)
+    ]
+
+    comunidades = ComunidadRepository().obtener_todas_comunidades()
+    assert [(c.id_comunidad, c.nombre) for c in comunidades] == [(2, 'Corredores'), (1, 'Lectores')]
+    with pytest.raises(AttributeError):
+        comunidades[0].nombre = 'Otro'
+
+
+def test_iterar_incorporaciones_por_lotes(db):
+    """La variante en streaming entrega lo mismo que el listado, con entidades desvinculadas"""
+    repository = IncorporaComunidadRepository()
+    desde, hasta = date(2024, 1, 1), date(2024, 1, 3)
+
+    iteradas = list(repository.iterar_incorporaciones_por_fecha(desde, hasta, tamano_lote=2))
+    listadas = repository.obtener_incorporaciones_por_fecha(desde, hasta)
+
+    assert [(i.id_usuario, i.id_comunidad) for i in iteradas] == [(i.id_usuario, i.id_comunidad) for i in listadas]
+    assert len(iteradas) == 4
+    assert iteradas[0].estado == 'pendiente'
+
+
+def test_iterar_corta_sin_consumir_todo(db):
+    """Abandonar el generador a mitad de camino cierra la sesión sin error"""
+    iterador = IncorporaComunidadRepository().iterar_incorporaciones_por_fecha(
+        date(2024, 1, 1), date(2024, 1, 31), tamano_lote=1
+    )
+    assert next(iterador).fecha_union == date(2024, 1, 4)
+    iterador.close()
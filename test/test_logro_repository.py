@@ -0,0 +1,64 @@
+# Archivo: test/test_logro_repository.py
+import pytest
+
+from model.Logro import Logro
+from model.Nivel import Nivel
+from model.Desbloquea import Desbloquea
+from model.AsignacionNivel import AsignacionNivel
+from repository.LogroRepository import LogroRepository
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Tres usuarios, dos logros y dos niveles"""
+    with db.get_session() as session:
+        for id_usuario, nombre in ((1, 'ana'), (2, 'beto'), (3, 'carla')):
+            crear_usuario(session, id_usuario, nombre)
+        session.add(Logro(id_logro=1, nombre='Primer paso', puntos=10, descripcion='d'))
+        session.add(Logro(id_logro=2, nombre='Constancia', puntos=50, descripcion='d'))
+        session.add(Nivel(id_nivel=1, nombre='Inicial', puntos_requeridos=0))
+        session.add(Nivel(id_nivel=2, nombre='Avanzado', puntos_requeridos=50))
+
+
+def _niveles(db):
+    with db.get_session() as session:
+        return dict(session.query(AsignacionNivel.id_usuario, AsignacionNivel.id_nivel).all())
+
+
+def test_desbloqueo_en_lote_es_idempotente(db):
+    """Repetir un desbloqueo no duplica filas y solo retorna los pares nuevos"""
+    repository = LogroRepository()
+
+    assert repository.desbloquear_logro_para_usuarios(1, [1, 2, 3]) == [1, 2, 3]
+    assert repository.desbloquear_logros([(1, 1), (1, 2), (1, 2)]) == [(1, 2)]
+    assert repository.desbloquear_logros([(1, 1), (1, 2)]) == []
+    assert repository.asociar_logro_a_usuario(2, 1) is False
+
+    with db.get_session() as session:
+        assert session.query(Desbloquea).count() == 4
+
+
+def test_desbloqueo_en_lote_reasigna_niveles(db):
+    """Los puntos de los nuevos logros recalculan el nivel en la misma transacción"""
+    repository = LogroRepository()
+
+    repository.desbloquear_logro_para_usuarios(1, [1, 2])
+    assert _niveles(db) == {1: 1, 2: 1}
+
+    assert repository.asociar_logro_a_usuario(1, 2) is True
+    assert _niveles(db) == {1: 2, 2: 1}
+
+
+def test_pagina_logros_marca_desbloqueados_primero(db):
+    """La página del catálogo trae primero los desbloqueados y marca el estado de cada logro"""
+    repository = LogroRepository()
+    repository.asociar_logro_a_usuario(1, 1)
+
+    pagina = repository.obtener_pagina_logros_usuario(1, limite=1)
+    assert [(l['id_logro'], l['desbloqueado']) for l in pagina] == [(1, True)]
+
+    pagina = repository.obtener_pagina_logros_usuario(1, limite=1, desplazamiento=1)
+    assert [(l['id_logro'], l['desbloqueado']) for l in pagina] == [(2, False)]
+
+    assert repository.contar_logros_usuario(1) == {'total': 2, 'desbloqueados': 1}
+    assert repository.contar_logros_usuario(2) == {'total': 2, 'desbloqueados': 0}
@@ -0,0 +1,69 @@
+# Archivo: test/test_medicion_salud.py
+import math
+import pytest
+from datetime import date
+
+import numpy as np
+
+from model.MedicionSalud import MedicionSalud
+from repository.MedicionSaludRepository import MedicionSaludRepository
+from repository.UsuarioRepository import UsuarioRepository
+
+
+@pytest.fixture
+def id_usuario(db):
+    usuario = UsuarioRepository().crear_usuario({
+        'nombre': 'Ana', 'apellido': 'Pérez', 'correo_electronico': 'ana@test.com', 'contrasenia': 'secreto1',
+        'fecha_nacimiento': date(1990, 1, 1), 'sexo': 'F', 'nombre_usuario': 'ana'
+    })
+    return usuario.id_usuario
+
+
+def test_serie_con_imc_y_altura_arrastrada(db, id_usuario):
+    """El IMC usa la última altura conocida y una corrección del mismo día conserva lo no informado"""
+    repository = MedicionSaludRepository()
+    repository.registrar_medicion(id_usuario, peso=64.0, altura=160, fecha=date(2024, 1, 1))
+    repository.registrar_medicion(id_usuario, peso=62.0, fecha=date(2024, 1, 8))
+    repository.registrar_medicion(id_usuario, peso=61.0, fecha=date(2024, 1, 8))
+    repository.registrar_medicion(id_usuario, altura=1.6, fecha=date(2024, 2, 1))
+
+    serie = repository.obtener_serie(id_usuario)
+
+    assert serie['fechas'].tolist() == [date(2024, 1, 1), date(2024, 1, 8), date(2024, 2, 1)]
+    assert serie['peso'][:2].tolist() == [64.0, 61.0] and math.isnan(serie['peso'][2])
+    assert serie['imc'][:2].tolist() == [25.0, 23.83] and math.isnan(serie['imc'][2])
+
+    desde_enero_8 = repository.obtener_serie(id_usuario, fecha_inicio=date(2024, 1, 8))
+    assert desde_enero_8['imc'][0] == 23.83
+
+
+def test_agregados_semanales_y_mensuales(db, id_usuario):
+    """Los promedios se agrupan por semana desde el lunes y por mes"""
+    repository = MedicionSaludRepository()
+    for dia, peso in ((1, 60.0), (3, 62.0), (7, 64.0), (8, 70.0), (31, 80.0)):
+        repository.registrar_medicion(id_usuario, peso=peso, altura=2.0, fecha=date(2024, 1, dia))
+
+    semanas = repository.obtener_agregados(id_usuario, 'semana')
+    assert semanas['periodos'].tolist() == [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 29)]
+    assert semanas['peso_promedio'].tolist() == [62.0, 70.0, 80.0]
+    assert semanas['imc_promedio'].tolist() == [15.5, 17.5, 20.0]
+    assert semanas['mediciones'].tolist() == [3, 1, 1]
+
+    meses = repository.obtener_agregados(id_usuario, 'mes')
+    assert meses['periodos'].tolist() == [date(2024, 1, 1)]
+    assert meses['peso_promedio'].tolist() == [67.2]
+
+    with pytest.raises(ValueError):
+        repository.obtener_agregados(id_usuario, 'dia')
+
+
+def test_guardar_perfil_agrega_medicion(db, id_usuario):
+    """Cambiar peso o altura del perfil deja un punto en la serie del día"""
+    UsuarioRepository().actualizar_usuario(id_usuario, {'perfil': {'peso': 58.5, 'altura': 1.65}})
+    UsuarioRepository().actualizar_usuario(id_usuario, {'perfil': {'ocupacion': 'Docente'}})
+
+    with db.get_session() as session:
+        mediciones = session.query(MedicionSalud).all()
+        assert [(m.fecha, m.peso, m.altura) for m in mediciones] == [(date.today(), 58.5, pytest.approx(1.65))]
+
+    assert np.allclose(MedicionSaludRepository.calcular_imc([58.5, 70.0], [165, 0]), [21.49, np.nan], equal_nan=True)
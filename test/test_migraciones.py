@@ -0,0 +1,141 @@
+# Archivo: test/test_migraciones.py
+from datetime import date
+from sqlalchemy import inspect, select, text
+
+from db.Migraciones import (Migrador, cargar_migraciones, crear_indice, indices_declarados,
+                            rellenar_por_lotes, version_esquema)
+from db.migraciones import v0003_resumen_diario
+from model.Base import Base
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from model.ResumenDiarioUsuario import ResumenDiarioUsuario
+
+
+def test_versiones_registradas_al_iniciar(db):
+    """La conexión SQLite aplica todas las migraciones y registra cada versión"""
+    migrador = Migrador(db.get_engine())
+    versiones = [migracion.version for migracion in cargar_migraciones()]
+
+    assert migrador.version_actual() == versiones[-1]
+    assert migrador.pendientes() == []
+    assert migrador.migrar() == []
+    with db.get_engine().connect() as connection:
+        assert connection.execute(select(version_esquema.c.version)).scalars().all() == versiones
+
+
+def test_cadena_reproduce_modelos(db):
+    """Partiendo del esquema inicial fijo, las migraciones llegan a las tablas, columnas e índices de los modelos"""
+    engine = db.get_engine()
+    inspector = inspect(engine)
+    with engine.connect() as connection:
+        indices = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+
+    for tabla in Base.metadata.sorted_tables:
+        columnas = {columna['name'] for columna in inspector.get_columns(tabla.name)}
+        assert set(tabla.columns.keys()) <= columnas, tabla.name
+        assert {indice.name for indice in tabla.indexes} <= indices, tabla.name
+
+
+def test_crear_indice_idempotente(db):
+    """crear_indice repone un índice que falta y no falla si ya existe"""
+    engine = db.get_engine()
+    indice, = indices_declarados('seguimiento_diario', ['ix_seguimiento_completado'])
+    indice.drop(bind=engine)
+
+    crear_indice(engine, indice)
+    crear_indice(engine, indice)
+
+    nombres = {i['name'] for i in inspect(engine).get_indexes('seguimiento_diario')}
+    assert 'ix_seguimiento_completado' in nombres
+
+
+def test_relleno_resumen_por_lotes(db, crear_usuario):
+    """La migración del resumen diario lo reconstruye por lotes de usuarios"""
+    with db.get_session() as session:
+        for id_usuario in (1, 2, 3):
+            crear_usuario(session, id_usuario)
+            session.add(Habito(id_habito=id_usuario, nombre='Leer', frecuencia='Lunes',
+                               fecha_creacion=date(2024, 1, 1), id_usuario=id_usuario))
+        session.flush()
+        for id_usuario in (1, 2, 3):
+            session.add(SeguimientoDiario(id_usuario=id_usuario, id_habito=id_usuario,
+                                          fecha=date(2024, 1, 1), estado='completado'))
+
+    assert rellenar_por_lotes(db.get_engine(), 'seguimiento_diario', 'id_usuario', [], tamano_lote=2) == 2
+
+    v0003_resumen_diario.aplicar(db.get_engine())
+    v0003_resumen_diario.aplicar(db.get_engine())
+
+    with db.get_session() as session:
+        resumenes = session.query(ResumenDiarioUsuario).order_by(ResumenDiarioUsuario.id_usuario).all()
+        assert [(r.id_usuario, r.total_seguimientos, r.completados) for r in resumenes] == [
+            (1, 1, 1), (2, 1, 1), (3, 1, 1)
+        ]
+
+
+def test_rellenos_usan_el_engine_recibido(db):
+    """Las migraciones con relleno escriben en la base que se migra, no en la conexión global"""
+    from db.Connection import crear_engine_sqlite
+
+    engine = crear_engine_sqlite("sqlite://")
+    migrador = Migrador(engine)
+    migrador.migrar(hasta=4)
+    hoy = date.today()
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO usuarios (id_usuario, nombre, apellido, correo_electronico, contrasenia, "
+            "fecha_nacimiento, sexo, nombre_usuario) VALUES (1, 'N', 'A', 'u1@test.com', 'x', '1990-01-01', 'F', 'u1')"
+        ))
+        connection.execute(text("INSERT INTO comunidad (id_comunidad, nombre, id_creador) VALUES (1, 'C', 1)"))
+        connection.execute(text(
+            "INSERT INTO incorpora_comunidad (id_usuario, id_comunidad, estado, fecha_union) VALUES (1, 1, 'activo', :hoy)"
+        ), {'hoy': hoy})
+        connection.execute(text(
+            "INSERT INTO habito (id_habito, nombre, frecuencia, fecha_creacion, id_usuario) "
+            "VALUES (1, 'Leer', 'Lunes', '2024-01-01', 1)"
+        ))
+        for fecha in ('2024-01-01', '2024-01-02'):
+            connection.execute(text(
+                "INSERT INTO seguimiento_diario (fecha, id_habito, id_usuario, estado) VALUES (:f, 1, 1, 'completado')"
+            ), {'f': fecha})
+            connection.execute(text(
+                "INSERT INTO resumen_diario_usuario (id_usuario, fecha, total_seguimientos, completados, "
+                "habitos_distintos) VALUES (1, :f, 1, 1, 1)"
+            ), {'f': fecha})
+
+    migrador.migrar()
+
+    with engine.connect() as connection:
+        assert connection.execute(text(
+            "SELECT completados_total, racha_maxima, comunidades_activas FROM contador_logros_usuario"
+        )).all() == [(2, 2, 1)]
+        assert connection.execute(text("SELECT uniones FROM actividad_comunidad_diaria")).scalars().all() == [1]
+    with db.get_session() as session:
+        assert session.execute(text("SELECT COUNT(*) FROM contador_logros_usuario")).scalar() == 0
+    engine.dispose()
+
+
+def test_relleno_identificadores_normalizados(db):
+    """v0010 normaliza en Python los usuarios existentes, incluidos los no ASCII"""
+    from db.Connection import crear_engine_sqlite
+
+    engine = crear_engine_sqlite("sqlite://")
+    migrador = Migrador(engine)
+    migrador.migrar(hasta=9)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO usuarios (id_usuario, nombre, apellido, correo_electronico, contrasenia, "
+            "fecha_nacimiento, sexo, nombre_usuario) VALUES (1, 'N', 'A', ' Íñigo@Ejemplo.es', 'x', '1990-01-01', "
+            "'M', 'ÍÑIGO')"
+        ))
+
+    assert migrador.migrar() == [10]
+
+    with engine.connect() as connection:
+        assert connection.execute(text(
+            "SELECT nombre_usuario_normalizado, correo_normalizado FROM usuarios"
+        )).all() == [('íñigo', 'íñigo@ejemplo.es')]
+        indices = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+    assert {'ux_usuarios_login_nombre', 'ux_usuarios_login_correo'} <= indices
+    assert not indices & {'ux_usuarios_nombre_usuario_normalizado', 'ux_usuarios_correo_normalizado'}
+    engine.dispose()
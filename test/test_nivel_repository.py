@@ -0,0 +1,53 @@
+# Archivo: test/test_nivel_repository.py
+import pytest
+
+from model.Logro import Logro
+from model.Nivel import Nivel
+from model.Desbloquea import Desbloquea
+from model.AsignacionNivel import AsignacionNivel
+from repository.NivelRepository import NivelRepository
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Cinco usuarios con 0, 10, 50, 60 y 60 puntos y tres niveles"""
+    with db.get_session() as session:
+        for id_usuario in range(1, 6):
+            crear_usuario(session, id_usuario)
+        session.add(Logro(id_logro=1, nombre='Primer paso', puntos=10, descripcion='d'))
+        session.add(Logro(id_logro=2, nombre='Constancia', puntos=50, descripcion='d'))
+        session.add(Nivel(id_nivel=1, nombre='Inicial', puntos_requeridos=0))
+        session.add(Nivel(id_nivel=2, nombre='Intermedio', puntos_requeridos=50))
+        session.add(Nivel(id_nivel=3, nombre='Avanzado', puntos_requeridos=100))
+        session.flush()
+        for id_usuario, id_logro in ((2, 1), (3, 2), (4, 1), (4, 2), (5, 1), (5, 2)):
+            session.add(Desbloquea(id_usuario=id_usuario, id_logro=id_logro))
+        session.add(AsignacionNivel(id_usuario=4, id_nivel=3))
+        session.add(AsignacionNivel(id_usuario=5, id_nivel=2))
+
+
+def _niveles(db):
+    with db.get_session() as session:
+        return dict(session.query(AsignacionNivel.id_usuario, AsignacionNivel.id_nivel).all())
+
+
+def test_recalcular_todos_niveles_por_lotes(db):
+    """El recálculo completo corrige las asignaciones desactualizadas y crea las faltantes"""
+    reporte = NivelRepository().recalcular_todos_niveles(tamano_lote=2)
+
+    assert _niveles(db) == {1: 1, 2: 1, 3: 2, 4: 2, 5: 2}
+    assert (reporte['usuarios'], reporte['lotes']) == (5, 3)
+    assert (reporte['actualizados'], reporte['insertados']) == (1, 3)
+
+
+def test_recalcular_tras_cambiar_umbrales(db):
+    """Al mover un umbral basta con volver a ejecutar el recálculo"""
+    repository = NivelRepository()
+    repository.recalcular_todos_niveles()
+
+    with db.get_session() as session:
+        session.get(Nivel, 3).puntos_requeridos = 60
+
+    reporte = repository.recalcular_todos_niveles()
+    assert _niveles(db) == {1: 1, 2: 1, 3: 2, 4: 3, 5: 3}
+    assert (reporte['actualizados'], reporte['insertados']) == (2, 0)
@@ -0,0 +1,61 @@
+# Archivo: test/test_ranking_comunidad.py
+import pytest
+
+from model.Comunidad import Comunidad
+from model.Logro import Logro
+from model.RankingComunidad import RankingComunidad
+from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
+from repository.LogroRepository import LogroRepository
+from repository.RankingComunidadRepository import RankingComunidadRepository
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Tres usuarios, una comunidad y dos logros"""
+    with db.get_session() as session:
+        for id_usuario, nombre in ((1, 'ana'), (2, 'beto'), (3, 'carla')):
+            crear_usuario(session, id_usuario, nombre)
+        session.add(Comunidad(id_comunidad=1, nombre='Lectores'))
+        session.add(Logro(id_logro=1, nombre='Primer paso', puntos=10, descripcion='d'))
+        session.add(Logro(id_logro=2, nombre='Constancia', puntos=50, descripcion='d'))
+
+
+def _ranking():
+    return [(item['nombre_usuario'], item['puntos_totales'])
+            for item in RankingComunidadRepository().obtener_ranking_comunidad(1)]
+
+
+def test_ranking_se_mantiene_con_logros_y_membresias(db):
+    """Nuevos logros y cambios de membresía actualizan el ranking sin recalcularlo"""
+    incorpora = IncorporaComunidadRepository()
+    logros = LogroRepository()
+
+    logros.asociar_logro_a_usuario(2, 1)
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 1, 'id_comunidad': 1, 'estado': 'activo'})
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 2, 'id_comunidad': 1, 'estado': 'activo'})
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 3, 'id_comunidad': 1, 'estado': 'pendiente'})
+    assert _ranking() == [('beto', 10), ('ana', 0)]
+
+    logros.asociar_logro_a_usuario(1, 2)
+    incorpora.actualizar_estado_incorporacion(3, 1, 'activo')
+    assert _ranking() == [('ana', 50), ('beto', 10), ('carla', 0)]
+
+    incorpora.actualizar_estado_incorporacion(2, 1, 'bloqueado')
+    incorpora.eliminar_incorporacion(3, 1)
+    assert _ranking() == [('ana', 50)]
+
+
+def test_reconstruir_ranking(db):
+    """La reconstrucción con un solo join coincide con el mantenimiento incremental"""
+    incorpora = IncorporaComunidadRepository()
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 1, 'id_comunidad': 1, 'estado': 'activo'})
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 2, 'id_comunidad': 1, 'estado': 'activo'})
+    LogroRepository().asociar_logro_a_usuario(1, 1)
+    LogroRepository().asociar_logro_a_usuario(1, 2)
+    incremental = _ranking()
+
+    with db.get_session() as session:
+        session.query(RankingComunidad).delete()
+    RankingComunidadRepository().reconstruir([1])
+
+    assert _ranking() == incremental == [('ana', 60), ('beto', 0)]
@@ -0,0 +1,117 @@
+# Archivo: test/test_reglas_logro.py
+import pytest
+from datetime import date, timedelta
+
+from model.Habito import Habito
+from model.Comunidad import Comunidad
+from model.Logro import Logro
+from model.ContadorLogrosUsuario import ContadorLogrosUsuario
+from model.SeguimientoDiario import SeguimientoDiario
+from repository.IncorporaComunidadRepository import IncorporaComunidadRepository
+from repository.LogroRepository import LogroRepository
+from repository.ReglasLogroRepository import ReglasLogroRepository
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+
+INICIO = date(2024, 3, 1)
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un usuario, dos hábitos, dos comunidades y logros automáticos"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        for id_habito in (1, 2):
+            session.add(Habito(id_habito=id_habito, nombre=f'H{id_habito}', frecuencia='Lunes',
+                               fecha_creacion=date(2024, 1, 1), id_usuario=1))
+        for id_comunidad in (1, 2):
+            session.add(Comunidad(id_comunidad=id_comunidad, nombre=f'C{id_comunidad}'))
+        session.add(Logro(id_logro=1, nombre='Tres completados', puntos=10, descripcion='d',
+                          tipo_regla='completados', umbral=3))
+        session.add(Logro(id_logro=2, nombre='Racha de 3', puntos=20, descripcion='d', tipo_regla='racha', umbral=3))
+        session.add(Logro(id_logro=3, nombre='Dos comunidades', puntos=5, descripcion='d',
+                          tipo_regla='comunidades', umbral=2))
+        session.add(Logro(id_logro=4, nombre='Manual', puntos=99, descripcion='d'))
+
+
+def _marcar(id_habito, dia, estado='completado'):
+    SeguimientoDiarioRepository().crear_o_actualizar_seguimiento(
+        {'id_usuario': 1, 'id_habito': id_habito, 'fecha': INICIO + timedelta(days=dia), 'estado': estado}
+    )
+
+
+def _logros():
+    return sorted(logro.id_logro for logro in LogroRepository().obtener_logros_por_usuario(1))
+
+
+def _contador(db):
+    with db.get_session() as session:
+        contador = session.get(ContadorLogrosUsuario, 1)
+        return contador.completados_total, contador.racha_actual, contador.racha_maxima
+
+
+def test_logro_por_completados(db):
+    """El contador de completados sube y baja con cada cambio de estado"""
+    _marcar(1, 0)
+    _marcar(2, 0)
+    _marcar(2, 0, 'pendiente')
+    _marcar(1, 5)
+    assert _logros() == []
+
+    _marcar(2, 5)
+    assert _logros() == [1]
+    assert _contador(db)[0] == 3
+
+
+def test_logro_por_racha(db):
+    """Días consecutivos suman racha; un día marcado en el pasado puede unir dos rachas"""
+    for dia in (0, 1, 3):
+        _marcar(1, dia)
+    assert _contador(db) == (3, 1, 2)
+    assert 2 not in _logros()
+
+    _marcar(1, 2)
+    assert _contador(db) == (4, 4, 4)
+    assert 2 in _logros()
+
+    _marcar(1, 3, 'pendiente')
+    assert _contador(db)[1:] == (3, 3)
+
+
+def test_desmarcar_acorta_racha_maxima(db):
+    """Desmarcar el día que unía dos rachas devuelve la máxima a la más larga que queda"""
+    for dia in (0, 1, 2, 3, 4, 10, 11):
+        _marcar(1, dia)
+    assert _contador(db)[1:] == (2, 5)
+
+    _marcar(1, 2, 'pendiente')
+    assert _contador(db)[1:] == (2, 2)
+
+    # Desmarcar fuera de la racha más larga no la toca
+    _marcar(1, 2)
+    _marcar(1, 11, 'pendiente')
+    assert _contador(db)[1:] == (1, 5)
+
+
+def test_logro_por_comunidades(db):
+    """Las altas y bajas de membresía activa alimentan la regla de comunidades"""
+    incorpora = IncorporaComunidadRepository()
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 1, 'id_comunidad': 1, 'estado': 'activo'})
+    incorpora.incorporar_usuario_a_comunidad({'id_usuario': 1, 'id_comunidad': 2, 'estado': 'pendiente'})
+    assert _logros() == []
+
+    incorpora.actualizar_estado_incorporacion(1, 2, 'activo')
+    assert _logros() == [3]
+
+
+def test_reconstruir_contadores(db):
+    """La reconstrucción parte del resumen diario y desbloquea lo alcanzado"""
+    with db.get_session() as session:
+        for dia in range(4):
+            session.add(SeguimientoDiario(id_usuario=1, id_habito=1, fecha=INICIO + timedelta(days=dia),
+                                          estado='completado'))
+    ResumenDiarioRepository().reconstruir(id_usuario=1)
+
+    ReglasLogroRepository().reconstruir_contadores([1])
+    assert _contador(db) == (4, 4, 4)
+    assert _logros() == [1, 2]
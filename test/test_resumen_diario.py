@@ -0,0 +1,156 @@
+# Archivo: test/test_resumen_diario.py
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+
+from db.Connection import DatabaseConnection, crear_engine_sqlite
+from db.Migraciones import Migrador
+from model.Habito import Habito
+from model.SeguimientoDiario import SeguimientoDiario
+from model.ResumenDiarioUsuario import ResumenDiarioUsuario
+from model.ContadorLogrosUsuario import ContadorLogrosUsuario
+from repository.ResumenDiarioRepository import ResumenDiarioRepository
+from repository.SeguimientoDiarioRepository import SeguimientoDiarioRepository
+from repository.HabitosRepository import HabitosRepository
+
+
+@pytest.fixture(autouse=True)
+def datos(db, crear_usuario):
+    """Un usuario con dos hábitos"""
+    with db.get_session() as session:
+        crear_usuario(session)
+        session.add(Habito(id_habito=1, nombre='Leer', frecuencia='Lunes',
+                           fecha_creacion=date(2024, 1, 1), id_usuario=1))
+        session.add(Habito(id_habito=2, nombre='Correr', frecuencia='Lunes',
+                           fecha_creacion=date(2024, 1, 1), id_usuario=1))
+
+
+def _resumen(db, fecha):
+    with db.get_session() as session:
+        fila = session.get(ResumenDiarioUsuario, (1, fecha))
+        return None if fila is None else (fila.total_seguimientos, fila.completados, fila.habitos_distintos)
+
+
+def test_resumen_se_mantiene_en_cada_escritura(db):
+    """Crear, actualizar y eliminar seguimientos mantiene el resumen del día"""
+    repository = SeguimientoDiarioRepository()
+    dia = date(2024, 1, 1)
+
+    repository.crear_o_actualizar_seguimiento({'id_usuario': 1, 'id_habito': 1, 'fecha': dia, 'estado': 'completado'})
+    repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 2, 'fecha': dia, 'estado': 'pendiente'})
+    assert _resumen(db, dia) == (2, 1, 2)
+
+    repository.actualizar_estado(1, 2, dia, 'completado')
+    assert _resumen(db, dia) == (2, 2, 2)
+
+    repository.eliminar_seguimiento(1, 1, dia)
+    assert _resumen(db, dia) == (1, 1, 1)
+
+    HabitosRepository().eliminar_habito(2)
+    assert _resumen(db, dia) is None
+
+
+def test_estadisticas_desde_resumen(db):
+    """Las estadísticas del usuario suman el resumen diario"""
+    repository = SeguimientoDiarioRepository()
+    for dia, estado in ((1, 'completado'), (2, 'pendiente'), (3, 'completado')):
+        repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 1, 'fecha': date(2024, 1, dia), 'estado': estado})
+    repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 2, 'fecha': date(2024, 1, 3), 'estado': 'completado'})
+
+    estadisticas = repository.obtener_estadisticas_usuario(1, date(2024, 1, 1), date(2024, 1, 3))
+    assert estadisticas['total_seguimientos'] == 4
+    assert estadisticas['completados'] == 3
+    assert estadisticas['habitos_activos'] == 2
+
+    estadisticas = HabitosRepository().obtener_estadisticas_usuario(1, date(2024, 1, 2), date(2024, 1, 3))
+    assert estadisticas['total_seguimientos'] == 3
+    assert estadisticas['completados'] == 2
+
+
+def test_reconstruir_resumen(db):
+    """La reconstrucción regenera el resumen desde los seguimientos históricos"""
+    with db.get_session() as session:
+        session.add(SeguimientoDiario(id_usuario=1, id_habito=1, fecha=date(2024, 1, 1), estado='completado'))
+        session.add(SeguimientoDiario(id_usuario=1, id_habito=2, fecha=date(2024, 1, 1), estado='pendiente'))
+        session.add(SeguimientoDiario(id_usuario=1, id_habito=1, fecha=date(2024, 1, 2), estado='pendiente'))
+
+    assert ResumenDiarioRepository().reconstruir(id_usuario=1) == 2
+    assert _resumen(db, date(2024, 1, 1)) == (2, 1, 2)
+    assert _resumen(db, date(2024, 1, 2)) == (1, 0, 1)
+
+
+def test_recalcular_sobre_fila_existente(db):
+    """El recálculo actualiza con upsert la fila que otra transacción ya escribió y borra los días vacíos"""
+    with db.get_session() as session:
+        session.add(SeguimientoDiario(id_usuario=1, id_habito=1, fecha=date(2024, 1, 1), estado='completado'))
+        session.add(ResumenDiarioUsuario(id_usuario=1, fecha=date(2024, 1, 1), total_seguimientos=9,
+                                         completados=9, habitos_distintos=9))
+        session.add(ResumenDiarioUsuario(id_usuario=1, fecha=date(2024, 1, 2), total_seguimientos=1,
+                                         completados=0, habitos_distintos=1))
+
+    with db.get_session() as session:
+        ResumenDiarioRepository().recalcular_dias(session, [(1, date(2024, 1, 1)), (1, date(2024, 1, 2))])
+
+    assert _resumen(db, date(2024, 1, 1)) == (1, 1, 1)
+    assert _resumen(db, date(2024, 1, 2)) is None
+
+
+def test_habitos_activos_en_rango(db):
+    """Cuenta los hábitos con algún seguimiento en el rango, no los de fuera"""
+    repository = SeguimientoDiarioRepository()
+    repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 1, 'fecha': date(2024, 1, 1), 'estado': 'completado'})
+    repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 1, 'fecha': date(2024, 1, 5), 'estado': 'pendiente'})
+    repository.crear_seguimiento({'id_usuario': 1, 'id_habito': 2, 'fecha': date(2024, 1, 9), 'estado': 'completado'})
+
+    resumen = ResumenDiarioRepository()
+    assert resumen.contar_habitos_activos(1, date(2024, 1, 2), date(2024, 1, 6)) == 1
+    assert resumen.contar_habitos_activos(1, date(2024, 1, 1), date(2024, 1, 9)) == 2
+    assert resumen.contar_habitos_activos(1, date(2024, 1, 6), date(2024, 1, 8)) == 0
+
+
+@pytest.fixture
+def db_archivo(tmp_path, monkeypatch, crear_usuario):
+    """BD SQLite en archivo (conexiones independientes por sesión) con un usuario y dos hábitos"""
+    engine = crear_engine_sqlite(f"sqlite:///{tmp_path / 'habitos.db'}")
+    Migrador(engine).migrar()
+    conexion = DatabaseConnection()
+    monkeypatch.setattr(conexion, '_engine', engine)
+    monkeypatch.setattr(conexion, '_session_factory', sessionmaker(bind=engine, autoflush=False,
+                                                                   expire_on_commit=False))
+    with conexion.get_session() as session:
+        crear_usuario(session)
+        for id_habito in (1, 2):
+            session.add(Habito(id_habito=id_habito, nombre=f'h{id_habito}', frecuencia='Lunes',
+                               fecha_creacion=date(2024, 1, 1), id_usuario=1))
+    yield conexion
+    engine.dispose()
+
+
+def test_recalcular_mismo_dia_desde_dos_sesiones(db_archivo):
+    """Dos transacciones que guardan hábitos distintos del mismo día dejan el resumen con ambos"""
+    dia = date(2024, 1, 1)
+    listos = threading.Barrier(2)
+    errores = []
+
+    def guardar(id_habito):
+        try:
+            with db_archivo.get_session() as session:
+                session.add(SeguimientoDiario(id_usuario=1, id_habito=id_habito, fecha=dia, estado='completado'))
+                listos.wait()
+                ResumenDiarioRepository().recalcular_dias(session, [(1, dia)])
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=guardar, args=(id_habito,)) for id_habito in (1, 2)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert _resumen(db_archivo, dia) == (2, 2, 2)
+    with db_archivo.get_session() as session:
+        assert session.get(ContadorLogrosUsuario, 1).completados_total == 2
+
@@ -0,0 +1,213 @@
+# Archivo: test/test_usuario_repository.py
+import pytest
+from datetime import date
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from model.PerfilUsuario import PerfilUsuario
+from model.Usuario import Usuario
+from repository import Contrasenias
+from repository.UsuarioRepository import UsuarioRepository
+
+
+def _datos_usuario(**cambios):
+    datos = {
+        'nombre': 'Ana', 'apellido': 'Pérez', 'correo_electronico': 'Ana@Test.com', 'contrasenia': 'secreto1',
+        'fecha_nacimiento': date(1990, 1, 1), 'sexo': 'F', 'nombre_usuario': 'AnaP'
+    }
+    datos.update(cambios)
+    return datos
+
+
+def _contrasenia_guardada(db, id_usuario):
+    with db.get_session() as session:
+        return session.get(Usuario, id_usuario).contrasenia
+
+
+def test_crear_y_autenticar_con_hash(db):
+    """La contraseña se guarda con hash y el login no distingue mayúsculas en usuario ni correo"""
+    repository = UsuarioRepository()
+    usuario = repository.crear_usuario(_datos_usuario())
+
+    guardada = _contrasenia_guardada(db, usuario.id_usuario)
+    assert Contrasenias.es_hash(guardada) and 'secreto1' not in guardada
+
+    assert repository.autenticar_usuario('anap', 'secreto1').id_usuario == usuario.id_usuario
+    assert repository.autenticar_usuario(' ANA@test.com ', 'secreto1').id_usuario == usuario.id_usuario
+    assert repository.autenticar_usuario('anap', 'otra') is None
+    assert repository.autenticar_usuario('nadie', 'secreto1') is None
+
+
+def test_contrasenia_con_forma_de_hash(db):
+    """Una contraseña con forma de hash también se deriva; un hash almacenado mal formado no autentica"""
+    repository = UsuarioRepository()
+    usuario = repository.crear_usuario(_datos_usuario(contrasenia='pbkdf2_sha256$1$x$y'))
+
+    guardada = _contrasenia_guardada(db, usuario.id_usuario)
+    assert guardada != 'pbkdf2_sha256$1$x$y' and not Contrasenias.necesita_rehash(guardada)
+    assert repository.autenticar_usuario('anap', 'pbkdf2_sha256$1$x$y').id_usuario == usuario.id_usuario
+
+    with db.get_session() as session:
+        session.get(Usuario, usuario.id_usuario).contrasenia = 'pbkdf2_sha256$x$y$z'
+    assert repository.autenticar_usuario('anap', 'pbkdf2_sha256$x$y$z') is None
+    assert not Contrasenias.verificar('secreto1', 'pbkdf2_sha256$1000$no-es-base64$@@')
+
+
+def test_rehash_de_contrasenia_heredada(db, monkeypatch):
+    """Un valor en texto plano o con pocas iteraciones se reemplaza por un hash actual al iniciar sesión"""
+    with db.get_session() as session:
+        session.add(Usuario(id_usuario=1, **_datos_usuario(contrasenia='secreto1')))
+
+    repository = UsuarioRepository()
+    assert repository.autenticar_usuario('AnaP', 'secreto1') is not None
+    migrada = _contrasenia_guardada(db, 1)
+    assert Contrasenias.es_hash(migrada) and not Contrasenias.necesita_rehash(migrada)
+
+    monkeypatch.setenv('contrasenia_iteraciones', '2000')
+    assert repository.autenticar_usuario('AnaP', 'secreto1') is not None
+    assert _contrasenia_guardada(db, 1).split('$')[1] == '2000'
+
+
+def test_unicidad_normalizada(db):
+    """Los índices únicos normalizados rechazan duplicados que solo difieren en mayúsculas"""
+    repository = UsuarioRepository()
+    repository.crear_usuario(_datos_usuario())
+
+    assert repository.usuario_existe(nombre_usuario='anap')
+    assert repository.usuario_existe(correo_electronico='ANA@TEST.COM')
+    assert not repository.usuario_existe(nombre_usuario='otra')
+
+    with pytest.raises(IntegrityError):
+        with db.get_session() as session:
+            session.add(Usuario(**_datos_usuario(nombre_usuario='ANAP', correo_electronico='otra@test.com')))
+
+
+def test_identificadores_no_ascii(db):
+    """La normalización en Python iguala mayúsculas y formas Unicode que lower() de SQLite no convierte"""
+    repository = UsuarioRepository()
+    usuario = repository.crear_usuario(_datos_usuario(nombre_usuario='Íñigo', correo_electronico='Íñigo@Ejemplo.es'))
+
+    assert repository.usuario_existe(nombre_usuario='ÍÑIGO')
+    assert repository.usuario_existe(correo_electronico='íñigo@ejemplo.es')
+    assert repository.autenticar_usuario('íñigo', 'secreto1').id_usuario == usuario.id_usuario
+    # Misma palabra con acentos combinados (forma NFD)
+    assert repository.autenticar_usuario('I\u0301n\u0303igo', 'secreto1').id_usuario == usuario.id_usuario
+
+    with pytest.raises(ValueError, match="nombre de usuario"):
+        repository.registrar_usuario_con_perfil(
+            _datos_usuario(nombre_usuario='íñigo', correo_electronico='otra@test.com'), {}
+        )
+    with pytest.raises(ValueError, match="correo"):
+        repository.actualizar_usuario(
+            repository.crear_usuario(_datos_usuario(correo_electronico='otra@test.com')).id_usuario,
+            {'usuario': {'correo_electronico': 'ÍÑIGO@ejemplo.es'}}
+        )
+
+
+def test_usuario_inexistente_cuesta_lo_mismo(db, monkeypatch):
+    """Sin usuario igual se deriva un hash, para no revelar por tiempo qué nombres existen"""
+    UsuarioRepository().crear_usuario(_datos_usuario())
+    derivaciones = []
+    original = Contrasenias.hashlib.pbkdf2_hmac
+
+    def contar(*args):
+        derivaciones.append(args[3])
+        return original(*args)
+
+    monkeypatch.setattr(Contrasenias.hashlib, 'pbkdf2_hmac', contar)
+    repository = UsuarioRepository()
+    assert repository.autenticar_usuario('nadie', 'secreto1') is None
+    assert repository.autenticar_usuario('nadie', 'secreto1') is None
+    assert repository.autenticar_usuario('anap', 'otra') is None
+
+    iteraciones = Contrasenias.iteraciones_configuradas()
+    assert derivaciones[-3:] == [iteraciones] * 3
+
+
+def test_registrar_usuario_con_perfil(db):
+    """Usuario y perfil se crean juntos; un duplicado se informa sin dejar filas a medias"""
+    repository = UsuarioRepository()
+    usuario = repository.registrar_usuario_con_perfil(
+        _datos_usuario(), {'peso': 60.0, 'altura': 1.65, 'ocupacion': 'Docente'}
+    )
+    assert usuario.perfil.id_usuario == usuario.id_usuario
+
+    with pytest.raises(ValueError, match="nombre de usuario"):
+        repository.registrar_usuario_con_perfil(
+            _datos_usuario(correo_electronico='otra@test.com', nombre_usuario='anap'), {'peso': 70.0}
+        )
+    with pytest.raises(ValueError, match="correo"):
+        repository.registrar_usuario_con_perfil(
+            _datos_usuario(correo_electronico='ANA@test.com', nombre_usuario='otra'), {'peso': 70.0}
+        )
+
+    with db.get_session() as session:
+        assert session.query(Usuario).count() == 1
+        assert session.query(PerfilUsuario).count() == 1
+
+
+def test_mensaje_duplicado_por_restriccion(db):
+    """El mensaje sale del nombre de la restricción, no de buscar texto en el detalle con el valor"""
+    class ErrorPostgres(Exception):
+        def __init__(self, mensaje, restriccion):
+            super().__init__(mensaje)
+            self.diag = type('Diag', (), {'constraint_name': restriccion})()
+
+    orig = ErrorPostgres('duplicate key value violates unique constraint "ux_usuarios_login_nombre"\n'
+                         'DETAIL:  Key (nombre_usuario_normalizado)=(correo_fan) already exists.',
+                         'ux_usuarios_login_nombre')
+    assert UsuarioRepository._mensaje_duplicado(IntegrityError('INSERT', {}, orig)) == \
+        "El nombre de usuario ya está en uso"
+
+    repository = UsuarioRepository()
+    repository.crear_usuario(_datos_usuario(nombre_usuario='correo_fan'))
+    with pytest.raises(ValueError, match="nombre de usuario"):
+        repository.registrar_usuario_con_perfil(
+            _datos_usuario(nombre_usuario='Correo_Fan', correo_electronico='otra@test.com'), {}
+        )
+    with pytest.raises(ValueError, match="correo"):
+        repository.registrar_usuario_con_perfil(_datos_usuario(nombre_usuario='nombre_fan'), {})
+
+
+@pytest.fixture
+def sentencias(db):
+    """SQL ejecutado contra la BD durante la prueba"""
+    ejecutadas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        ejecutadas.append(statement)
+
+    event.listen(db.get_engine(), 'before_cursor_execute', registrar)
+    yield ejecutadas
+    event.remove(db.get_engine(), 'before_cursor_execute', registrar)
+
+
+def test_obtener_usuario_con_perfil_una_consulta(db, sentencias):
+    """Usuario y perfil llegan en una sola consulta y se pueden leer fuera de la sesión"""
+    repository = UsuarioRepository()
+    creado = repository.registrar_usuario_con_perfil(_datos_usuario(), {'peso': 60.0, 'ocupacion': 'Docente'})
+    sentencias.clear()
+
+    usuario = repository.obtener_usuario_con_perfil(creado.id_usuario)
+
+    assert usuario.perfil.ocupacion == 'Docente'
+    assert len([s for s in sentencias if s.lstrip().upper().startswith('SELECT')]) == 1
+    assert repository.obtener_usuario_con_perfil(999) is None
+
+
+def test_actualizar_usuario_sin_select(db, sentencias):
+    """La actualización emite solo los UPDATE de las columnas recibidas y crea el perfil si falta"""
+    repository = UsuarioRepository()
+    creado = repository.crear_usuario(_datos_usuario())
+    sentencias.clear()
+
+    assert repository.actualizar_usuario(creado.id_usuario, {'usuario': {'apellido': 'Gómez'}, 'perfil': {'peso': 58.5}})
+    assert repository.actualizar_usuario(creado.id_usuario, {'perfil': {'ocupacion': 'Docente'}})
+
+    assert not any(s.lstrip().upper().startswith('SELECT') for s in sentencias)
+    assert 'UPDATE usuarios SET apellido=? WHERE usuarios.id_usuario = ?' in sentencias
+
+    usuario = repository.obtener_usuario_con_perfil(creado.id_usuario)
+    assert usuario.apellido == 'Gómez'
+    assert (usuario.perfil.peso, usuario.perfil.ocupacion) == (58.5, 'Docente')
+    assert not repository.actualizar_usuario(999, {'usuario': {'apellido': 'X'}})
@@ -1,71 +1,153 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QListWidgetItem
-from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListView, QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QPen, QFontMetrics
+
+# Rol con el diccionario completo del logro
+ROL_LOGRO = Qt.ItemDataRole.UserRole + 1
+
+
+class LogrosListModel(QAbstractListModel):
+    """Modelo paginado del catálogo de logros.
+
+    No consulta la base de datos: cuando la vista necesita más filas emite
+    pagina_solicitada y el controlador le entrega la página con agregar_pagina.
+    """
+
+    pagina_solicitada = pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._logros = []
+        self._hay_mas = True
+        self._cargando = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._logros)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        logro = self._logros[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return logro['nombre']
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return logro['descripcion']
+        if role == ROL_LOGRO:
+            return logro
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._hay_mas and not self._cargando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._cargando = True
+        self.pagina_solicitada.emit(len(self._logros))
+
+    def agregar_pagina(self, logros, hay_mas: bool):
+        """Añadir una página de logros (diccionarios del repositorio) al final"""
+        self._cargando = False
+        self._hay_mas = hay_mas
+        if not logros:
+            return
+        inicio = len(self._logros)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(logros) - 1)
+        self._logros.extend(logros)
+        self.endInsertRows()
+
+    def cancelar_carga(self):
+        """Detener la paginación tras un error de carga"""
+        self._cargando = False
+        self._hay_mas = False
+
+
+class LogroDelegate(QStyledItemDelegate):
+    """Dibuja cada logro como una tarjeta: azul si está desbloqueado, gris si no"""
+
+    ALTO = 64
+    MARGEN = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fuente_nombre = QFont("Arial", 10, QFont.Weight.Bold)
+        self.fuente_descripcion = QFont("Arial", 9)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ALTO)
+
+    def paint(self, painter, option, index):
+        logro = index.data(ROL_LOGRO)
+        if logro is None:
+            return super().paint(painter, option, index)
+
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+
+        rect = QRectF(option.rect).adjusted(self.MARGEN, self.MARGEN / 2, -self.MARGEN, -self.MARGEN / 2)
+        if logro['desbloqueado']:
+            fondo, borde, texto, detalle, icono = "#eaf2f8", "#aed6f1", "#000000", "#555555", "🏆"
+        else:
+            fondo, borde, texto, detalle, icono = "#f2f3f4", "#d5d8dc", "#7f8c8d", "#95a5a6", "🔒"
+        if option.state & QStyle.StateFlag.State_Selected:
+            borde = "#3498db"
+
+        painter.setPen(QPen(QColor(borde), 1))
+        painter.setBrush(QColor(fondo))
+        painter.drawRoundedRect(rect, 6, 6)
+
+        area = rect.adjusted(10, 5, -10, -5)
+        mitad = area.height() / 2
+
+        painter.setFont(self.fuente_nombre)
+        painter.setPen(QColor(texto))
+        painter.drawText(area.adjusted(0, 0, 0, -mitad), Qt.AlignmentFlag.AlignVCenter,
+                         f"{icono} {logro['nombre']} ({logro['puntos']} pts)")
+
+        painter.setFont(self.fuente_descripcion)
+        painter.setPen(QColor(detalle))
+        descripcion = QFontMetrics(self.fuente_descripcion).elidedText(
+            f"📝 {logro['descripcion'] or ''}", Qt.TextElideMode.ElideRight, int(area.width())
+        )
+        painter.drawText(area.adjusted(0, mitad, 0, 0), Qt.AlignmentFlag.AlignVCenter, descripcion)
+
+        painter.restore()
+
 
 class LogroWidget(QWidget):
-    def __init__(self, logros, nombre_usuario="Usuario"):
+    def __init__(self, nombre_usuario="Usuario"):
         super().__init__()
-        self.setWindowTitle(f"🎖 Logros de {nombre_usuario}")
         self.setGeometry(200, 100, 520, 500)
 
         layout = QVBoxLayout()
         self.setLayout(layout)
 
-        titulo = QLabel(f"🏅 Logros Desbloqueados por {nombre_usuario}")
-        titulo.setFont(QFont("Arial", 13, QFont.Weight.Bold))
-        layout.addWidget(titulo)
+        self.titulo = QLabel()
+        self.titulo.setFont(QFont("Arial", 13, QFont.Weight.Bold))
+        layout.addWidget(self.titulo)
 
-        self.lista_logros = QListWidget()
-        layout.addWidget(self.lista_logros)
+        self.lbl_resumen = QLabel("Cargando logros...")
+        self.lbl_resumen.setStyleSheet("color: #555;")
+        layout.addWidget(self.lbl_resumen)
 
-        self.mostrar_logros(logros)
+        self.modelo = LogrosListModel(self)
+        self.lista_logros = QListView()
+        self.lista_logros.setModel(self.modelo)
+        self.lista_logros.setItemDelegate(LogroDelegate(self.lista_logros))
+        self.lista_logros.setUniformItemSizes(True)
+        self.lista_logros.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        layout.addWidget(self.lista_logros)
 
-    def mostrar_logros(self, logros):
-        self.lista_logros.clear()
+        self.establecer_usuario(nombre_usuario)
 
-        if not logros:
-            item = QListWidgetItem()
-            mensaje = QLabel("📭 Aún no has desbloqueado ningún logro.")
-            mensaje.setFont(QFont("Arial", 10))
-            mensaje.setStyleSheet("color: #777; padding: 10px;")
-
-            contenedor = QWidget()
-            layout = QVBoxLayout()
-            layout.addWidget(mensaje)
-            layout.setContentsMargins(10, 10, 10, 10)
-            contenedor.setLayout(layout)
-
-            item.setSizeHint(contenedor.sizeHint())
-            self.lista_logros.addItem(item)
-            self.lista_logros.setItemWidget(item, contenedor)
-            return
-
-        for logro in logros:
-            item = QListWidgetItem()
-            widget = self.crear_widget_logro(logro)
-            item.setSizeHint(widget.sizeHint())
-            self.lista_logros.addItem(item)
-            self.lista_logros.setItemWidget(item, widget)
+    def establecer_usuario(self, nombre_usuario):
+        self.setWindowTitle(f"🎖 Logros de {nombre_usuario}")
+        self.titulo.setText(f"🏅 Logros de {nombre_usuario}")
 
-    def crear_widget_logro(self, logro):
-        widget = QWidget()
-        layout = QVBoxLayout()
-        layout.setContentsMargins(10, 5, 10, 5)
-
-        lbl_nombre = QLabel(f"🏆 {logro.nombre} ({logro.puntos} pts)")
-        lbl_nombre.setFont(QFont("Arial", 10, QFont.Weight.Bold))
-        layout.addWidget(lbl_nombre)
-
-        lbl_desc = QLabel(f"📝 {logro.descripcion}")
-        lbl_desc.setWordWrap(True)
-        lbl_desc.setStyleSheet("color: #555; font-size: 9pt;")
-        layout.addWidget(lbl_desc)
-
-        widget.setLayout(layout)
-        widget.setStyleSheet("""
-            QWidget {
-                background-color: #eaf2f8;
-                border: 1px solid #aed6f1;
-                border-radius: 6px;
-            }
-        """)
-        return widget
+    def mostrar_resumen(self, desbloqueados: int, total: int):
+        if total == 0:
+            self.lbl_resumen.setText("📭 Todavía no hay logros disponibles.")
+        elif desbloqueados == 0:
+            self.lbl_resumen.setText(f"📭 Aún no has desbloqueado ningún logro (0 de {total}).")
+        else:
+            self.lbl_resumen.setText(f"Desbloqueaste {desbloqueados} de {total} logros.")